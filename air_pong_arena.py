@@ -0,0 +1,384 @@
+"""Playing many headless air-pong matches across a pool of processes"""
+
+import argparse
+import collections
+import concurrent.futures
+import functools
+import json
+import os
+import random
+import statistics
+import time
+from air_pong_bot import BotPaddle
+from air_pong_model import PongModel
+from air_pong_simulate import TrackingPaddle, simulate
+
+# Scripted paddle policies matches can be played with, each called with the
+# player (0 or 1) and a seed to make a paddle with an update(model, step)
+# method.
+POLICIES = {
+    "tracking": functools.partial(TrackingPaddle, jitter=0.2),
+    "steady": functools.partial(TrackingPaddle, jitter=0.0),
+    "wild": functools.partial(TrackingPaddle, jitter=0.5),
+    "flat": functools.partial(TrackingPaddle, tilt=0.25, swing=1.5),
+    "bot": functools.partial(BotPaddle, difficulty=0.5),
+    "bot-easy": functools.partial(BotPaddle, difficulty=0.0),
+    "bot-hard": functools.partial(BotPaddle, difficulty=1.0),
+}
+
+
+def play_match(
+    match,
+    players=("tracking", "tracking"),
+    seed=0,
+    swap_sides=True,
+    win_threshold=11,
+    serve_increment=2,
+    time_step=0.01,
+    max_points=200,
+    max_rally_steps=10000,
+):
+    """
+    Play a complete match between two scripted policies.
+
+    The paddles are seeded from the arena seed and the match number, so a
+    match plays out the same wherever and whenever it is run.
+
+    Args:
+        match: an int number of the match in the arena
+        players: a pair of POLICIES names, for the left and right paddles
+        seed: an int seed for the arena
+        swap_sides: a bool for swapping the players' sides in odd matches
+        win_threshold: an int number of points to play to
+        serve_increment: an int number of points between changes of server
+        time_step: a float for the simulated seconds per physics step
+        max_points: an int limit on the points played, after which the
+            match is given up without a winner
+        max_rally_steps: an int limit on the steps in a rally, as for
+            simulate()
+
+    Returns:
+        A dict of the match number and seed, the pair of policies playing
+        on the left and right, the winner (1 or 2 for the left or right
+        paddle, or False), the final score, a list of each rally's steps,
+        the number of rallies abandoned, the steps played, and the seconds
+        and CPU seconds taken to play them.
+    """
+    rng = random.Random(f"{seed}:{match}")
+    sides = tuple(players)
+    if swap_sides and match % 2:
+        sides = sides[::-1]
+    policies = [
+        POLICIES[name](player, seed=rng.random())
+        for player, name in enumerate(sides)
+    ]
+    model = PongModel(win_threshold, serve_increment, time_step=time_step)
+    cpu_start = time.process_time()
+    results = simulate(model, policies, max_points, max_rally_steps)
+    return {
+        "match": match,
+        "seed": seed,
+        "players": sides,
+        "winner": results["winner"],
+        "score": results["score"],
+        "rallies": [rally["steps"] for rally in results["rallies"]],
+        "abandoned": sum(
+            rally["winner"] is None for rally in results["rallies"]
+        ),
+        "steps": results["steps"],
+        "seconds": results["seconds"],
+        "cpu_seconds": time.process_time() - cpu_start,
+    }
+
+
+def _play_matches(matches, settings):
+    """
+    Returns a list of play_match() results for a range of matches, played
+    in a worker process.
+    """
+    return [play_match(match, **settings) for match in matches]
+
+
+def run_arena(matches, workers=None, chunk_size=None, **settings):
+    """
+    Play matches across a pool of worker processes, yielding each match's
+    results as soon as its worker finishes it.
+
+    Every match is played from scratch with its own model, so the workers
+    share nothing and the matches are spread over them in small chunks,
+    which keeps every worker busy however long each match lasts.
+
+    Args:
+        matches: an int number of matches to play
+        workers: an int number of worker processes, by default one per CPU
+        chunk_size: an int number of matches each worker plays at a time,
+            by default enough for each worker to take about 8 chunks
+        settings: arguments for play_match()
+
+    Yields:
+        A play_match() results dict for each match, in the order they
+        finish.
+    """
+    workers = workers or os.cpu_count()
+    if chunk_size is None:
+        chunk_size = max(1, matches // (workers * 8))
+    pool = concurrent.futures.ProcessPoolExecutor(workers)
+    try:
+        futures = [
+            pool.submit(
+                _play_matches,
+                range(start, min(start + chunk_size, matches)),
+                settings,
+            )
+            for start in range(0, matches, chunk_size)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            yield from future.result()
+    finally:
+        # Matches not yet started are dropped if the caller stops early.
+        pool.shutdown(cancel_futures=True)
+
+
+class ArenaStats:
+    """
+    Running totals of arena results.
+
+    Attributes:
+        workers: an int number of worker processes the matches are played on
+        matches: an int count of matches added
+        unfinished: an int count of matches given up without a winner
+        played: a Counter of matches played by each policy
+        wins: a Counter of matches won by each policy
+        side_wins: a list of the matches won by the left and right paddles
+        rallies: a list of the steps of every rally
+        steps: an int count of physics steps played
+        busy: a float for the CPU seconds the workers spent playing matches
+    """
+
+    def __init__(self, workers=1, clock=time.perf_counter):
+        """
+        Start timing the arena.
+
+        Args:
+            workers: an int number of worker processes the matches are
+                played on
+            clock: a function returning the current time in seconds
+        """
+        self.workers = workers
+        self.matches = 0
+        self.unfinished = 0
+        self.played = collections.Counter()
+        self.wins = collections.Counter()
+        self.side_wins = [0, 0]
+        self.rallies = []
+        self.steps = 0
+        self.busy = 0.0
+        self._clock = clock
+        self._start = clock()
+
+    def add(self, result):
+        """
+        Add the results of a match.
+
+        Args:
+            result: a play_match() results dict
+        """
+        self.matches += 1
+        self.played.update(result["players"])
+        if result["winner"] is False:
+            self.unfinished += 1
+        else:
+            self.wins[result["players"][result["winner"] - 1]] += 1
+            self.side_wins[result["winner"] - 1] += 1
+        self.rallies.extend(result["rallies"])
+        self.steps += result["steps"]
+        self.busy += result["cpu_seconds"]
+
+    def summary(self):
+        """
+        Returns a dict of the matches played and given up, each policy's
+        and each side's share of wins, the mean, median, 95th percentile and
+        longest rally (steps), the games and steps played per second, and
+        the share of the workers' time spent playing matches on a CPU,
+        which falls short of 1 when there are more workers than free CPUs.
+        """
+        elapsed = max(self._clock() - self._start, 1e-9)
+        rallies = sorted(self.rallies) or [0]
+        return {
+            "matches": self.matches,
+            "unfinished": self.unfinished,
+            "win_rates": {
+                name: self.wins[name] / self.played[name]
+                for name in sorted(self.played)
+            },
+            "side_win_rates": [
+                wins / max(self.matches, 1) for wins in self.side_wins
+            ],
+            "mean_rally": statistics.fmean(rallies),
+            "median_rally": statistics.median(rallies),
+            "p95_rally": rallies[int(0.95 * (len(rallies) - 1))],
+            "longest_rally": rallies[-1],
+            "games_per_second": self.matches / elapsed,
+            "steps_per_second": self.steps / elapsed,
+            "efficiency": self.busy / (elapsed * self.workers),
+        }
+
+
+def play_arena(matches, workers=None, results=None, report=None, **settings):
+    """
+    Play an arena of matches and total up the results as they come in.
+
+    Args:
+        matches: an int number of matches to play
+        workers: an int number of worker processes, by default one per CPU
+        results: an optional file to write each match's results to, as a
+            line of JSON
+        report: an optional function called with the ArenaStats after each
+            match
+        settings: arguments for run_arena() and play_match()
+
+    Returns:
+        The ArenaStats of every match.
+    """
+    workers = workers or os.cpu_count()
+    stats = ArenaStats(workers)
+    for result in run_arena(matches, workers, **settings):
+        stats.add(result)
+        if results is not None:
+            results.write(json.dumps(result) + "\n")
+        if report is not None:
+            report(stats)
+    return stats
+
+
+def _print_summary(summary):
+    """
+    Print an ArenaStats summary.
+    """
+    print(
+        f"{summary['matches']} matches, {summary['unfinished']} unfinished, "
+        f"{summary['games_per_second']:.1f} games/sec, "
+        f"{summary['steps_per_second']:.0f} steps/sec, "
+        f"{summary['efficiency']:.0%} of worker time busy"
+    )
+    print(
+        ", ".join(
+            f"{name} wins {rate:.1%}"
+            for name, rate in summary["win_rates"].items()
+        )
+        + f", left side wins {summary['side_win_rates'][0]:.1%}"
+    )
+    print(
+        f"rallies {summary['mean_rally']:.1f} steps mean, "
+        f"{summary['median_rally']:.0f} median, "
+        f"{summary['p95_rally']} p95, {summary['longest_rally']} longest"
+    )
+
+
+def main(argv=None):
+    """
+    Play an arena of headless matches from the command line and print the
+    results as they come in.
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    parser = argparse.ArgumentParser(
+        description="Play many headless air-pong matches in parallel."
+    )
+    parser.add_argument(
+        "--matches", type=int, default=100, help="number of matches to play"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="worker processes to play them on, by default one per CPU",
+    )
+    parser.add_argument(
+        "--players",
+        nargs=2,
+        choices=sorted(POLICIES),
+        default=["tracking", "tracking"],
+        metavar="POLICY",
+        help=f"left and right policies, from {', '.join(sorted(POLICIES))}",
+    )
+    parser.add_argument(
+        "--no-swap",
+        action="store_true",
+        help="keep each policy on its side instead of swapping every match",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="seed for the scripted paddles"
+    )
+    parser.add_argument(
+        "--win-threshold", type=int, default=11, help="points to play to"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="matches each worker plays at a time",
+    )
+    parser.add_argument(
+        "--results", help="file to write each match's results to, as JSON"
+    )
+    parser.add_argument(
+        "--scaling",
+        action="store_true",
+        help=(
+            "play the matches on 1, 2, 4 and so on up to --workers processes "
+            "and report the speed up"
+        ),
+    )
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count()
+    settings = {
+        "players": tuple(args.players),
+        "seed": args.seed,
+        "swap_sides": not args.no_swap,
+        "win_threshold": args.win_threshold,
+        "chunk_size": args.chunk_size,
+    }
+
+    if args.scaling:
+        counts = sorted(
+            {workers} | {2**power for power in range(workers.bit_length())}
+        )
+        base = None
+        for count in counts:
+            summary = play_arena(args.matches, count, **settings).summary()
+            base = base or summary["games_per_second"]
+            speed_up = summary["games_per_second"] / base
+            print(
+                f"{count} workers: {summary['games_per_second']:.1f} "
+                f"games/sec, {speed_up:.2f}x, "
+                f"{speed_up / count:.0%} scaling efficiency"
+            )
+        return summary
+
+    def report(stats):
+        # a progress line about every tenth of the way
+        if stats.matches % max(args.matches // 10, 1) == 0:
+            summary = stats.summary()
+            print(
+                f"{stats.matches}/{args.matches} matches, "
+                f"{summary['games_per_second']:.1f} games/sec"
+            )
+
+    results = None
+    if args.results is not None:
+        # pylint: disable=consider-using-with
+        results = open(args.results, "w", encoding="utf-8")
+    try:
+        stats = play_arena(args.matches, workers, results, report, **settings)
+    finally:
+        if results is not None:
+            results.close()
+    summary = stats.summary()
+    _print_summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
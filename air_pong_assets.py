@@ -0,0 +1,146 @@
+"""Loading and caching of the air-pong images and fonts"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+
+ASSET_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models"
+)
+
+
+def _surface_size(size):
+    """
+    Returns a size rounded down to whole pixels the way pygame scales to it,
+    or None for the size an image was saved at.
+
+    Args:
+        size: a pair of numbers for a width and height, or None
+    """
+    if size is None:
+        return None
+    return (int(size[0]), int(size[1]))
+
+
+class AssetManager:
+    """
+    Cache of the images and fonts used by the view, loaded the first time
+    they are asked for.
+
+    Images are kept per (name, size, flip) so each variant is scaled or
+    flipped once, and are converted to the display's pixel format when a
+    display mode has been set so blitting them needs no conversion. Only
+    the scaled images are kept, since the originals are much larger than
+    the screen. Images needed later, like the win screen, can be loaded in
+    the background with preload().
+
+    Attributes:
+        directory: a string path to the directory the assets are loaded from
+        loads: an int count of image files read from disk
+    """
+
+    def __init__(self, directory=ASSET_DIRECTORY):
+        """
+        Set up an empty cache without loading anything.
+
+        Args:
+            directory: a string path to the directory holding the assets
+        """
+        self.directory = directory
+        self.loads = 0
+        self._images = {}
+        self._fonts = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _load(self, name, size):
+        """
+        Read an image file and scale it, without converting it.
+
+        Args:
+            name: a string file name in the asset directory
+            size: a pair of ints for the size to scale to, or None
+        """
+        surface = pygame.image.load(os.path.join(self.directory, name))
+        with self._lock:
+            self.loads += 1
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        return surface
+
+    @staticmethod
+    def convert(surface):
+        """
+        Returns a surface in the display's pixel format, keeping per-pixel
+        alpha, or the surface itself if no display mode has been set.
+
+        Args:
+            surface: a pygame Surface to convert
+        """
+        if pygame.display.get_surface() is None:
+            return surface
+        if surface.get_flags() & pygame.SRCALPHA:  # pylint: disable=no-member
+            return surface.convert_alpha()
+        return surface.convert()
+
+    def image(self, name, size=None, flip=False):
+        """
+        Returns an image scaled to a size and optionally mirrored
+        horizontally, loading it if it isn't cached.
+
+        Args:
+            name: a string file name in the asset directory
+            size: a pair of numbers for the size in pixels to scale to, or
+                None for the size the image was saved at
+            flip: a bool flag for mirroring the image left to right
+        """
+        size = _surface_size(size)
+        key = (name, size, bool(flip))
+        if key not in self._images:
+            pending = self._pending.pop(key, None)
+            if pending is not None:
+                surface = pending.result()
+            elif flip:
+                surface = pygame.transform.flip(
+                    self.image(name, size), True, False
+                )
+            else:
+                surface = self._load(name, size)
+            self._images[key] = self.convert(surface)
+        return self._images[key]
+
+    def preload(self, name, size=None):
+        """
+        Start loading and scaling an image in the background so a later
+        call to image() doesn't wait on the file.
+
+        Args:
+            name: a string file name in the asset directory
+            size: a pair of numbers for the size in pixels to scale to, or
+                None for the size the image was saved at
+        """
+        size = _surface_size(size)
+        key = (name, size, False)
+        if key in self._images or key in self._pending:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        self._pending[key] = self._executor.submit(self._load, name, size)
+
+    def font(self, name, size):
+        """
+        Returns a font at a point size, loading it if it isn't cached.
+
+        Args:
+            name: a string file name in the asset directory
+            size: an int for the font size
+        """
+        key = (name, size)
+        if key not in self._fonts:
+            pygame.font.init()
+            self._fonts[key] = pygame.font.Font(
+                os.path.join(self.directory, name), size
+            )
+        return self._fonts[key]
@@ -0,0 +1,869 @@
+"""
+Vectorized physics engine stepping many ping pong games at once.
+"""
+
+# The batch model shares its physical constants with PongModel.
+# pylint: disable=protected-access
+import numpy as np
+from air_pong_model import PongModel
+
+
+def _rotate(vectors, angle, axis):
+    """
+    Rotate each row of an (N, 3) array about the matching axis by the matching
+    angle, following the same convention as vpython's vector.rotate.
+
+    Args:
+        vectors - An (N, 3) array of vectors to rotate.
+        angle - An (N,) array or float giving the rotation angles (radians).
+        axis - An (N, 3) or (3,) array giving the rotation axes. Axes do not
+            need to be normalized, and zero axes scale the vector by cos(angle).
+
+    Returns:
+        An (N, 3) array of rotated vectors.
+    """
+    axis = _hat(np.broadcast_to(axis, vectors.shape))
+    cos = np.cos(angle)[..., None] if np.ndim(angle) else np.cos(angle)
+    sin = np.sin(angle)[..., None] if np.ndim(angle) else np.sin(angle)
+    # Rodrigues' rotation formula.
+    return (
+        vectors * cos
+        + np.cross(axis, vectors) * sin
+        + axis * (np.sum(axis * vectors, axis=-1)[..., None] * (1 - cos))
+    )
+
+
+def _hat(vectors):
+    """
+    Return the unit vectors of each row of an (N, 3) array, with zero vectors
+    left as zero vectors.
+    """
+    mag = np.linalg.norm(vectors, axis=-1)[..., None]
+    return np.divide(
+        vectors, mag, out=np.zeros(np.shape(vectors)), where=mag > 0
+    )
+
+
+class BatchPongModel:
+    """
+    Class for storing and stepping the state of many ping pong games at once.
+
+    Each game follows the same rules as PongModel, but all state is held in
+    NumPy arrays whose first axis indexes the game, so a single call to
+    trajectory() advances every game by one time step. Collisions are checked
+    at the end of each step, as in PongModel with swept_collisions=False.
+
+    Attributes:
+        num_games - An integer giving the number of games, N, being simulated.
+        ball_position - An (N, 3) array of the x,y,z positions of the balls.
+        ball_velocity - An (N, 3) array of the velocities of the balls.
+        ball_spin - An (N, 3) array of the balls' spin axes, with magnitude
+            equal to the balls' spin rates.
+        angle - An (N,) array of the angles between the balls and the table.
+        paddle_normal - An (N, 2, 3) array of the unit normal vectors of
+            player 1 and player 2's paddles for each game.
+        paddle_velocity - An (N, 2, 3) array of the velocities of player 1
+            and player 2's paddles for each game (m/s).
+        paddle_position - An (N, 2, 3) array of the positions of player 1 and
+            player 2's paddles for each game (m).
+        paddle_edges - An (N, 2, 2, 3) array of the top and bottom edge
+            positions of player 1 and player 2's paddles for each game (m).
+        bounce_count - An (N,) integer array keeping track of the number of
+            bounces on each side.
+        current_bounce - An (N,) integer array equal to the bounce_count when
+            the ball last hit the net.
+        player1_serving - An (N,) boolean array indicating whether it is
+            player 1's serve.
+        ball_home - An (N,) boolean array that disables trajectory when True.
+        player_score - An (N, 2) integer array of each game's score.
+    """
+
+    _table_length = PongModel._table_length
+    _table_width = PongModel._table_width
+    _table_height = PongModel._table_height
+    _paddle_width = PongModel._paddle_width
+    _paddle_length = PongModel._paddle_length
+    _net_height = PongModel._net_height
+    _table_front = PongModel._table_front
+    _ball_mass = PongModel._ball_mass
+    _ball_radius = PongModel._ball_radius
+    _time_step = PongModel._time_step
+    _acc_gravity = np.array(
+        [
+            PongModel._acc_gravity.x,
+            PongModel._acc_gravity.y,
+            PongModel._acc_gravity.z,
+        ]
+    )
+    _ball_rebound = PongModel._ball_rebound
+    _paddle_friction = PongModel._paddle_friction
+    _table_friction = PongModel._table_friction
+    _paddle_stiff = PongModel._paddle_stiff
+    _air_density = PongModel._air_density
+    _drag_coefficient = PongModel._drag_coefficient
+    _lift_coefficient = PongModel._lift_coefficient
+    _paddle_force = PongModel._paddle_force
+    # Paddle contact is solved over the same precomputed steps as PongModel.
+    _contact_steps = PongModel._contact_steps
+    # Contact steps tried for every ball before the few still on their
+    # paddles are solved over all of them.
+    _contact_window = 32
+    _contact_omega = PongModel._contact_omega
+    _contact_index = PongModel._contact_index
+    _contact_times = PongModel._contact_times
+    _contact_square_sum = PongModel._contact_square_sum
+    _contact_sin_sum = PongModel._contact_sin_sum
+
+    def __init__(self, num_games, win_threshold, serve_increment):
+        """
+        Define default ball and paddle states for every game.
+
+        Args:
+            num_games - An integer giving the number of games to simulate.
+            win_threshold - An integer designating how many points to play to.
+            serve_increment - An integer dictating the number of points before
+                the serve switches players.
+        """
+        self._num_games = num_games
+        self._ball_position = np.tile(
+            [
+                BatchPongModel._table_front,
+                BatchPongModel._table_height + 0.3,
+                0.0,
+            ],
+            (num_games, 1),
+        )
+        self._ball_velocity = np.zeros((num_games, 3))
+        self._ball_spin = np.zeros((num_games, 3))
+        self._angle = np.zeros(num_games)
+        self._paddle_normal_pair = np.tile(
+            [[1.0, 0.0, 0.0], [-1.0, 0.0, 0.0]], (num_games, 1, 1)
+        )
+        self._paddle_velocity_pair = np.zeros((num_games, 2, 3))
+        self._paddle_position_pair = np.tile(
+            [
+                [
+                    BatchPongModel._table_front - 0.25,
+                    BatchPongModel._table_height,
+                    0.0,
+                ],
+                [
+                    BatchPongModel._table_front
+                    + BatchPongModel._table_length
+                    + 0.25,
+                    BatchPongModel._table_height,
+                    0.0,
+                ],
+            ],
+            (num_games, 1, 1),
+        )
+        self._paddle_edges_pair = np.zeros((num_games, 2, 2, 3))
+        self._paddle_frame_pair = np.zeros((num_games, 2, 2, 3))
+        self._paddle_bounds_pair = np.zeros((num_games, 2, 4))
+        self._paddle_invertible_pair = np.zeros((num_games, 2), dtype=bool)
+        self._player_score = np.zeros((num_games, 2), dtype=int)
+        self._win_threshold = win_threshold
+        self._serve_increment = serve_increment
+        for player in (0, 1):
+            self.update_paddle(
+                self._paddle_normal_pair[:, player],
+                self._paddle_position_pair[:, player],
+                self._paddle_velocity_pair[:, player],
+                player,
+            )
+        self._bounce_count = np.zeros(num_games, dtype=int)
+        self._current_bounce = np.zeros(num_games, dtype=int)
+        self._player1_serving = np.ones(num_games, dtype=bool)
+        self._ball_home = np.ones(num_games, dtype=bool)
+
+    def _player_coefficient(self, games):
+        """
+        Returns an array of integers -1 or 1 for the given games depending on
+        which side of the table each ball is on: -1 for right and 1 for left.
+
+        Args:
+            games - An integer index array of the games to check.
+        """
+        return np.where(
+            self._ball_position[games, 0]
+            < BatchPongModel._table_front + BatchPongModel._table_length / 2,
+            1,
+            -1,
+        )
+
+    def compute_magnus_force(self, games=None):
+        """
+        Returns an (M, 3) array giving the magnus force (N) on each ball.
+
+        Args:
+            games - An optional integer index array of the M games to compute.
+                Defaults to every game.
+        """
+        games = np.arange(self._num_games) if games is None else games
+        velocity = self._ball_velocity[games]
+        return (
+            0.5
+            * BatchPongModel._lift_coefficient
+            * BatchPongModel._ball_radius**2
+            * np.pi
+            * np.sum(velocity * velocity, axis=1)[:, None]
+            * np.cross(
+                velocity,
+                self._ball_spin[games]
+                / (2 * np.pi)
+                * BatchPongModel._time_step,
+            )
+        )
+
+    def compute_drag(self, games=None):
+        """
+        Returns an (M, 3) array giving the opposing drag force (N) on each ball.
+
+        Args:
+            games - An optional integer index array of the M games to compute.
+                Defaults to every game.
+        """
+        games = np.arange(self._num_games) if games is None else games
+        velocity = self._ball_velocity[games]
+        return (
+            0.5
+            * BatchPongModel._air_density
+            * (-_hat(velocity) * velocity**2)
+            * BatchPongModel._drag_coefficient
+            * np.pi
+            * BatchPongModel._ball_radius**2
+        )
+
+    def hit_table(self, games):
+        """
+        Updates the velocity of each ball that collides with the table.
+
+        Args:
+            games - An integer index array of the games to check.
+        """
+        position = self._ball_position[games]
+        # Check if ball is above the table and touching the surface.
+        hit = games[
+            (
+                position[:, 0]
+                >= BatchPongModel._table_front - BatchPongModel._ball_radius
+            )
+            & (
+                position[:, 0]
+                <= BatchPongModel._table_front
+                + BatchPongModel._table_length
+                + BatchPongModel._ball_radius
+            )
+            & (
+                position[:, 1]
+                < BatchPongModel._table_height + BatchPongModel._ball_radius
+            )
+        ]
+        if hit.size:
+            # Adjust position slightly to prevent double bounce.
+            self._ball_position[hit, 1] += 0.0001
+            # Rotate velocity vector and scale (energy lost in bounce).
+            velocity = BatchPongModel._ball_rebound * _rotate(
+                self._ball_velocity[hit],
+                2 * self._angle[hit],
+                np.array([0.0, 0.0, 1.0]),
+            )
+            # Calculate angular momentum converted to linear momentum.
+            sp_angular_momentum = (
+                np.cross(-self._ball_spin[hit], [0.0, -1.0, 0.0])
+                * BatchPongModel._ball_radius**2
+            )
+            self._ball_velocity[hit] = (
+                velocity + BatchPongModel._table_friction * sp_angular_momentum
+            )
+            # Update spin after bounce.
+            self._ball_spin[hit] = (
+                (1 - BatchPongModel._table_friction)
+                * np.cross(sp_angular_momentum, [0.0, 1.0, 0.0])
+                / BatchPongModel._ball_radius**2
+            )
+            # Update bounce count depending on the active player.
+            self._bounce_count[hit] += self._player_coefficient(hit)
+        # Update angle to table after each time_step.
+        self._angle[games] = np.arccos(
+            np.clip(_hat(self._ball_velocity[games])[:, 0], -1, 1)
+        )
+
+    def hit_net(self, games):
+        """
+        Updates the velocity and spin of each ball that collides with the net.
+
+        Args:
+            games - An integer index array of the games to check.
+        """
+        coefficient = self._player_coefficient(games)
+        # Check if ball edge is above the center line of the table.
+        at_net = games[
+            np.round(
+                self._ball_position[games, 0]
+                + coefficient * BatchPongModel._ball_radius,
+                2,
+            )
+            == BatchPongModel._table_front
+            + round(BatchPongModel._table_length / 2, 2)
+        ]
+        if not at_net.size:
+            return
+        height = self._ball_position[at_net, 1] - (
+            BatchPongModel._net_height + BatchPongModel._table_height
+        )
+        # Check if the center of the ball is below the top of the net.
+        below = at_net[height < 0]
+        self._ball_velocity[below] = 0
+        self._ball_velocity[below, 0] = -0.1 * self._player_coefficient(below)
+        # Check if only the bottom half of ball is below the top of net.
+        clipped = (
+            (height >= 0)
+            & (height <= BatchPongModel._ball_radius)
+            & (self._current_bounce[at_net] != self._bounce_count[at_net])
+        )
+        height = height[clipped]
+        clipped = at_net[clipped]
+        if clipped.size:
+            self._current_bounce[clipped] = self._bounce_count[clipped]
+            # Rotate and scale velocity depending on spin and contact point.
+            self._ball_velocity[clipped] = _rotate(
+                (2 * np.arcsin(height / BatchPongModel._ball_radius) / np.pi)[
+                    :, None
+                ]
+                * self._ball_velocity[clipped],
+                np.arccos(height / BatchPongModel._ball_radius),
+                np.array([0.0, 0.0, 1.0]) + self._ball_spin[clipped],
+            )
+
+    def hit_or_miss(self, games, paddle_index):
+        """
+        Determine whether each ball hits or misses its active paddle.
+
+        Args:
+            games - An integer index array of the games to check.
+            paddle_index - An integer array, matching games, of the index of
+                the paddle each ball will hit next.
+
+        Returns:
+            A boolean array, True where the ball hits the paddle.
+        """
+        paddle = (games, paddle_index)
+        # Find the ball's depth and lateral position in each paddle's frame.
+        ball = np.einsum(
+            "nij,nj->ni",
+            self._paddle_frame_pair[paddle],
+            self._ball_position[games],
+        )
+        top, bottom, front, back = np.moveaxis(
+            self._paddle_bounds_pair[paddle], 1, 0
+        )
+        lateral = np.round(ball[:, 1], 4)
+        surface = (
+            ball[:, 0] - (1 - 2 * paddle_index) * BatchPongModel._ball_radius
+        )
+        # Check whether ball is in contact with paddle.
+        return (
+            self._paddle_invertible_pair[paddle]
+            & (lateral <= top)
+            & (lateral >= bottom)
+            & (front >= surface)
+            & (surface >= back)
+        )
+
+    def _update_paddle_frame(self, games, player_paddle):
+        """
+        Cache the change of basis into each paddle's frame, as seen from its
+        own side of the table, and the paddle's bounds in that frame, so
+        hit_or_miss doesn't need to rebuild them every step.
+
+        Args:
+            games - An index or mask selecting the games to update.
+            player_paddle - An integer, 0 or 1, giving the paddle to update.
+        """
+        normal = self._paddle_normal_pair[games, player_paddle]
+        # Define vector parallel to paddle face (long direction).
+        flat_normal = normal.copy()
+        flat_normal[:, 1] = 0
+        horizontal = _rotate(
+            (1 - 2 * player_paddle) * _hat(flat_normal),
+            np.pi / 2,
+            np.array([0.0, 1.0, 0.0]),
+        )
+        # Define vector parallel to paddle face (short direction).
+        vertical = _rotate(horizontal, np.pi / 2, normal)
+        # Invert the change of basis matrix, whose columns are the normal,
+        # vertical and horizontal vectors, using its adjugate. Only the
+        # depth and lateral rows are needed.
+        inverse = np.stack(
+            [np.cross(vertical, horizontal), np.cross(horizontal, normal)],
+            axis=1,
+        )
+        det = np.sum(normal * inverse[:, 0], axis=1)
+        # Paddles facing straight up or down have no horizontal direction.
+        invertible = np.abs(det) > 1e-12
+        frame = np.divide(
+            inverse,
+            det[:, None, None],
+            out=np.zeros(inverse.shape),
+            where=invertible[:, None, None],
+        )
+        # Define paddle edges in the new basis.
+        edges = np.matmul(
+            self._paddle_edges_pair[games, player_paddle],
+            np.swapaxes(frame, 1, 2),
+        )
+        self._paddle_frame_pair[games, player_paddle] = frame
+        self._paddle_invertible_pair[games, player_paddle] = invertible
+        self._paddle_bounds_pair[games, player_paddle] = np.stack(
+            [
+                np.round(edges[:, 0, 1], 4),
+                np.round(edges[:, 1, 1], 4),
+                np.round(edges[:, 0, 0], 3),
+                edges[:, 0, 0] - BatchPongModel._paddle_length,
+            ],
+            axis=1,
+        )
+
+    def paddle_bounce(self, games, paddle_index):
+        """
+        Updates the ball state of every game whose ball is hitting a paddle.
+
+        The contact is solved in closed form over precomputed steps of
+        time_step / 10, as in PongModel.paddle_bounce, so games in contact
+        are updated together without stepping through it.
+
+        Args:
+            games - An integer index array of the games to check.
+            paddle_index - An integer array, matching games, of the index of
+                the paddle each ball will hit next.
+        """
+        hits = self.hit_or_miss(games, paddle_index)
+        games, paddle_index = games[hits], paddle_index[hits]
+        if not games.size:
+            return
+        normal = self._paddle_normal_pair[games, paddle_index]
+        normal_hat = _hat(normal)
+        paddle_velocity = self._paddle_velocity_pair[games, paddle_index]
+        paddle_speed = np.abs(np.sum(paddle_velocity * normal_hat, axis=1))
+        # Define initial relative ball speed and position normal to the paddle.
+        spring_disp = np.sum(self._ball_position[games] * normal_hat, axis=1)
+        initial_velocity = (
+            np.abs(np.sum(self._ball_velocity[games] * normal_hat, axis=1))
+            + paddle_speed
+        )
+        # Compute velocity parallel to paddle.
+        face = _hat(_rotate(normal, np.pi / 2, np.array([0.0, 0.0, 1.0])))
+        parallel_velocity = (
+            BatchPongModel._ball_radius
+            * np.cross(self._ball_spin[games], normal)
+            + face * np.sum(paddle_velocity * face, axis=1)[:, None]
+        )
+        steps, displacement = self._contact_exit(
+            spring_disp, np.linalg.norm(normal, axis=1), initial_velocity
+        )
+        cumm_time = BatchPongModel._contact_times[steps - 1]
+        self._ball_position[games] += normal * displacement[:, None]
+        # Compute final velocity when each ball leaves the paddle.
+        self._ball_velocity[games] = (
+            -self._player_coefficient(games)[:, None]
+            * normal
+            * (
+                -BatchPongModel._paddle_force
+                / BatchPongModel._ball_mass
+                * cumm_time
+                + initial_velocity
+                * np.cos(cumm_time * BatchPongModel._contact_omega)
+            )[:, None]
+        )
+        exit_speed = self._contact_exit_speed(
+            np.linalg.norm(parallel_velocity, axis=1),
+            initial_velocity,
+            steps,
+        )
+        # Update spin based on friction force with paddle.
+        self._ball_spin[games] = 0
+        self._ball_spin[games, 2] = (
+            exit_speed - paddle_speed
+        ) / BatchPongModel._ball_radius
+
+    @staticmethod
+    def _contact_exit(spring_disp, normal_mag, initial_velocity):
+        """
+        Returns an (M,) integer array of the contact steps each ball takes
+        to leave its paddle face, and an (M,) array of how far it moves
+        along the paddle normal in them.
+
+        Args:
+            spring_disp - An (M,) array of the balls' positions along their
+                unit paddle normals as they meet the paddles.
+            normal_mag - An (M,) array of the paddle normals' magnitudes.
+            initial_velocity - An (M,) array of the balls' speeds relative to
+                the paddles, normal to them.
+        """
+        steps = np.empty(len(spring_disp), dtype=int)
+        exit_displacement = np.empty(len(spring_disp))
+        remaining = np.arange(len(spring_disp))
+        # Nearly every ball leaves within the first window of steps, so
+        # only the rest are solved over every step.
+        for columns in (
+            BatchPongModel._contact_window,
+            BatchPongModel._contact_steps,
+        ):
+            # Total displacement along the normal after each contact step.
+            displacement = (
+                0.5
+                * BatchPongModel._paddle_force
+                / BatchPongModel._ball_mass
+                * BatchPongModel._contact_square_sum[:columns]
+                - (initial_velocity[remaining] / BatchPongModel._contact_omega)[
+                    :, None
+                ]
+                * BatchPongModel._contact_sin_sum[:columns]
+            )
+            # Each ball leaves its paddle face on the first step that takes
+            # it further along the normal than where it started.
+            left_paddle = (
+                np.abs(
+                    spring_disp[remaining, None]
+                    + normal_mag[remaining, None] * displacement
+                )
+                > np.abs(spring_disp[remaining])[:, None]
+            )
+            done = left_paddle.any(axis=1)
+            last = np.where(done, np.argmax(left_paddle, axis=1), columns - 1)
+            if columns == BatchPongModel._contact_steps:
+                done[:] = True
+            steps[remaining[done]] = last[done] + 1
+            exit_displacement[remaining[done]] = displacement[
+                np.flatnonzero(done), last[done]
+            ]
+            remaining = remaining[~done]
+            if not remaining.size:
+                break
+        return steps, exit_displacement
+
+    @staticmethod
+    def _contact_exit_speed(parallel_speed, initial_velocity, steps):
+        """
+        Returns an (M,) array of the speeds of the balls' edges along their
+        paddle faces as they leave the paddles, matching PongModel's closed
+        form paddle bounce.
+
+        Friction with the paddle slows the parallel velocity each step,
+        reversing it back and forth once it reaches zero.
+
+        Args:
+            parallel_speed - An (M,) array of the speeds along the paddle
+                faces as the balls meet the paddles.
+            initial_velocity - An (M,) array of the balls' speeds relative to
+                the paddles, normal to them.
+            steps - An (M,) integer array of the contact steps taken.
+        """
+        exit_speed = np.empty(len(steps))
+        short = steps <= BatchPongModel._contact_window
+        for rows, columns in (
+            (np.flatnonzero(short), BatchPongModel._contact_window),
+            (np.flatnonzero(~short), BatchPongModel._contact_steps),
+        ):
+            if not rows.size:
+                continue
+            # Total friction slowing the ball after each contact step.
+            friction = (
+                BatchPongModel._paddle_friction
+                * BatchPongModel._time_step
+                * (
+                    BatchPongModel._paddle_force
+                    / BatchPongModel._ball_mass
+                    * BatchPongModel._contact_index[:columns]
+                    + (
+                        initial_velocity[rows]
+                        / BatchPongModel._contact_omega**3
+                    )[:, None]
+                    * BatchPongModel._contact_sin_sum[:columns]
+                )
+            )
+            speed = parallel_speed[rows]
+            last = steps[rows] - 1
+            stopped = (friction > speed[:, None]) & (
+                np.arange(columns) <= last[:, None]
+            )
+            reversed_ = (speed > 0) & stopped.any(axis=1)
+            stop_step = np.argmax(stopped, axis=1)
+            index = np.arange(len(rows))
+            exit_speed[rows] = np.where(
+                reversed_,
+                friction[index, stop_step] - speed,
+                speed - friction[index, last],
+            )
+            # The speed is reversed once more for each further step, ending
+            # as the last step's friction less the speed before it.
+            flipped = reversed_ & ((last - stop_step) % 2 == 1)
+            exit_speed[rows[flipped]] = (
+                friction[index[flipped], last[flipped]]
+                - friction[index[flipped], last[flipped] - 1]
+                - exit_speed[rows[flipped]]
+            )
+        exit_speed[parallel_speed == 0] = 0
+        return exit_speed
+
+    def trajectory(self):
+        """
+        Advance every game whose ball is in free motion by one time_step.
+        """
+        games = np.flatnonzero(~self._ball_home)
+        if not games.size:
+            return
+        # Switch which paddle each ball will hit next.
+        paddle_index = (1 - self._player_coefficient(games)) // 2
+        # Check for collisions.
+        self.hit_table(games)
+        self.paddle_bounce(games, paddle_index)
+        self.hit_net(games)
+        # Compute forces.
+        forces = self.compute_magnus_force(games) + self.compute_drag(games)
+        # Update position based on current velocity.
+        self._ball_position[games] += (
+            BatchPongModel._time_step * self._ball_velocity[games]
+        )
+        # Update velocity based on acting forces.
+        self._ball_velocity[games] += (
+            BatchPongModel._acc_gravity + forces / BatchPongModel._ball_mass
+        ) * BatchPongModel._time_step
+
+    def update_paddle(
+        self,
+        paddle_normal,
+        paddle_position,
+        paddle_velocity,
+        player_paddle,
+        games=None,
+    ):
+        """
+        Updates the paddle state for one player in the given games.
+
+        Args:
+            paddle_normal - A (3,) or (M, 3) array of unit normal vectors.
+            paddle_position - A (3,) or (M, 3) array of paddle positions.
+            paddle_velocity - A (3,) or (M, 3) array of paddle velocities.
+            player_paddle - An integer, 0 or 1, giving the paddle to update.
+            games - An optional index or mask selecting the M games to update.
+                Defaults to every game.
+        """
+        games = slice(None) if games is None else games
+        self._paddle_normal_pair[games, player_paddle] = paddle_normal
+        self._paddle_velocity_pair[games, player_paddle] = paddle_velocity
+        self._paddle_position_pair[games, player_paddle] = paddle_position
+        # Compute the edges of the paddle based on input normal vector.
+        half_face = _rotate(
+            BatchPongModel._paddle_width
+            / 2
+            * self._paddle_normal_pair[games, player_paddle],
+            np.pi / 2,
+            np.array([0.0, 0.0, 1.0]),
+        )
+        position = self._paddle_position_pair[games, player_paddle]
+        self._paddle_edges_pair[games, player_paddle, 0] = np.round(
+            position + half_face, 5
+        )
+        self._paddle_edges_pair[games, player_paddle, 1] = np.round(
+            position - half_face, 5
+        )
+        self._update_paddle_frame(games, player_paddle)
+
+    def check_point(self):
+        """
+        Update the score and server of every game where a point was won.
+        """
+        serve_switch = self._serve_increment
+        # Check if player 2 has won a point and update score if so.
+        won = (self._bounce_count == 2) | (
+            (self._ball_position[:, 1] < -2)
+            & (self._ball_position[:, 0] < BatchPongModel._table_front)
+        )
+        self._bounce_count[won & (self._bounce_count == 2)] = 1
+        self._player_score[won, 1] += 1
+        self._award_point(won, serve_switch)
+        # Check if player 1 has won a point and update score if so.
+        won = (self._bounce_count == -1) | (
+            (self._ball_position[:, 1] < -2)
+            & (
+                self._ball_position[:, 0]
+                > BatchPongModel._table_length + BatchPongModel._table_front
+            )
+        )
+        self._bounce_count[won & (self._bounce_count == -1)] = 0
+        self._player_score[won, 0] += 1
+        self._award_point(won, serve_switch)
+
+    def _award_point(self, won, serve_switch):
+        """
+        Send the balls of games where a point was won home and update the
+        server, matching PongModel.check_point.
+
+        Args:
+            won - A boolean array of the games where a point was won.
+            serve_switch - An integer giving the serve increment.
+        """
+        self._ball_position[won] = 0
+        self._ball_home[won] = True
+        # Change player to serve based on given serve increment.
+        switch = won & (
+            self._player_score[:, 0] + self._player_score[:, 1] % serve_switch
+            == 0
+        )
+        self._player1_serving[switch] = ~self._player1_serving[switch]
+
+    def check_win(self):
+        """
+        Determine which games have been won.
+
+        Returns:
+            An (N,) integer array equal to 1 or 2 for the winning player of
+            each game, or 0 where no player has won yet.
+        """
+        score = self._player_score
+        winner = np.zeros(self._num_games, dtype=int)
+        winner[
+            (score[:, 1] >= self._win_threshold)
+            & (score[:, 1] - 1 > score[:, 0])
+        ] = 2
+        winner[
+            (score[:, 0] >= self._win_threshold)
+            & (score[:, 0] - 1 > score[:, 1])
+        ] = 1
+        return winner
+
+    def serve(self, games=None):
+        """
+        Initiate a serve in the given games.
+
+        Args:
+            games - An optional index or mask selecting the games to serve in.
+                Defaults to every game.
+        """
+        games = np.arange(self._num_games)[
+            slice(None) if games is None else games
+        ]
+        # Set serving x position depending on which player is serving.
+        self._ball_position[games] = [
+            BatchPongModel._table_front - 0.1,
+            BatchPongModel._table_height,
+            0.0,
+        ]
+        self._ball_position[games[~self._player1_serving[games]], 0] = (
+            BatchPongModel._table_front + BatchPongModel._table_length + 0.1
+        )
+        # Set vertical velocity to initiate a serve.
+        self._ball_velocity[games] = [0.0, 3.0, 0.0]
+        self._ball_home[games] = False
+        self._bounce_count[games] = (-self._player_coefficient(games) + 1) // 2
+
+    @property
+    def num_games(self):
+        """
+        The number of games, N, being simulated.
+        """
+        return self._num_games
+
+    @property
+    def table_dim(self):
+        """
+        A (3,) array of the table length, width and height (m).
+        """
+        return np.array(
+            [
+                BatchPongModel._table_length,
+                BatchPongModel._table_width,
+                BatchPongModel._table_height,
+            ]
+        )
+
+    @property
+    def table_front(self):
+        """
+        The x position of the front of the table (m).
+        """
+        return BatchPongModel._table_front
+
+    @property
+    def ball_position(self):
+        """
+        An (N, 3) array of the x,y,z positions of the balls (m).
+        """
+        return self._ball_position
+
+    @property
+    def ball_velocity(self):
+        """
+        An (N, 3) array of the velocities of the balls (m/s).
+        """
+        return self._ball_velocity
+
+    @property
+    def ball_spin(self):
+        """
+        An (N, 3) array of the balls' spin axes, with magnitude equal to
+        the balls' spin rates.
+        """
+        return self._ball_spin
+
+    @property
+    def ball_home(self):
+        """
+        An (N,) boolean array, True where the ball is home.
+        """
+        return self._ball_home
+
+    @property
+    def bounce_count(self):
+        """
+        An (N,) integer array of the bounce counts.
+        """
+        return self._bounce_count
+
+    @property
+    def paddle_edges(self):
+        """
+        An (N, 2, 2, 3) array of the top and bottom edge positions of
+        both paddles for each game (m).
+        """
+        return self._paddle_edges_pair
+
+    @property
+    def paddle_normal(self):
+        """
+        An (N, 2, 3) array of the unit normal vectors of both paddles
+        for each game.
+        """
+        return self._paddle_normal_pair
+
+    @property
+    def paddle_position(self):
+        """
+        An (N, 2, 3) array of the positions of both paddles for each
+        game (m).
+        """
+        return self._paddle_position_pair
+
+    @property
+    def paddle_velocity(self):
+        """
+        An (N, 2, 3) array of the velocities of both paddles for each
+        game (m/s).
+        """
+        return self._paddle_velocity_pair
+
+    @property
+    def player_score(self):
+        """
+        An (N, 2) integer array of each game's score.
+        """
+        return self._player_score
+
+    @property
+    def player1_serving(self):
+        """
+        An (N,) boolean array, True where it is player 1's serve.
+        """
+        return self._player1_serving
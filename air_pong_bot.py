@@ -0,0 +1,568 @@
+"""Computer opponent that plays from the model's prediction of the ball"""
+
+import collections
+import random
+from air_pong_model import PongModel
+from air_pong_vector import Vector
+
+# What the bot sees of the ball on a step: whether it's home, coming at the
+# bot or on the bot's side, and its height (m), with where it is predicted
+# to cross the bot's paddle plane, as a (time, height) tuple, and the tilt
+# chosen to return it, each None if they weren't predicted on that step.
+_Sighting = collections.namedtuple(
+    "_Sighting", "home incoming on_side height crossing tilt"
+)
+# A search for the tilt to return a ball with, from the scratch model's
+# snapshot, with the steps left to play it on for until just before the ball
+# reaches the paddle, the paddle's position, the x the return aims to bounce
+# at (m), the index of the next tilt to try, and the best tilt so far and
+# how far its return misses by (m), None until one clears the net.
+_Search = collections.namedtuple(
+    "_Search", "start steps paddle aim_x index best miss"
+)
+# A search for the tilt to serve with, from the scratch model's snapshot of
+# a serve just tossed, with the snapshot of the serve being tried and the
+# copy of the bot serving it, None between tries, the steps it has been
+# played for, the bounce count after its last bounce and where it landed,
+# False after a bounce on the bot's side, and the aim, next index and best
+# tilt so far as for a _Search.
+_ServeSearch = collections.namedtuple(
+    "_ServeSearch",
+    "start state server steps bounces landed aim_x index best miss",
+)
+
+
+class BotPaddle:
+    """
+    Computer player that moves one paddle to meet the ball where the
+    model predicts it will be, angled to land the return on the other side
+    of the table.
+
+    The bot predicts the ball's path with PongModel.predict_until whenever
+    the ball turns towards it, and again every refresh_interval as the ball
+    comes in, but only acts on what it sees reaction_delay later. The
+    paddle's tilt is chosen once per incoming ball by playing the ball onto
+    the paddle at each of a few tilts on a scratch model, one a step, and
+    predicting where the return bounces. Otherwise the bot only moves its
+    paddle towards the planned height, at most max_speed. The bot meets its
+    own serves squarely as they go up, with a serve tilt found by playing
+    out serves on the scratch model, a few steps an update, once it's first
+    the bot's serve. Until then it serves with the tilt it waits with.
+
+    Attributes:
+        player: an int (0 or 1) for the paddle the bot moves
+        difficulty: a float from 0 to 1 the other settings default from
+        reaction_delay: a float for how old the ball the bot sees is (s)
+        error: a float for the standard deviation of the bot's aim, in
+            metres off the predicted height and radians off the chosen tilt
+        max_speed: a float for the fastest the paddle moves (m/s)
+        tilts: an int number of tilts to try for each return
+        swing: a float for the speed of the paddle towards the net (m/s)
+        offset: a float for the distance of the paddle behind the table (m)
+        refresh_interval: a float for the time between predictions of an
+            incoming ball (s)
+        serve_tilt: a float for the tilt the bot serves with, None until
+            it has been found
+        forecasts: an int count of predictions of incoming balls
+        aims: an int count of tilt searches
+    """
+
+    # Height of the paddle waiting for the ball, above the table (m).
+    _ready_height = 0.25
+    # Range of tilts tried, and where on the far half of the table returns
+    # aim to bounce, as a fraction of its length from the net.
+    _tilt_range = (0.0, 0.9)
+    _target_depth = 0.6
+    # Least height returns must clear the net by (m).
+    _net_margin = 0.03
+    # Tilt the paddle waits with.
+    _ready_tilt = 0.4
+    # Steps before the ball reaches the paddle plane that tilt searches
+    # start from, clear of the paddle at any tilt.
+    _lead_steps = 3
+    # Most scratch model steps a search plays on one update, and how long
+    # serves are played out for (s).
+    _search_steps = 10
+    _serve_time = 2.0
+
+    def __init__(
+        self,
+        player,
+        difficulty=0.5,
+        reaction_delay=None,
+        error=None,
+        max_speed=None,
+        tilts=None,
+        swing=1.0,
+        refresh_interval=0.1,
+        seed=None,
+    ):
+        """
+        Set up the bot.
+
+        Args:
+            player: an int (0 or 1) for the paddle the bot moves
+            difficulty: a float from 0 (easiest) to 1 (hardest)
+            reaction_delay: a float for how old the ball the bot sees is
+                (s), by default from 0.28 to 0.03 with difficulty
+            error: a float for the standard deviation of the bot's aim (m
+                and rad), by default from 0.065 to 0.005 with difficulty
+            max_speed: a float for the fastest the paddle moves (m/s), by
+                default from 1 to 5 with difficulty
+            tilts: an int number of tilts to try for each return, by
+                default from 3 to 9 with difficulty
+            swing: a float for the speed of the paddle towards the net (m/s)
+            refresh_interval: a float for the time between predictions of
+                an incoming ball (s)
+            seed: an optional seed for the bot's errors
+        """
+        self.player = player
+        self.difficulty = difficulty
+        self.reaction_delay = (
+            0.03 + 0.25 * (1 - difficulty)
+            if reaction_delay is None
+            else reaction_delay
+        )
+        self.error = 0.005 + 0.06 * (1 - difficulty) if error is None else error
+        self.max_speed = (
+            1.0 + 4.0 * difficulty if max_speed is None else max_speed
+        )
+        self.tilts = 3 + round(6 * difficulty) if tilts is None else tilts
+        self.swing = swing
+        self.offset = 0.05
+        self.refresh_interval = refresh_interval
+        self.serve_tilt = None
+        self.forecasts = 0
+        self.aims = 0
+        self._direction = 1 if player == 0 else -1
+        self._random = random.Random(seed)
+        self._seen = collections.deque()
+        self._height = None
+        self._target = None
+        self._tilt = self._ready_tilt
+        self._aim = None
+        self._incoming = False
+        self._next_forecast = 0
+        self._search = None
+        self._serve_search = None
+        self._scratch = None
+        self._snapshot = None
+
+    def update(self, model, step=None):  # pylint: disable=unused-argument
+        """
+        Look at the ball, predict its path if due, and move the paddle
+        towards where it will meet the ball.
+
+        Args:
+            model: air pong PongModel object
+            step: an int for the current simulation step, unused
+        """
+        time_step = model.time_step
+        table = model.table_dim
+        net_x = model.table_front + table.x / 2
+        if self.player == 0:
+            x_position = model.table_front - self.offset
+        else:
+            x_position = model.table_front + table.x + self.offset
+        ready = table.z + self._ready_height
+        if self._height is None:
+            self._height = self._target = ready
+
+        self._seen.append(self._sight(model, net_x, x_position))
+        if self.serve_tilt is None and not self._incoming:
+            self._search_serve(model, net_x)
+        delay = int(round(self.reaction_delay / time_step))
+        while len(self._seen) > delay + 1:
+            self._seen.popleft()
+        if len(self._seen) == delay + 1:
+            self._react(self._seen[0], delay * time_step, ready)
+
+        ball = model.ball_position
+        if (
+            not model.ball_home
+            and model.ball_velocity.x == 0
+            and self._direction * (ball.x - net_x) < 0
+        ):
+            # the bot's own serve goes straight up, so it meets it squarely
+            # without waiting to see it
+            self._height = ball.y
+            self._tilt = (
+                self._ready_tilt if self.serve_tilt is None else self.serve_tilt
+            )
+        else:
+            # move towards the target no faster than max_speed
+            most = self.max_speed * time_step
+            move = min(max(self._target - self._height, -most), most)
+            self._height += move
+        model.update_paddle(
+            paddle_normal=Vector(self._direction, self._tilt, 0).hat,
+            paddle_position=Vector(x_position, self._height, 0),
+            paddle_velocity=Vector(self._direction * self.swing, 0, 0),
+            player_paddle=self.player,
+        )
+
+    def _sight(self, model, net_x, x_position):
+        """
+        Returns a _Sighting of the ball now, predicting where an incoming
+        ball meets the paddle if due, and trying the next tilt to return it
+        while a search is under way.
+
+        Args:
+            model: air pong PongModel object
+            net_x: a float for the x of the net (m)
+            x_position: a float for the x of the paddle (m)
+        """
+        home = model.ball_home
+        position = model.ball_position
+        incoming = not home and self._direction * model.ball_velocity.x < 0
+        on_side = self._direction * (position.x - net_x) < 0
+        crossing = tilt = None
+        if not incoming:
+            self._incoming = False
+            self._search = None
+        elif not self._incoming or self._next_forecast <= 0:
+            paddle = model.predict_until("paddle").paddles[self.player]
+            self.forecasts += 1
+            self._next_forecast = int(
+                round(self.refresh_interval / model.time_step)
+            )
+            if paddle is not None:
+                crossing = (paddle.time, paddle.position.y)
+                if not self._incoming:
+                    # a new incoming ball, so search for the tilt to
+                    # return it
+                    self._start_search(model, net_x, x_position, paddle)
+            self._incoming = True
+        elif self._search is not None:
+            if self._search.steps > 0:
+                self._lead_in()
+            else:
+                tilt = self._try_tilt(net_x)
+        self._next_forecast -= 1
+        return _Sighting(home, incoming, on_side, position.y, crossing, tilt)
+
+    def _react(self, sighting, age, ready):
+        """
+        Set the paddle's target height and tilt from a sighting of the ball.
+
+        Args:
+            sighting: a _Sighting of the ball when it was seen
+            age: a float for how long ago the ball was seen (s)
+            ready: a float for the height the paddle waits at (m)
+        """
+        if sighting.home or (not sighting.incoming and not sighting.on_side):
+            # wait at the ready height until the ball comes back
+            self._aim = None
+            self._target = ready
+            self._tilt = self._ready_tilt
+            return
+        if not sighting.incoming:
+            # the ball is on the bot's side but not coming at it, as after
+            # the bot's own serve, so follow it
+            self._aim = None
+            self._target = sighting.height
+            return
+        if self._aim is None:
+            # a new incoming ball, so draw this return's aim error
+            self._aim = self._random.gauss(0, self.error)
+        if sighting.tilt is not None:
+            self._tilt = sighting.tilt + self._random.gauss(0, self.error)
+        if sighting.crossing is None:
+            return
+        time, height = sighting.crossing
+        if time < age:
+            # the bot is too late to reach the ball
+            self._target = max(self._target, ready)
+            return
+        self._target = height + self._aim
+
+    def _start_search(self, model, net_x, x_position, crossing):
+        """
+        Start searching for the tilt whose return is predicted to clear the
+        net and bounce closest to the aimed depth on the far half of the
+        table.
+
+        The game is copied to the scratch model, which is then played until
+        just before the ball reaches the paddle plane, at most
+        _search_steps steps an update. Each tilt is tried from there, one an
+        update.
+
+        Args:
+            model: air pong PongModel object
+            net_x: a float for the x of the net (m)
+            x_position: a float for the x of the paddle (m)
+            crossing: the Crossing of the ball and the paddle plane, from
+                PongModel.predict_until
+        """
+        self.aims += 1
+        scratch = self._copy(model)
+        # the paddle is kept out of the way until the ball is close
+        scratch.update_paddle(
+            Vector(self._direction, self._ready_tilt, 0).hat,
+            Vector(x_position, -1.0, 0),
+            Vector(self._direction * self.swing, 0, 0),
+            self.player,
+        )
+        self._search = _Search(
+            start=bytes(scratch.snapshot(self._snapshot)),
+            steps=max(
+                int(crossing.time / model.time_step) - self._lead_steps, 0
+            ),
+            paddle=Vector(x_position, crossing.position.y, 0),
+            aim_x=net_x
+            + self._direction * self._target_depth * model.table_dim.x / 2,
+            index=0,
+            best=self._ready_tilt,
+            miss=None,
+        )
+
+    def _lead_in(self):
+        """
+        Play the scratch model on towards the ball reaching the paddle
+        plane, at most _search_steps steps.
+        """
+        search = self._search
+        steps = min(search.steps, self._search_steps)
+        scratch = self._scratch
+        scratch.restore(search.start)
+        for _ in range(steps):
+            scratch.trajectory()
+        self._search = search._replace(
+            start=bytes(scratch.snapshot(self._snapshot)),
+            steps=search.steps - steps,
+        )
+
+    def _try_tilt(self, net_x):
+        """
+        Try the next tilt of the search on the scratch model, by playing
+        the ball onto the paddle and predicting where the return bounces
+        with PongModel.predict_until.
+
+        Args:
+            net_x: a float for the x of the net (m)
+
+        Returns:
+            The tilt chosen once every tilt has been tried, the ready tilt
+            if none of them return the ball over the net, or None until
+            then.
+        """
+        search = self._search
+        tilt = self._tilt_at(search.index)
+        scratch = self._scratch
+        scratch.restore(search.start)
+        scratch.update_paddle(
+            Vector(self._direction, tilt, 0).hat,
+            search.paddle,
+            Vector(self._direction * self.swing, 0, 0),
+            self.player,
+        )
+        miss = None
+        for _ in range(2 * self._lead_steps):
+            scratch.trajectory()
+            if self._direction * scratch.ball_velocity.x > 0:
+                prediction = scratch.predict_until("bounce", horizon=1.0)
+                if (
+                    prediction.bounce is not None
+                    and prediction.clearance is not None
+                    and prediction.clearance >= self._net_margin
+                ):
+                    bounce_x = prediction.bounce.position.x
+                    if self._direction * (bounce_x - net_x) > 0:
+                        miss = abs(bounce_x - search.aim_x)
+                break
+        if miss is not None and (search.miss is None or miss < search.miss):
+            search = search._replace(best=tilt, miss=miss)
+        search = search._replace(index=search.index + 1)
+        if search.index < self.tilts:
+            self._search = search
+            return None
+        self._search = None
+        return search.best
+
+    def _search_serve(self, model, net_x):
+        """
+        Take the search for the serve tilt on by at most _search_steps
+        steps of the scratch model, setting serve_tilt to the tilt whose
+        serve lands closest to the aimed depth on the far half of the table
+        once every tilt has been tried, or to the ready tilt if none land.
+
+        Each tilt is tried by playing out a serve on the scratch model,
+        with a copy of the bot that serves with it, since the paddle meets
+        the ball while following it up. The search starts once it's the
+        bot's serve in the game.
+
+        Args:
+            model: air pong PongModel object
+            net_x: a float for the x of the net (m)
+        """
+        search = self._serve_search
+        if search is None:
+            if model.player1_serving != (self.player == 0):
+                return
+            scratch = self._copy(model)
+            scratch.serve()
+            search = self._serve_search = _ServeSearch(
+                start=bytes(scratch.snapshot(self._snapshot)),
+                state=None,
+                server=None,
+                steps=0,
+                bounces=None,
+                landed=None,
+                aim_x=net_x
+                + self._direction * self._target_depth * model.table_dim.x / 2,
+                index=0,
+                best=self._ready_tilt,
+                miss=None,
+            )
+        scratch = self._scratch
+        if search.server is None:
+            # serve with the next tilt
+            server = BotPaddle(
+                self.player,
+                reaction_delay=self.reaction_delay,
+                error=0.0,
+                max_speed=self.max_speed,
+                tilts=self.tilts,
+                swing=self.swing,
+            )
+            server.serve_tilt = self._tilt_at(search.index)
+            scratch.restore(search.start)
+            search = search._replace(
+                server=server, steps=0, bounces=scratch.bounce_count
+            )
+        else:
+            scratch.restore(search.state)
+        server, bounces, landed = search.server, search.bounces, search.landed
+        serve_steps = int(self._serve_time / scratch.time_step)
+        steps = min(serve_steps - search.steps, self._search_steps)
+        done = search.steps + steps == serve_steps
+        for _ in range(steps):
+            server.update(scratch)
+            scratch.trajectory()
+            if scratch.bounce_count == bounces:
+                continue
+            ball_x = scratch.ball_position.x
+            if self._direction * (ball_x - net_x) > 0:
+                landed, done = ball_x, True
+                break
+            if landed is False:
+                # a second bounce on the bot's side loses the point
+                done = True
+                break
+            bounces, landed = scratch.bounce_count, False
+        if not done:
+            self._serve_search = search._replace(
+                state=bytes(scratch.snapshot(self._snapshot)),
+                steps=search.steps + steps,
+                bounces=bounces,
+                landed=landed,
+            )
+            return
+        if landed:
+            miss = abs(landed - search.aim_x)
+            if search.miss is None or miss < search.miss:
+                search = search._replace(best=server.serve_tilt, miss=miss)
+        search = search._replace(
+            server=None, landed=None, index=search.index + 1
+        )
+        if search.index < self.tilts:
+            self._serve_search = search
+            return
+        self._serve_search = None
+        self.serve_tilt = search.best
+
+    def _tilt_at(self, index):
+        """
+        Returns the tilt tried at an index of a search.
+
+        Args:
+            index: an int from 0 to tilts - 1
+        """
+        low, high = self._tilt_range
+        return low + (high - low) * index / max(self.tilts - 1, 1)
+
+    def _copy(self, model):
+        """
+        Returns the bot's scratch model, set to the state of the game.
+
+        Args:
+            model: air pong PongModel object
+        """
+        if self._scratch is None:
+            self._scratch = PongModel(
+                model.win_threshold,
+                model.serve_increment,
+                time_step=model.time_step,
+                swept_collisions=model.swept_collisions,
+            )
+            self._snapshot = bytearray(model.snapshot_size)
+        self._scratch.restore(model.snapshot(self._snapshot))
+        return self._scratch
+
+
+class BotOpponent:
+    """
+    Wrapper around a PongModel that lets a BotPaddle play one side,
+    serving for it too, wherever a controller or game loop uses the model.
+
+    Paddle updates for the bot's player from anywhere else are ignored,
+    so a PongController can keep moving both paddles from hands and keys.
+    Every other attribute is read from the model.
+
+    Attributes:
+        model: the PongModel, or a stand-in for it, the bot plays on
+        bot: the BotPaddle playing
+        serve_delay: a float for how long the bot waits to serve (s)
+    """
+
+    def __init__(self, model, player=1, serve_delay=1.0, **settings):
+        """
+        Args:
+            model: air pong PongModel object to play on
+            player: an int (0 or 1) for the paddle the bot plays
+            serve_delay: a float for how long the bot waits to serve (s)
+            settings: arguments for BotPaddle
+        """
+        self.model = model
+        self.bot = BotPaddle(player, **settings)
+        self.serve_delay = serve_delay
+        self._waiting = 0
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def update_paddle(
+        self, paddle_normal, paddle_position, paddle_velocity, player_paddle
+    ):
+        """
+        Pass a paddle update to the model, unless it is for the bot's
+        paddle.
+
+        Args:
+            paddle_normal: a vector for the unit normal vector to the paddle
+            paddle_position: a vector for the center of the paddle
+            paddle_velocity: a vector for the velocity of the paddle
+            player_paddle: an int (0 or 1) for the paddle to update
+        """
+        if player_paddle != self.bot.player:
+            self.model.update_paddle(
+                paddle_normal, paddle_position, paddle_velocity, player_paddle
+            )
+
+    def trajectory(self):
+        """
+        Let the bot move its paddle, and serve when it's the bot's serve,
+        then run a physics step.
+        """
+        self.bot.update(self.model)
+        model = self.model
+        if model.ball_home and model.player1_serving == (self.bot.player == 0):
+            self._waiting += 1
+            if self._waiting * model.time_step >= self.serve_delay:
+                self._waiting = 0
+                model.serve()
+        else:
+            self._waiting = 0
+        model.trajectory()
@@ -0,0 +1,627 @@
+"""Broadcasting live air-pong games to spectators over TCP"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import struct
+import threading
+import time
+from air_pong_model import PongModel
+from air_pong_net import apply_state, dequantize_state, parse_address
+from air_pong_net import quantize_state
+
+# Step the frame was taken at, the publisher's time.perf_counter() when it
+# was published, which spectators on the same host can compare with their
+# own, and the game state as quantized for network snapshots.
+FRAME = struct.Struct("<Id22i")
+# Bytes the kernel may hold for each spectator, which bounds how stale the
+# frames a slow spectator is still to read can be.
+SEND_BUFFER = 4096
+
+
+class _Subscriber(asyncio.Protocol):
+    """
+    A spectator connected to a SpectatorServer.
+
+    Frames are written straight to the connection while it keeps up. Once
+    the kernel's buffer for it is full, the transport pauses writing and
+    only the newest frame is kept, replacing any not yet sent, until it
+    resumes.
+
+    Attributes:
+        server: the SpectatorServer the spectator is connected to
+        transport: the asyncio transport of the connection
+        pending: the newest frame bytes waiting for the connection to drain,
+            or None
+        paused: a bool for the connection's buffers being full
+        sent: an int count of frames written to the connection
+        dropped: an int count of frames replaced before they were written
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.transport = None
+        self.pending = None
+        self.paused = False
+        self.sent = 0
+        self.dropped = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+        sock = transport.get_extra_info("socket")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # pause as soon as a frame can't be handed to the kernel whole
+        transport.set_write_buffer_limits(high=0)
+        self.server.subscribers.add(self)
+
+    def connection_lost(self, exc):
+        self.server.subscribers.discard(self)
+
+    def data_received(self, data):
+        """
+        Ignore anything spectators send.
+        """
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        if self.pending is not None:
+            frame, self.pending = self.pending, None
+            self.send(frame)
+
+    def send(self, frame):
+        """
+        Write a frame to the connection, or keep it in place of any frame
+        still waiting if the connection is paused.
+
+        Args:
+            frame: a bytes frame packed with FRAME
+        """
+        if self.paused:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = frame
+            return
+        self.transport.write(frame)
+        self.sent += 1
+
+
+class SpectatorServer:
+    """
+    Asyncio TCP server that sends every spectator connected to it the
+    frames of a game as they are published.
+
+    Each frame is packed once and written to every spectator in turn.
+    Spectators that fall behind are sent the newest frame once they catch
+    up, rather than every frame they missed, so one slow spectator neither
+    holds up the rest nor makes the server buffer frames for it.
+
+    Attributes:
+        host: the string host name or address to listen on
+        port: the int port to listen on, 0 for any, then the one listened on
+        subscribers: a set of the connected spectators' _Subscriber objects
+        published: an int count of frames published
+        fan_out_time: a float for the time spent writing frames to the
+            spectators (s)
+        max_fan_out_time: a float for the longest time spent writing one
+            frame to the spectators (s)
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), clock=time.perf_counter):
+        """
+        Args:
+            address: a (host, port) tuple to listen on, port 0 for any
+            clock: a function returning the current time in seconds, which
+                spectators compare with their own to measure latency
+        """
+        self.host, self.port = address
+        self.subscribers = set()
+        self.published = 0
+        self.fan_out_time = 0.0
+        self.max_fan_out_time = 0.0
+        self._clock = clock
+        self._server = None
+        self._cpu_start = None
+        self._started = None
+
+    async def start(self):
+        """
+        Start listening for spectators.
+
+        Returns:
+            The server, for chaining.
+        """
+        self._server = await asyncio.get_running_loop().create_server(
+            lambda: _Subscriber(self), self.host, self.port, backlog=1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._cpu_start = time.thread_time()
+        self._started = self._clock()
+        return self
+
+    def publish(self, tick, state):
+        """
+        Send a frame of the game to every spectator. Called from the thread
+        running the server's event loop.
+
+        Args:
+            tick: an int step the frame was taken at
+            state: a tuple of snapshot integers from quantize_state()
+        """
+        start = self._clock()
+        frame = FRAME.pack(tick, start, *state)
+        for subscriber in self.subscribers:
+            subscriber.send(frame)
+        elapsed = self._clock() - start
+        self.published += 1
+        self.fan_out_time += elapsed
+        self.max_fan_out_time = max(self.max_fan_out_time, elapsed)
+
+    def stats(self):
+        """
+        Returns a dict of the frames published and sent, the time spent
+        fanning them out, and the CPU time the thread running the server
+        has used since it started. Called from that thread.
+        """
+        sent = sum(subscriber.sent for subscriber in self.subscribers)
+        dropped = sum(subscriber.dropped for subscriber in self.subscribers)
+        cpu_time = time.thread_time() - self._cpu_start
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "sent": sent,
+            "dropped": dropped,
+            "paused": sum(subscriber.paused for subscriber in self.subscribers),
+            "mean_fan_out_time": self.fan_out_time / max(self.published, 1),
+            "max_fan_out_time": self.max_fan_out_time,
+            "cpu_time": cpu_time,
+            "cpu_load": cpu_time / max(self._clock() - self._started, 1e-9),
+        }
+
+    async def close(self):
+        """
+        Stop listening and disconnect every spectator.
+        """
+        self._server.close()
+        for subscriber in list(self.subscribers):
+            subscriber.transport.abort()
+        await self._server.wait_closed()
+
+
+class SpectatorFeed:
+    """
+    Wrapper around a PongModel that forwards every call to the model and
+    publishes a frame of the game to spectators after each physics step.
+
+    The feed is passed to controllers and game loops in place of the model,
+    as MatchRecorder is. Its SpectatorServer runs on an event loop in a
+    background thread, so the game loop only quantizes the state and hands
+    it over.
+
+    Attributes:
+        model: the PongModel being broadcast
+        server: the SpectatorServer spectators connect to
+        interval: an int number of physics steps between frames
+        step: an int count of physics steps run
+    """
+
+    def __init__(self, model, address=("127.0.0.1", 0), interval=1):
+        """
+        Start the server's event loop thread and listen for spectators.
+
+        Args:
+            model: air pong PongModel object to broadcast
+            address: a (host, port) tuple to listen on, port 0 for any
+            interval: an int number of physics steps between frames
+        """
+        self.model = model
+        self.interval = interval
+        self.step = 0
+        self.server = SpectatorServer(address)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(
+            self.server.start(), self._loop
+        ).result()
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    @property
+    def address(self):
+        return self.server.host, self.server.port
+
+    def trajectory(self):
+        """
+        Run a physics step and publish the game if a frame is due.
+        """
+        self.model.trajectory()
+        self.step += 1
+        if self.step % self.interval == 0:
+            self.publish()
+
+    def publish(self):
+        """
+        Publish a frame of the game as it is now.
+        """
+        self._loop.call_soon_threadsafe(
+            self.server.publish, self.step, quantize_state(self.model)
+        )
+
+    async def _stats(self):
+        return self.server.stats()
+
+    def stats(self):
+        """
+        Returns the server's stats, as for SpectatorServer.stats().
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._stats(), self._loop
+        ).result()
+
+    def close(self):
+        """
+        Disconnect the spectators and stop the server's thread.
+        """
+        asyncio.run_coroutine_threadsafe(
+            self.server.close(), self._loop
+        ).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class SpectatorClient(asyncio.Protocol):
+    """
+    Spectator of a SpectatorServer game, which keeps the newest frame it
+    has received and draws it with a PongView on request.
+
+    Frames that arrive together are skipped but for the newest, so a
+    spectator that reads slowly shows the game as it is now.
+
+    Attributes:
+        tick: the int step of the newest frame, None before the first
+        state: a tuple of the newest frame's snapshot integers
+        frames: an int count of frames received
+        skipped: an int count of frames that arrived along with a newer one
+        latencies: a list of floats for the time from publishing to
+            receiving each frame (s), if measure_latency is set
+        mirror: a PongModel set to the newest frame when it is drawn
+        transport: the asyncio transport of the connection
+    """
+
+    def __init__(self, measure_latency=True, clock=time.perf_counter):
+        """
+        Args:
+            measure_latency: a bool for keeping every frame's latency
+            clock: a function returning the current time in seconds, the
+                same clock as the server's
+        """
+        self.tick = None
+        self.state = None
+        self.frames = 0
+        self.skipped = 0
+        self.latencies = [] if measure_latency else None
+        self.mirror = PongModel(11, 2)
+        self.transport = None
+        self._clock = clock
+        self._buffer = bytearray()
+        self._drawn = None
+        self._arrived = asyncio.Event()
+        self._closed = asyncio.get_running_loop().create_future()
+
+    @classmethod
+    async def connect(cls, address, receive_buffer=None, **kwargs):
+        """
+        Connect a spectator to a server.
+
+        Args:
+            address: the server's (host, port) tuple
+            receive_buffer: an optional int size for the kernel's receive
+                buffer, to keep less of a slow spectator's backlog
+            kwargs: arguments for SpectatorClient
+
+        Returns:
+            The connected SpectatorClient.
+        """
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if receive_buffer is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.sock_connect(sock, address)
+        except OSError:
+            sock.close()
+            raise
+        _, client = await loop.create_connection(
+            lambda: cls(**kwargs), sock=sock
+        )
+        return client
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self._arrived.set()
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    def data_received(self, data):
+        """
+        Keep the newest whole frame received.
+        """
+        buffer = self._buffer
+        buffer += data
+        count = len(buffer) // FRAME.size
+        if not count:
+            return
+        if self.latencies is not None:
+            now = self._clock()
+            self.latencies.extend(
+                now - FRAME.unpack_from(buffer, index * FRAME.size)[1]
+                for index in range(count)
+            )
+        values = FRAME.unpack_from(buffer, (count - 1) * FRAME.size)
+        del buffer[: count * FRAME.size]
+        self.skipped += count - 1
+        self.frames += count
+        self.tick = values[0]
+        self.state = values[2:]
+        self._arrived.set()
+
+    async def wait(self):
+        """
+        Wait for a frame newer than the last one waited for.
+
+        Returns:
+            The int step of the newest frame, or None if the connection
+            has closed.
+        """
+        await self._arrived.wait()
+        self._arrived.clear()
+        if self.transport.is_closing():
+            return None
+        return self.tick
+
+    def draw(self, view):
+        """
+        Set the mirror to the newest frame and draw it.
+
+        Args:
+            view: a PongView of the mirror
+
+        Returns:
+            A list of pygame.Rect areas of the screen that changed.
+        """
+        if self.state is not None and self.tick != self._drawn:
+            apply_state(self.mirror, dequantize_state(self.state))
+            self._drawn = self.tick
+        return view.display()
+
+    async def close(self):
+        """
+        Disconnect from the server.
+        """
+        self.transport.close()
+        await self._closed
+
+
+async def watch(address, surface, frames=None, present=None):
+    """
+    Spectate a game, drawing each new frame with a PongView.
+
+    Args:
+        address: the server's (host, port) tuple
+        surface: a pygame Surface to draw on, the display's or offscreen
+        frames: an optional int number of frames to draw before returning,
+            by default until the server disconnects
+        present: an optional function called with the changed pygame.Rect
+            areas after each frame is drawn, returning False to stop
+
+    Returns:
+        The SpectatorClient, disconnected.
+    """
+    # Pygame is only needed to draw, so it isn't needed to broadcast.
+    # pylint: disable=import-outside-toplevel
+    from air_pong_view import PongView
+
+    client = await SpectatorClient.connect(address, measure_latency=False)
+    view = PongView(surface, client.mirror)
+    view.prepare_images()
+    drawn = 0
+    try:
+        while frames is None or drawn < frames:
+            if await client.wait() is None:
+                break
+            rects = client.draw(view)
+            drawn += 1
+            if present is not None and present(rects) is False:
+                break
+    finally:
+        await client.close()
+    return client
+
+
+async def _load_test(subscribers, frames, rate):
+    """
+    Run load_test() on the running event loop.
+    """
+    model = PongModel(11, 2)
+    feed = SpectatorFeed(model)
+    clients = []
+    try:
+        for _ in range(subscribers):
+            clients.append(await SpectatorClient.connect(feed.address))
+        while feed.stats()["subscribers"] < subscribers:
+            await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for frame in range(frames):
+            if model.ball_home:
+                model.serve()
+            feed.trajectory()
+            model.check_point()
+            await asyncio.sleep(
+                start + (frame + 1) / rate - time.perf_counter()
+            )
+        # wait for the last frame to reach every subscriber
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline and any(
+            client.tick != feed.step for client in clients
+        ):
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        stats = feed.stats()
+        latencies = sorted(
+            latency for client in clients for latency in client.latencies
+        )
+        for client in clients:
+            await client.close()
+    finally:
+        feed.close()
+    return {
+        "subscribers": subscribers,
+        "frames": frames,
+        "received": len(latencies),
+        "skipped": sum(client.skipped for client in clients),
+        "dropped": stats["dropped"],
+        "median_latency": statistics.median(latencies),
+        "p99_latency": latencies[int(0.99 * (len(latencies) - 1))],
+        "max_latency": latencies[-1],
+        "mean_fan_out_time": stats["mean_fan_out_time"],
+        "max_fan_out_time": stats["max_fan_out_time"],
+        "server_cpu_load": stats["cpu_load"],
+        "process_cpu_load": (time.process_time() - cpu_start) / elapsed,
+    }
+
+
+def load_test(subscribers=500, frames=300, rate=60.0):
+    """
+    Broadcast a game to many spectators in this process and measure how
+    long frames take to reach them and the CPU the broadcast uses.
+
+    Args:
+        subscribers: an int number of spectators to connect
+        frames: an int number of frames to publish
+        rate: a float for the frames published per second
+
+    Returns:
+        A dict of the frames received and skipped by the spectators and
+        dropped by the server, the median, 99th percentile and longest time
+        from publishing a frame to a spectator receiving it (s), the mean
+        and longest time the server spent writing a frame to every
+        spectator (s), and the share of a CPU core used by the server's
+        thread and by the whole process, spectators included.
+    """
+    return asyncio.run(_load_test(subscribers, frames, rate))
+
+
+def main(argv=None):
+    """
+    Watch a broadcast game from the command line, or load test the
+    broadcast service.
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Watch an air-pong game broadcast with 'main.py --broadcast'."
+        )
+    )
+    parser.add_argument(
+        "address",
+        nargs="?",
+        type=parse_address,
+        metavar="HOST:PORT",
+        help="broadcast to watch",
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="draw to an offscreen surface instead of a window",
+    )
+    parser.add_argument(
+        "--frames", type=int, help="number of frames to draw before exiting"
+    )
+    parser.add_argument(
+        "--load-test",
+        type=int,
+        metavar="SUBSCRIBERS",
+        help="broadcast a game to this many spectators and report latency",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=60.0,
+        help="frames published per second in the load test",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=5.0,
+        help="seconds the load test runs for",
+    )
+    args = parser.parse_args(argv)
+    if args.load_test is not None:
+        stats = load_test(
+            args.load_test, int(args.duration * args.rate), args.rate
+        )
+        print(
+            f"{stats['subscribers']} subscribers, {stats['received']} of "
+            f"{stats['subscribers'] * stats['frames']} frames received, "
+            f"{stats['dropped']} dropped by the server"
+        )
+        print(
+            f"latency {stats['median_latency'] * 1000:.2f} ms median, "
+            f"{stats['p99_latency'] * 1000:.2f} ms p99, "
+            f"{stats['max_latency'] * 1000:.2f} ms max"
+        )
+        print(
+            f"fan-out {stats['mean_fan_out_time'] * 1000:.2f} ms mean, "
+            f"{stats['max_fan_out_time'] * 1000:.2f} ms max per frame"
+        )
+        print(
+            f"CPU {stats['server_cpu_load']:.0%} server thread, "
+            f"{stats['process_cpu_load']:.0%} with the spectators"
+        )
+        return stats
+    if args.address is None:
+        parser.error("give the HOST:PORT of a broadcast or --load-test")
+
+    # pylint: disable=import-outside-toplevel
+    import pygame
+
+    if args.headless:
+        surface = pygame.Surface((1500, 600))
+        present = None
+    else:
+        surface = pygame.display.set_mode((1500, 600))
+
+        def present(rects):
+            pygame.display.update(rects)
+            return not any(
+                event.type == pygame.QUIT  # pylint: disable=no-member
+                for event in pygame.event.get()
+            )
+
+    client = asyncio.run(watch(args.address, surface, args.frames, present))
+    print(
+        f"received {client.frames} frames, {client.skipped} of them skipped "
+        "for a newer one"
+    )
+    return client
+
+
+if __name__ == "__main__":
+    main()
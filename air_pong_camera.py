@@ -0,0 +1,224 @@
+"""Camera capture settings and hand detection input for the air-pong controller"""
+
+import time
+import cv2
+import numpy as np
+
+
+def parse_size(text):
+    """
+    Returns a (width, height) tuple of ints from a string like "1280x720".
+
+    Args:
+        text: a string of the width and height separated by an x
+
+    Raises:
+        ValueError: if the string isn't two positive ints separated by an x
+    """
+    width, height = (int(value) for value in text.lower().split("x"))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"size must be positive, not {text}")
+    return (width, height)
+
+
+def parse_roi(text):
+    """
+    Returns a (left, top, right, bottom) tuple of floats from a string like
+    "0.1,0,0.9,1".
+
+    Args:
+        text: a string of four comma separated fractions of the frame
+    """
+    left, top, right, bottom = (float(value) for value in text.split(","))
+    return (left, top, right, bottom)
+
+
+def open_capture(source=0, attempts=10, delay=0.5):
+    """
+    Returns an opened cv2 VideoCapture, retrying while the camera is busy.
+
+    Args:
+        source: an int camera index or a string path to a video file
+        attempts: an int number of times to try opening it
+        delay: a float time to wait between attempts (s)
+
+    Raises:
+        RuntimeError: if the source couldn't be opened
+    """
+    for _ in range(attempts):
+        cap = cv2.VideoCapture(source)  # pylint: disable=no-member
+        if cap.isOpened():
+            return cap
+        cap.release()
+        print("video capture open failed, retrying")
+        time.sleep(delay)
+    raise RuntimeError(f"couldn't open video capture {source}")
+
+
+def configure_capture(cap, size=None, fps=None, fourcc=None):
+    """
+    Ask a camera for a capture format and return the one it settled on.
+
+    Cameras pick the nearest format they support, or ignore the request, so
+    the returned values can differ from the requested ones.
+
+    Args:
+        cap: a cv2 VideoCapture object
+        size: an optional (width, height) tuple of ints in pixels
+        fps: an optional float for the frames per second to capture at
+        fourcc: an optional four character string of the pixel format, for
+            example "MJPG", which lets many webcams deliver higher
+            resolutions and frame rates over USB
+
+    Returns:
+        A (width, height, fps) tuple of the capture format in use.
+    """
+    # pylint: disable=no-member
+    # The pixel format limits the sizes and rates available, so set it first.
+    if fourcc is not None:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+    if size is not None:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+    if fps is not None:
+        cap.set(cv2.CAP_PROP_FPS, fps)
+    return (
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        cap.get(cv2.CAP_PROP_FPS),
+    )
+
+
+class InferenceInput:
+    """
+    Crops camera frames to the region the players' hands are tracked in and
+    shrinks them before hand detection, then maps detected landmarks back to
+    the normalized coordinates of the full frame.
+
+    Hand detection time grows with the size of the image it is given, while
+    the paddle zones only need the hands' positions, so a smaller image
+    cuts detection latency and CPU use. Landmarks come back in full-frame
+    coordinates, so update_hand() and the preview don't change.
+
+    Attributes:
+        roi: a (left, top, right, bottom) tuple of floats for the region of
+            the frame to detect hands in, as fractions of its width and height
+        max_width: an int for the largest width of the image passed to hand
+            detection in pixels, or None to keep the cropped frame's size
+    """
+
+    def __init__(self, roi=None, max_width=None):
+        """
+        Set up the crop and scale, without allocating the image buffer.
+
+        Args:
+            roi: an optional (left, top, right, bottom) tuple of floats, by
+                default the whole frame
+            max_width: an optional int for the largest width in pixels of the
+                image passed to hand detection
+
+        Raises:
+            ValueError: if the region isn't a nonempty part of the frame or
+                the width isn't positive
+        """
+        self.roi = (0.0, 0.0, 1.0, 1.0) if roi is None else tuple(roi)
+        left, top, right, bottom = self.roi
+        if not (0 <= left < right <= 1 and 0 <= top < bottom <= 1):
+            raise ValueError(f"region of interest {roi} is outside the frame")
+        if max_width is not None and max_width <= 0:
+            raise ValueError(
+                f"inference width must be positive, not {max_width}"
+            )
+        self.max_width = max_width
+        self._frame_shape = None
+        self._crop = None
+        self._size = None
+        self._buffer = None
+
+    def _update_crop(self, shape):
+        """
+        Work out the crop in pixels and the inference image size for a frame
+        shape.
+
+        Args:
+            shape: a tuple for the shape of the frame array
+        """
+        height, width = shape[:2]
+        left, top, right, bottom = self.roi
+        x_start = int(round(left * width))
+        y_start = int(round(top * height))
+        x_stop = max(x_start + 1, int(round(right * width)))
+        y_stop = max(y_start + 1, int(round(bottom * height)))
+        self._crop = (x_start, y_start, x_stop, y_stop)
+        crop_width = x_stop - x_start
+        crop_height = y_stop - y_start
+        if self.max_width is not None and crop_width > self.max_width:
+            self._size = (
+                self.max_width,
+                max(1, round(crop_height * self.max_width / crop_width)),
+            )
+        else:
+            self._size = (crop_width, crop_height)
+        self._frame_shape = shape
+        self._buffer = None
+
+    def prepare(self, frame):
+        """
+        Returns the image to run hand detection on for a frame.
+
+        The image is the frame itself when the whole frame is used at full
+        size, and otherwise a buffer reused by the next call to prepare().
+
+        Args:
+            frame: a numpy image array of shape (height, width, 3)
+        """
+        if frame.shape != self._frame_shape:
+            self._update_crop(frame.shape)
+        x_start, y_start, x_stop, y_stop = self._crop
+        if self._size == (frame.shape[1], frame.shape[0]):
+            return frame
+        cropped = frame[y_start:y_stop, x_start:x_stop]
+        if self._buffer is None:
+            self._buffer = np.empty(
+                (self._size[1], self._size[0]) + frame.shape[2:],
+                dtype=frame.dtype,
+            )
+        if self._size == (x_stop - x_start, y_stop - y_start):
+            np.copyto(self._buffer, cropped)
+        else:
+            cv2.resize(  # pylint: disable=no-member
+                cropped,
+                self._size,
+                dst=self._buffer,
+                interpolation=cv2.INTER_LINEAR,  # pylint: disable=no-member
+            )
+        return self._buffer
+
+    def remap(self, detection_result):
+        """
+        Move the landmarks of a detection result on a prepared image to the
+        normalized coordinates of the full frame, in place.
+
+        Args:
+            detection_result: a mp HandLandmarkerResult object for an image
+                returned by prepare()
+
+        Returns:
+            The same detection result.
+        """
+        if self._frame_shape is None:
+            return detection_result
+        height, width = self._frame_shape[:2]
+        x_start, y_start, x_stop, y_stop = self._crop
+        if (x_start, y_start, x_stop, y_stop) == (0, 0, width, height):
+            return detection_result
+        x_scale = (x_stop - x_start) / width
+        y_scale = (y_stop - y_start) / height
+        for hand_landmarks in detection_result.hand_landmarks:
+            for landmark in hand_landmarks:
+                landmark.x = x_start / width + landmark.x * x_scale
+                landmark.y = y_start / height + landmark.y * y_scale
+                # Depth is on the same scale as x.
+                if landmark.z is not None:
+                    landmark.z = landmark.z * x_scale
+        return detection_result
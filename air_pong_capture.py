@@ -0,0 +1,135 @@
+"""Threaded camera capture for the air-pong controller"""
+
+import threading
+import time
+import cv2
+import numpy as np
+
+
+class FrameGrabber:
+    """
+    Background thread that continuously reads frames from a cv2 VideoCapture,
+    flips them and publishes them into a small preallocated ring buffer.
+
+    The game loop calls latest() to pick up the newest frame without waiting
+    on the camera. Frames that are overwritten before they are picked up are
+    counted as dropped.
+
+    Attributes:
+        cap: a cv2 VideoCapture object (camera or video file) to read from
+        slots: an int for the number of frames held in the ring buffer
+        realtime: a bool flag for pacing file sources to their frame rate
+        captured_frames: an int count of frames read from the source
+        dropped_frames: an int count of frames replaced before being read
+        read_latency: a float for the duration of the last cap.read() (s)
+        frame_age: a float for the time between the last frame returned by
+            latest() being read and being picked up (s)
+        capture_time: a float perf_counter time the last frame returned by
+            latest() was read (s)
+        running: a bool that is True while the capture thread is reading
+    """
+
+    def __init__(self, cap, slots=3, realtime=False):
+        """
+        Set up the capture thread without starting it.
+
+        Args:
+            cap: a cv2 VideoCapture object to read from
+            slots: an int for the number of frames in the ring buffer, at
+                least 3 so one slot is always free to write into
+            realtime: a bool flag for pacing reads to the source frame rate,
+                used to play video files back at camera speed
+        """
+        self.cap = cap
+        self.slots = max(slots, 3)
+        self.realtime = realtime
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self.read_latency = 0.0
+        self.frame_age = 0.0
+        self.capture_time = 0.0
+        self.running = False
+        self._buffer = None
+        self._timestamps = np.zeros(self.slots)
+        self._latest = -1
+        self._reading = -1
+        self._unread = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """
+        Start reading frames in the background.
+        """
+        self.running = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the capture thread and release the video source.
+        """
+        self.running = False
+        if self._thread.is_alive():
+            self._thread.join()
+        self.cap.release()
+
+    def latest(self):
+        """
+        Return the newest captured frame without blocking.
+
+        The returned array stays valid until the next call to latest().
+
+        Returns:
+            A flipped numpy frame, or None if no new frame has been captured
+            since the last call.
+        """
+        with self._lock:
+            if not self._unread:
+                return None
+            self._unread = False
+            self._reading = self._latest
+            self.capture_time = self._timestamps[self._reading]
+            self.frame_age = time.perf_counter() - self.capture_time
+            return self._buffer[self._reading]
+
+    def _run(self):
+        """
+        Read, flip and publish frames until stopped or the source runs out.
+        """
+        frame_time = 0.0
+        if self.realtime:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)  # pylint: disable=no-member
+            frame_time = 1 / fps if fps > 0 else 0.0
+        slot = 0
+        while self.running:
+            start = time.perf_counter()
+            success, frame = self.cap.read()
+            if not success:
+                break
+            read_time = time.perf_counter()
+            self.read_latency = read_time - start
+            if self._buffer is None:
+                self._buffer = np.empty(
+                    (self.slots,) + frame.shape, dtype=frame.dtype
+                )
+            # flip straight into the ring buffer slot
+            cv2.flip(  # pylint: disable=no-member
+                frame, 1, dst=self._buffer[slot]
+            )
+            self._timestamps[slot] = read_time
+            with self._lock:
+                if self._unread:
+                    self.dropped_frames += 1
+                self._latest = slot
+                self._unread = True
+                self.captured_frames += 1
+                # pick a slot that is neither published nor being read
+                slot = next(
+                    index
+                    for index in range(self.slots)
+                    if index not in (self._latest, self._reading)
+                )
+            if frame_time:
+                time.sleep(max(0.0, frame_time - (time.perf_counter() - start)))
+        self.running = False
@@ -2,14 +2,12 @@
 
 import time
 import cv2
-import mediapipe as mp
-from mediapipe import solutions  # pylint: disable=unused-import
-from mediapipe.framework.formats import (  # pylint: disable=no-name-in-module
-    landmark_pb2,  # pylint: disable=no-name-in-module
-)  # pylint: disable=no-name-in-module
 import numpy as np
-from vpython import vector
-from pynput import keyboard
+from air_pong_input import CameraInput
+from air_pong_landmarks import EMPTY_RESULT
+from air_pong_overlay import LandmarkOverlay
+from air_pong_tracker import PaddleTracker
+from air_pong_vector import Vector
 
 
 class PongController:
@@ -25,11 +23,10 @@ class PongController:
             - x_dist: the distance of travel for the paddle zone in x
             - y_init_box: the starting x position for paddle zone
             - y_dist: the distance of travel for the paddle zone in y
-        vel_scaling = a float for the scaling factor of calculated velocity
-            to model input velocity (0<vel_scaling<=1). Used in get_hand().
+        vel_scaling = a float for the scaling factor of tracked paddle velocity
+            to model input velocity (0<vel_scaling<=1). Used in update_hand().
         middle_finger_mcp: an int representing the middle finger knuckle index
-        del_time: a float represnting the change in timestep for calculating velocity
-        empty_landmark = a mp HandLandmarkerResult object for result comparisons
+        del_time: a float for the time between hand input updates (s)
     """
 
     del_angle = 5
@@ -40,62 +37,85 @@ class PongController:
     vel_scaling = 0.1
     middle_finger_mcp = 9
     del_time = 1 / 30
-    empty_landmark = mp.tasks.vision.HandLandmarkerResult(
-        handedness=[], hand_landmarks=[], hand_world_landmarks=[]
-    )
 
-    def __init__(self, model):
+    def __init__(
+        self,
+        model,
+        hand_input=None,
+        preview=True,
+        preview_scale=1.0,
+        preview_window=True,
+        tracer=None,
+        keyboard_input=True,
+    ):  # pylint: disable=too-many-arguments
         """
         Start controller processes including keyboard monitoring and CV.
 
         Args:
             model: air pong PongModel object
+            hand_input: a HandInput backend to take hand detections from, by
+                default a CameraInput on the default camera
+            preview: a bool flag for showing the camera preview window with
+                the detected hands drawn on it
+            preview_scale: a float for the size of the preview relative to
+                the camera frame, below 1 to draw a smaller preview
+            preview_window: a bool flag for showing the preview in an OpenCV
+                window, rather than keeping it in preview_frame for the game
+                to draw
+            tracer: an optional LatencyTracer to record each frame's way from
+                the camera to the paddles in
+            keyboard_input: a bool flag for listening to the keyboard with
+                pynput to serve and turn the paddles
 
         Attributes:
             self._model: a PongModel object instance
-            self._previous_position: a list of vectors for each player velocity calculations.
-                Populated when running.
+            self._trackers: a list of a PaddleTracker for each player, filtering
+                their paddle position and velocity over detections
             self._norm: a list of normal vectors for each player
-            self._keyboard_listen: a pynput keybaord listener object that runs async
-            self.cv_result: a HandLandmarksResult object of the latest detection result from the
-                mp callback
-            self.landmarker: an mp HandLandmarker object for hand detection
-            self.cap: a cv2 VideoCapture object to obtain camera frames
+            self._keyboard: the pynput keyboard module, or None
+            self._keyboard_listen: a pynput keybaord listener object that runs
+                async, or None
+            self.hand_input: the HandInput backend detections come from
+            self.cv_result: a HandLandmarkerResult or HandResult object of the
+                latest detection result
+            self.capture_format: a (width, height, fps) tuple of the format the
+                camera is capturing in, or None without a camera
+            self.tracer: a LatencyTracer or None
+            self.overlay: a LandmarkOverlay drawing the preview, or None when
+                the preview is off
+            self.preview_window: a bool flag for showing the preview in an
+                OpenCV window
+            self.preview_frame: a numpy BGR image of the latest preview for
+                the game to draw, when not shown in a window, or None. It is
+                a buffer reused for the next preview, not a copy.
         """
         self._model = model
-        self._previous_position = [None, None]
-        self._norm = [vector(1, 0, 0), vector(-1, 0, 0)]
-
-        # pynput keyboard listener
-        self._keyboard_listen = keyboard.Listener(
-            on_press=self.on_press, on_release=self.on_release
-        )
-        self._keyboard_listen.start()
+        self._trackers = [PaddleTracker(), PaddleTracker()]
+        self._norm = [Vector(1, 0, 0), Vector(-1, 0, 0)]
+
+        # pynput keyboard listener, imported here as it needs a display
+        self._keyboard = self._keyboard_listen = None
+        if keyboard_input:
+            # pylint: disable=import-outside-toplevel
+            from pynput import keyboard
+
+            self._keyboard = keyboard
+            self._keyboard_listen = keyboard.Listener(
+                on_press=self.on_press, on_release=self.on_release
+            )
+            self._keyboard_listen.start()
 
-        # mediapipe landmarker
-        self.cv_result = mp.tasks.vision.HandLandmarkerResult(
-            handedness=[], hand_landmarks=[], hand_world_landmarks=[]
+        self.tracer = tracer
+        self.hand_input = (
+            CameraInput(tracer=tracer) if hand_input is None else hand_input
         )
-        self.landmarker = mp.tasks.vision.HandLandmarker
-        self.create_landmarker()
-        self.cap = self.create_cap(attempt=0)
-
-    def create_cap(self, attempt):
-        """
-        creates the videocapture element and checks for failed video opening.
-
-        Args:
-            attempt: an integer representing the current attempt
-        """
-        cap = cv2.VideoCapture(0)  # pylint: disable=no-member
-        time.sleep(0.5)
-        if cap.isOpened():
-            return cap
-        elif attempt == 10:
-            print("video capture FAILED, closing")
-        else:
-            print("video capture open failed, please restart")
-            self.create_cap(attempt=attempt + 1)
+        self.capture_format = self.hand_input.capture_format
+        self.cv_result = EMPTY_RESULT
+        # timestamp (ms) of cv_result
+        self._result_timestamp_ms = None
+        self.overlay = LandmarkOverlay(preview_scale) if preview else None
+        self.preview_window = preview_window
+        self.preview_frame = None
 
     def on_press(self, key):
         """
@@ -104,6 +124,7 @@ class PongController:
         Args:
             key: a pynput key object representing the key pressed
         """
+        keyboard = self._keyboard
         if key == keyboard.Key.up or key == keyboard.KeyCode.from_char("w"):
             # Serve ball
             self._model.serve()
@@ -131,8 +152,7 @@ class PongController:
             clockwise: a book flag for clockwise rotation
         """
         direction_operator = -1 if clockwise else 1
-        new_norm = vector.rotate(
-            self._norm[player],
+        new_norm = self._norm[player].rotate(
             (direction_operator * self.del_angle * np.pi) / 180,
         )
         # prevent paddle overrotation
@@ -155,7 +175,7 @@ class PongController:
         Args:
             key: a pynput key object representing the key pressed
         """
-        if key == keyboard.Key.esc:
+        if key == self._keyboard.Key.esc:
             # Stop listener
             print("wants to end")
 
@@ -166,44 +186,34 @@ class PongController:
 
         Since the model only operates in a physical space, detected scales from
         mediapipe hand_landmarks need to be converted into position (in meters)
-        and velocity (in meters per second).
+        and velocity (in meters per second). Each player's positions are
+        filtered over the landmarker timestamps of the frames they were found
+        in, and the paddle is placed where the hand is predicted to be now
+        rather than where it was when the frame was taken.
         """
-        # run and visualize hand detection
-        self.hand_cv()
-
-        # manipulate result
-        if self.cv_result != self.empty_landmark:
-            # get amount of hands
-            for i, _ in enumerate(self.cv_result.handedness):
-                player = (
-                    0
-                    if "Right" == self.cv_result.handedness[i][0].display_name
-                    else 1
-                )
-                mid_pos = self.cv_result.hand_landmarks[i][
-                    self.middle_finger_mcp
-                ]
-
-                # calculate velocity
-                prev_pos = self._previous_position[i]
-                vel = vector(0, 0, 0)
-                if prev_pos is not None:
-                    vel = self.vel_scaling * vector(
-                        (prev_pos.x - mid_pos.x) / self.del_time,
-                        (prev_pos.y - mid_pos.y) / self.del_time,
-                        (prev_pos.z - mid_pos.z) / self.del_time,
-                    )
-                self._previous_position[player] = mid_pos
-
+        # run and visualize hand detection, then filter in every new result
+        for timestamp_ms, result in self.hand_cv():
+            for player, mid_pos in self.hands(result):
                 # scale hand position to bounding box
-                vect_mid_pos = vector(
-                    self.paddle_scaling[player][0]
-                    + self.paddle_scaling[player][1] * mid_pos.x,
-                    self.paddle_scaling[player][2]
-                    - self.paddle_scaling[player][3] * mid_pos.y,
-                    mid_pos.z,
+                self._trackers[player].update(
+                    (
+                        self.paddle_scaling[player][0]
+                        + self.paddle_scaling[player][1] * mid_pos.x,
+                        self.paddle_scaling[player][2]
+                        - self.paddle_scaling[player][3] * mid_pos.y,
+                        mid_pos.z,
+                    ),
+                    timestamp_ms / 1000,
                 )
 
+        # manipulate result
+        if self.cv_result.hand_landmarks:
+            now = time.time()
+            for player, _ in self.hands(self.cv_result):
+                position, velocity = self._trackers[player].predict(now)
+                vect_mid_pos = Vector(*position)
+                vel = self.vel_scaling * Vector(*velocity)
+
                 # update hand position in model
                 norm = self._model.paddle_normal[player]
                 self._model.update_paddle(
@@ -212,115 +222,61 @@ class PongController:
                     paddle_velocity=vel,
                     player_paddle=player,
                 )
+            if self.tracer is not None:
+                self.tracer.update(self._result_timestamp_ms)
 
-    def hand_cv(self):
-        """
-        Grabs the latest cv2 frame, passes that into a non-blocking method for detection,
-        and visualizes the latest processed result.
-        """
-        # pull frame from cv2
-        _, frame = self.cap.read()
-        frame = cv2.flip(frame, 1)  # pylint: disable=no-member
-        # run model on frame
-        self.detect_async(frame)
-
-        # draw the landmarks on the page for visualization
-        landmarked_frame = draw_landmarks_on_image(frame, self.cv_result)
-        cv2.imshow("frame", landmarked_frame)  # pylint: disable=no-member
-
-    def detect_async(self, frame):
+    def hands(self, result):
         """
-        begin non-blocking detection of landmarks with mediapipe.
+        Yields a (player, landmark) tuple for each hand in a detection
+        result, of the player whose paddle it moves and its middle finger
+        knuckle.
 
         Args:
-            frame: a numpy RGB frame object
+            result: a HandLandmarkerResult or HandResult object
         """
-        # convert np frame to mp image
-        if frame is not None:
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame)
-            # detect landmarks
-            self.landmarker.detect_async(
-                image=mp_image, timestamp_ms=int(time.time() * 1000)
-            )
+        for i, handedness in enumerate(result.handedness):
+            player = 0 if "Right" == handedness[0].display_name else 1
+            yield player, result.hand_landmarks[i][self.middle_finger_mcp]
 
-    def create_landmarker(self):
+    def hand_cv(self):
         """
-        Initializes the mediapipe landmarker object from the hand landmarker.task
-        in livestream mode.
+        Polls the hand input for new detections, keeping the newest as
+        cv_result, and visualizes it on the newest camera frame.
 
-        Parameters resource
-        https://ai.google.dev/edge/mediapipe/solutions/vision/hand_landmarker/python#configuration_options
+        Returns:
+            A list of (timestamp_ms, result) tuples of the new detections,
+            oldest first.
         """
+        detections = self.hand_input.poll()
+        if detections:
+            self._result_timestamp_ms, self.cv_result = detections[-1]
 
-        # callback function to grab latest cv result
-        def update_result(
-            result: mp.tasks.vision.HandLandmarkerResult,  # type: ignore
-            output_image: mp.Image,  # pylint: disable=unused-argument
-            timestamp_ms: int,  # pylint: disable=unused-argument
-        ):
-            self.cv_result = result
-
-        options = mp.tasks.vision.HandLandmarkerOptions(
-            base_options=mp.tasks.BaseOptions(
-                model_asset_path="hand_landmarker.task"
-            ),  # path to model
-            running_mode=mp.tasks.vision.RunningMode.LIVE_STREAM,  # running live stream
-            num_hands=2,  # track single hand for paddle
-            min_hand_detection_confidence=0.1,
-            min_hand_presence_confidence=0.1,
-            min_tracking_confidence=0.1,
-            result_callback=update_result,
-        )
-
-        # initialize landmarker from options
-        self.landmarker = self.landmarker.create_from_options(options)
-
-
-def draw_landmarks_on_image(
-    rgb_image,
-    detection_result: mp.tasks.vision.HandLandmarkerResult,  # type: ignore
-):
-    """
-    Google's fucntion to draw detected hand landmarks onto the given rgb frame.
-
-    Courtesy of
-    https://github.com/googlesamples/mediapipe/blob/main/examples/hand_landmarker/python/hand_landmarker.ipynb
+        # draw the landmarks on the page for visualization
+        frame = self.hand_input.frame()
+        if self.overlay is not None and frame is not None:
+            landmarked_frame = self.overlay.draw(frame, self.cv_result)
+            # skip frames written over while they were drawn on
+            if self.hand_input.intact():
+                self.show_preview(landmarked_frame)
+        return detections
+
+    def show_preview(self, landmarked_frame):
+        """
+        Shows a preview frame in the OpenCV window, or keeps it for the game
+        to draw.
 
-    Args:
-        rgb_image a numpy RGB image object
-        detection_result: a mp HandLandmarkerResult object of desired landmarks to draw
-    """
-    try:
-        if detection_result.hand_landmarks == []:
-            return rgb_image
+        Args:
+            landmarked_frame: a numpy BGR image with the hands drawn on it
+        """
+        if self.preview_window:
+            cv2.imshow("frame", landmarked_frame)  # pylint: disable=no-member
         else:
-            hand_landmarks_list = detection_result.hand_landmarks
-            annotated_image = np.copy(rgb_image)
-
-            # Loop through the detected hands to visualize.
-            for idx, _ in enumerate(hand_landmarks_list):
-                hand_landmarks = hand_landmarks_list[idx]
+            self.preview_frame = landmarked_frame
 
-                # Draw the hand landmarks.
-                hand_landmarks_proto = (
-                    landmark_pb2.NormalizedLandmarkList()  # pylint: disable=no-member
-                )
-                hand_landmarks_proto.landmark.extend(
-                    [
-                        landmark_pb2.NormalizedLandmark(  # pylint: disable=no-member
-                            x=landmark.x, y=landmark.y, z=landmark.z
-                        )
-                        for landmark in hand_landmarks
-                    ]
-                )
-                mp.solutions.drawing_utils.draw_landmarks(
-                    annotated_image,
-                    hand_landmarks_proto,
-                    mp.solutions.hands.HAND_CONNECTIONS,
-                    mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
-                    mp.solutions.drawing_styles.get_default_hand_connections_style(),
-                )
-            return annotated_image
-    except Exception as e:
-        print(f"running exception: {e}")
-        return rgb_image
+    def close(self):
+        """
+        Stops the hand input and keyboard listener.
+        """
+        self.hand_input.close()
+        if self._keyboard_listen is not None:
+            self._keyboard_listen.stop()
@@ -0,0 +1,471 @@
+"""Hand input backends feeding the air-pong controller"""
+
+import time
+import numpy as np
+from air_pong_camera import InferenceInput, configure_capture, open_capture
+from air_pong_capture import FrameGrabber
+from air_pong_landmarks import (
+    RESULT_DTYPE,
+    hand_result,
+    load_landmarks,
+    pack_result,
+    save_landmarks,
+    unpack_result,
+)
+from air_pong_worker import InferenceWorker
+
+
+class HandInput:
+    """
+    Source of hand detections for PongController.
+
+    The controller polls for new detections on every input update and shows
+    the backend's camera frames in the preview, if it has any. Detections
+    are mp HandLandmarkerResult or HandResult objects, each with an int
+    timestamp (ms) on the time.time() clock of when the hands were where
+    they were found.
+
+    This base class finds no hands, for playing with the keyboard alone.
+
+    Attributes:
+        capture_format: a (width, height, fps) tuple of the camera format, or
+            None without a camera
+    """
+
+    capture_format = None
+
+    def poll(self):
+        """
+        Returns a list of (timestamp_ms, result) tuples of the detections
+        made since the last poll, oldest first.
+        """
+        return []
+
+    def frame(self):
+        """
+        Returns the newest camera frame not returned before, as a numpy BGR
+        image that stays valid until the next poll, or None.
+        """
+        return None
+
+    def intact(self):
+        """
+        Returns True if the last frame returned by frame() hasn't been
+        overwritten since, which the preview checks before showing it.
+        """
+        return True
+
+    def close(self):
+        """
+        Release anything the backend holds.
+        """
+
+
+class CameraInput(HandInput):
+    """
+    Hand detection on a camera or video file in the game process, with a
+    mediapipe landmarker in live stream mode.
+
+    mediapipe is imported when the backend is created, so other backends
+    start without loading it.
+
+    Attributes:
+        cap: a cv2 VideoCapture object to obtain camera frames
+        capture: a FrameGrabber reading cap on a background thread
+        inference: an InferenceInput cropping and shrinking frames for hand
+            detection
+        landmarker: a mp HandLandmarker object for hand detection
+        tracer: a LatencyTracer or None
+    """
+
+    def __init__(
+        self,
+        source=0,
+        tracer=None,
+        capture_size=None,
+        capture_fps=None,
+        capture_fourcc=None,
+        roi=None,
+        inference_width=None,
+        model_path="hand_landmarker.task",
+    ):  # pylint: disable=too-many-arguments
+        """
+        Open the camera and load the hand landmarker.
+
+        Args:
+            source: an int camera index or a string path to a video file,
+                which is played back at its frame rate
+            tracer: an optional LatencyTracer to record each frame's way from
+                the camera to the paddles in
+            capture_size: an optional (width, height) tuple of ints to ask
+                the camera to capture at
+            capture_fps: an optional float frame rate to ask the camera for
+            capture_fourcc: an optional four character string pixel format
+                to ask the camera for, such as "MJPG"
+            roi: an optional (left, top, right, bottom) tuple of fractions of
+                the frame to detect hands in, by default the whole frame
+            inference_width: an optional int for the largest width in pixels
+                of the image hand detection runs on
+            model_path: a string path to the hand landmarker .task file
+        """
+        # pylint: disable=import-outside-toplevel
+        import mediapipe as mp
+
+        self._mp = mp
+        self.tracer = tracer
+        self.inference = InferenceInput(roi, inference_width)
+        # landmarker timestamp of the last frame submitted, and the latest
+        # (timestamp, result) set together by the landmarker's thread
+        self._timestamp_ms = 0
+        self._latest = None
+        self._polled_ms = None
+        self._frame = None
+        self.landmarker = self.create_landmarker(model_path)
+        self.cap = open_capture(source)
+        self.capture_format = configure_capture(
+            self.cap, capture_size, capture_fps, capture_fourcc
+        )
+        self.capture = FrameGrabber(
+            self.cap, realtime=isinstance(source, str)
+        ).start()
+
+    def create_landmarker(self, model_path):
+        """
+        Returns a mediapipe hand landmarker in live stream mode, whose
+        results replace the latest result.
+
+        Parameters resource
+        https://ai.google.dev/edge/mediapipe/solutions/vision/hand_landmarker/python#configuration_options
+
+        Args:
+            model_path: a string path to the hand landmarker .task file
+        """
+        mp = self._mp
+
+        # callback function to grab latest cv result
+        def update_result(
+            result,
+            output_image,  # pylint: disable=unused-argument
+            timestamp_ms,
+        ):
+            if self.tracer is not None:
+                self.tracer.complete(timestamp_ms)
+            # move the landmarks back into full frame coordinates
+            self._latest = (timestamp_ms, self.inference.remap(result))
+
+        options = mp.tasks.vision.HandLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(
+                model_asset_path=model_path
+            ),  # path to model
+            running_mode=mp.tasks.vision.RunningMode.LIVE_STREAM,  # running live stream
+            num_hands=2,  # track single hand for paddle
+            min_hand_detection_confidence=0.1,
+            min_hand_presence_confidence=0.1,
+            min_tracking_confidence=0.1,
+            result_callback=update_result,
+        )
+
+        # initialize landmarker from options
+        return mp.tasks.vision.HandLandmarker.create_from_options(options)
+
+    def poll(self):
+        """
+        Submits the newest camera frame for detection and returns the latest
+        result if it is new.
+        """
+        # pull the newest flipped frame from the capture thread
+        frame = self.capture.latest()
+        if frame is not None:
+            self._frame = frame
+            self.detect_async(frame)
+        latest = self._latest
+        if latest is None or latest[0] == self._polled_ms:
+            return []
+        self._polled_ms = latest[0]
+        return [latest]
+
+    def frame(self):
+        frame, self._frame = self._frame, None
+        return frame
+
+    def detect_async(self, frame):
+        """
+        begin non-blocking detection of landmarks with mediapipe.
+
+        Args:
+            frame: a numpy RGB frame object
+        """
+        # detect on the cropped and shrunk region of the frame
+        mp_image = self._mp.Image(
+            image_format=self._mp.ImageFormat.SRGB,
+            data=self.inference.prepare(frame),
+        )
+        # timestamps must increase, and identify the frame's result
+        self._timestamp_ms = max(
+            int(time.time() * 1000), self._timestamp_ms + 1
+        )
+        if self.tracer is not None:
+            self.tracer.submit(self._timestamp_ms, self.capture.capture_time)
+        # detect landmarks
+        self.landmarker.detect_async(
+            image=mp_image, timestamp_ms=self._timestamp_ms
+        )
+
+    def close(self):
+        self.capture.stop()
+        self.landmarker.close()
+
+
+class WorkerInput(HandInput):
+    """
+    Hand detection on the camera in a separate process, through an
+    InferenceWorker.
+
+    Attributes:
+        worker: the started InferenceWorker
+        tracer: a LatencyTracer or None
+    """
+
+    def __init__(self, tracer=None, **settings):
+        """
+        Start the worker process and wait for its first frame.
+
+        Args:
+            tracer: an optional LatencyTracer to record each frame's way from
+                the camera to the paddles in
+            settings: keyword arguments for the InferenceWorker, such as
+                capture_size, roi or preview
+        """
+        self.tracer = tracer
+        self.worker = InferenceWorker(**settings).start()
+        self.capture_format = self.worker.capture_format
+        self._frame_number = None
+
+    def poll(self):
+        detections = []
+        for record in self.worker.results.get():
+            timestamp_ms = int(record["timestamp_ms"])
+            if self.tracer is not None:
+                self.tracer.submit(
+                    timestamp_ms,
+                    record["capture_time"],
+                    record["submit_time"],
+                )
+                self.tracer.complete(timestamp_ms, record["complete_time"])
+            detections.append((timestamp_ms, unpack_result(record)))
+        return detections
+
+    def frame(self):
+        if self.worker.frames is None:
+            return None
+        latest = self.worker.frames.latest()
+        if latest is None:
+            return None
+        self._frame_number, frame = latest
+        return frame
+
+    def intact(self):
+        return self.worker.frames.intact(self._frame_number)
+
+    def close(self):
+        self.worker.stop()
+
+
+class RecordedInput(HandInput):
+    """
+    Plays back a landmark stream saved by LandmarkRecorder at the pace it
+    was recorded at, starting from the first poll.
+
+    Attributes:
+        records: a numpy array of the stream's RESULT_DTYPE records
+        loop: a bool flag for starting over at the end of the stream
+    """
+
+    def __init__(self, path, loop=False, clock=time.time):
+        """
+        Load a landmark stream.
+
+        Args:
+            path: a string path to a .npy file written by LandmarkRecorder
+            loop: a bool flag for starting over at the end of the stream
+            clock: a function returning the time.time() clock in seconds
+        """
+        self.records = load_landmarks(path)
+        self.loop = loop
+        self._clock = clock
+        self._start_ms = None
+        self._next = 0
+        # recorded time of the stream's start, moved on each loop
+        self._first_ms = (
+            int(self.records["timestamp_ms"][0]) if len(self.records) else 0
+        )
+
+    def poll(self):
+        now_ms = int(self._clock() * 1000)
+        if self._start_ms is None:
+            self._start_ms = now_ms
+        detections = []
+        while len(self.records):
+            if self._next == len(self.records):
+                if not self.loop:
+                    break
+                # play the stream again, one frame gap after its end
+                timestamps = self.records["timestamp_ms"]
+                gap = (
+                    int(timestamps[-1] - timestamps[-2])
+                    if len(self.records) > 1
+                    else 33
+                )
+                self._first_ms -= int(timestamps[-1] - timestamps[0]) + gap
+                self._next = 0
+            record = self.records[self._next]
+            timestamp_ms = (
+                self._start_ms + int(record["timestamp_ms"]) - self._first_ms
+            )
+            if timestamp_ms > now_ms:
+                break
+            detections.append((timestamp_ms, unpack_result(record)))
+            self._next += 1
+        return detections
+
+
+def sway(timestamp):
+    """
+    Returns a list of (name, x, y) tuples of two hands slowly swaying side
+    to side and up and down, out of step with each other.
+
+    Args:
+        timestamp: a float time (s)
+    """
+    return [
+        (
+            "Right",
+            0.5 + 0.3 * np.sin(2 * np.pi * 0.4 * timestamp),
+            0.5 + 0.2 * np.sin(2 * np.pi * 0.3 * timestamp),
+        ),
+        (
+            "Left",
+            0.5 + 0.3 * np.sin(2 * np.pi * 0.5 * timestamp + 1),
+            0.5 + 0.2 * np.sin(2 * np.pi * 0.35 * timestamp + 2),
+        ),
+    ]
+
+
+class ScriptedInput(HandInput):
+    """
+    Hands that follow a script of positions over time, detected at a fixed
+    rate, for demos and benchmarks without a camera.
+
+    Attributes:
+        script: a function from a float time since the first poll (s) to a
+            list of (name, x, y) tuples of each hand's handedness and
+            normalized position
+        rate: a float number of detections per second
+    """
+
+    def __init__(self, script=sway, rate=30.0, clock=time.time):
+        """
+        Set up the script, starting at the first poll.
+
+        Args:
+            script: a function from a float time (s) to a list of (name, x,
+                y) hand tuples
+            rate: a float number of detections per second
+            clock: a function returning the time.time() clock in seconds
+        """
+        self.script = script
+        self.rate = rate
+        self._clock = clock
+        self._start = None
+        self._count = 0
+
+    def poll(self):
+        now = self._clock()
+        if self._start is None:
+            self._start = now
+        due = int((now - self._start) * self.rate) + 1
+        if due <= self._count:
+            return []
+        # only the newest detection due is made, as a late camera would
+        self._count = due
+        elapsed = (due - 1) / self.rate
+        return [
+            (
+                int((self._start + elapsed) * 1000),
+                hand_result(self.script(elapsed)),
+            )
+        ]
+
+
+class MouseInput(HandInput):
+    """
+    The right hand follows the mouse over the left half of the pygame
+    window, so one player can play without a camera.
+    """
+
+    def __init__(self, clock=time.time):
+        """
+        Set up reading the mouse from the pygame window.
+
+        Args:
+            clock: a function returning the time.time() clock in seconds
+        """
+        # pylint: disable=import-outside-toplevel
+        import pygame
+
+        self._pygame = pygame
+        self._clock = clock
+
+    def poll(self):
+        surface = self._pygame.display.get_surface()
+        if surface is None:
+            return []
+        width, height = surface.get_size()
+        mouse_x, mouse_y = self._pygame.mouse.get_pos()
+        hand = ("Right", min(2 * mouse_x / width, 1.0), mouse_y / height)
+        return [(int(self._clock() * 1000), hand_result([hand]))]
+
+
+class LandmarkRecorder(HandInput):
+    """
+    Passes on another backend's detections and frames while saving the
+    detections as a landmark stream, which RecordedInput plays back.
+
+    Attributes:
+        hand_input: the HandInput being recorded
+        path: a string path the stream is saved to on close
+        records: a list of the RESULT_DTYPE records so far
+    """
+
+    def __init__(self, hand_input, path):
+        """
+        Start recording a backend.
+
+        Args:
+            hand_input: a HandInput to record
+            path: a string path to save the stream to on close
+        """
+        self.hand_input = hand_input
+        self.path = path
+        self.records = []
+        self.capture_format = hand_input.capture_format
+
+    def poll(self):
+        detections = self.hand_input.poll()
+        for timestamp_ms, result in detections:
+            record = np.zeros((), dtype=RESULT_DTYPE)
+            record["sequence"] = len(self.records)
+            record["timestamp_ms"] = timestamp_ms
+            pack_result(result, record)
+            self.records.append(record)
+        return detections
+
+    def frame(self):
+        return self.hand_input.frame()
+
+    def intact(self):
+        return self.hand_input.intact()
+
+    def close(self):
+        self.hand_input.close()
+        save_landmarks(self.path, self.records)
@@ -0,0 +1,114 @@
+"""Hand detection results and their compact record format for air-pong"""
+
+from collections import namedtuple
+import numpy as np
+
+MAX_HANDS = 2
+LANDMARKS = 21
+# One detection result, packed into a fixed size record. Times are
+# perf_counter seconds, which are comparable between processes.
+RESULT_DTYPE = np.dtype(
+    [
+        ("sequence", "i8"),
+        ("timestamp_ms", "i8"),
+        ("capture_time", "f8"),
+        ("submit_time", "f8"),
+        ("complete_time", "f8"),
+        ("hands", "i8"),
+        ("right", "?", (MAX_HANDS,)),
+        ("landmarks", "f4", (MAX_HANDS, LANDMARKS, 3)),
+    ]
+)
+
+# Lightweight stand ins for mediapipe's result containers, with the fields
+# the controller and overlay read, so results that don't come from
+# mediapipe don't need it loaded.
+Landmark = namedtuple("Landmark", "x y z")
+Category = namedtuple("Category", "display_name score")
+HandResult = namedtuple("HandResult", "handedness hand_landmarks")
+EMPTY_RESULT = HandResult(handedness=[], hand_landmarks=[])
+
+
+def hand_result(hands):
+    """
+    Returns a HandResult of hands with every landmark at one point, as
+    scripted and mouse driven hands have.
+
+    Args:
+        hands: a list of (name, x, y) tuples of each hand's handedness,
+            "Right" or "Left", and normalized position
+    """
+    return HandResult(
+        handedness=[[Category(name, 1.0)] for name, _, _ in hands],
+        hand_landmarks=[[Landmark(x, y, 0.0)] * LANDMARKS for _, x, y in hands],
+    )
+
+
+def pack_result(detection_result, record):
+    """
+    Copy the hands of a detection result into a RESULT_DTYPE record.
+
+    Only the handedness and normalized landmarks of up to MAX_HANDS hands are
+    kept, which is all the paddles and the preview use.
+
+    Args:
+        detection_result: a mp HandLandmarkerResult or HandResult object
+        record: a numpy RESULT_DTYPE record to write into
+    """
+    hands = min(len(detection_result.hand_landmarks), MAX_HANDS)
+    record["hands"] = hands
+    for hand in range(hands):
+        record["right"][hand] = (
+            detection_result.handedness[hand][0].display_name == "Right"
+        )
+        record["landmarks"][hand] = [
+            (landmark.x, landmark.y, landmark.z or 0.0)
+            for landmark in detection_result.hand_landmarks[hand]
+        ]
+
+
+def unpack_result(record):
+    """
+    Returns a HandResult of the hands in a RESULT_DTYPE record.
+
+    Args:
+        record: a numpy RESULT_DTYPE record
+    """
+    hands = range(record["hands"])
+    return HandResult(
+        handedness=[
+            [Category("Right" if record["right"][hand] else "Left", 1.0)]
+            for hand in hands
+        ],
+        hand_landmarks=[
+            [Landmark(*point) for point in record["landmarks"][hand].tolist()]
+            for hand in hands
+        ],
+    )
+
+
+def save_landmarks(path, records):
+    """
+    Write a landmark stream to a .npy file.
+
+    Args:
+        path: a string path to write to
+        records: a sequence of numpy RESULT_DTYPE records
+    """
+    np.save(path, np.array(records, dtype=RESULT_DTYPE))
+
+
+def load_landmarks(path):
+    """
+    Returns a numpy array of the RESULT_DTYPE records in a .npy file.
+
+    Args:
+        path: a string path to a file written by save_landmarks()
+
+    Raises:
+        ValueError: if the file doesn't hold landmark records
+    """
+    records = np.load(path)
+    if records.dtype != RESULT_DTYPE:
+        raise ValueError(f"{path} isn't a landmark stream")
+    return records
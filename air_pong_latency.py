@@ -0,0 +1,216 @@
+"""Input latency tracing from camera frame to rendered paddle for air-pong"""
+
+import csv
+import json
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# Times recorded for each camera frame, in pipeline order.
+STAGES = ("capture", "submit", "complete", "update", "render")
+# Latencies reported, as (name, start stage, end stage).
+SPANS = (
+    ("queue", "capture", "submit"),
+    ("inference", "submit", "complete"),
+    ("apply", "complete", "update"),
+    ("display", "update", "render"),
+    ("total", "capture", "render"),
+)
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyTracer:
+    """
+    Follows camera frames through hand detection, the paddle update and the
+    next render, and reports how stale the rendered paddle is.
+
+    Each frame is identified by the timestamp it was submitted to the hand
+    landmarker with, which the landmarker hands back with its result. A
+    frame's trace is finished when a render follows the paddle update made
+    from it. Frames whose result never updates a paddle, for example
+    because no hands were found, are dropped after max_pending newer frames
+    have been submitted.
+
+    The tracer is called from the game loop and the landmarker's callback
+    thread, so every method takes a lock.
+
+    Attributes:
+        window: an int number of the latest finished frames percentiles are
+            taken over
+        records: a list of dicts of every finished frame's stage times (s),
+            its id and the index of the render it was shown in
+        dropped: an int count of frames that never reached a render
+    """
+
+    def __init__(self, window=300, max_pending=30, clock=time.perf_counter):
+        """
+        Set up an empty trace.
+
+        Args:
+            window: an int number of finished frames to take percentiles over
+            max_pending: an int number of unfinished frames to keep
+            clock: a function returning the current time in seconds
+        """
+        self.window = window
+        self.records = []
+        self.dropped = 0
+        self._max_pending = max_pending
+        self._clock = clock
+        self._pending = {}
+        self._updated = []
+        self._recent = deque(maxlen=window)
+        self._renders = 0
+        self._lock = threading.Lock()
+
+    def submit(self, frame_id, capture_time, submit_time=None):
+        """
+        Record a frame being passed to the hand landmarker.
+
+        Args:
+            frame_id: an int timestamp (ms) the frame was submitted with
+            capture_time: a float clock time the frame was read from the
+                camera (s)
+            submit_time: an optional float clock time the frame was passed
+                on (s), by default now, for frames detected in another
+                process
+        """
+        with self._lock:
+            self._pending[frame_id] = {
+                "frame": frame_id,
+                "capture": capture_time,
+                "submit": self._clock() if submit_time is None else submit_time,
+            }
+            # dicts keep insertion order, so the oldest frames come first
+            while len(self._pending) > self._max_pending:
+                del self._pending[next(iter(self._pending))]
+                self.dropped += 1
+
+    def complete(self, frame_id, complete_time=None):
+        """
+        Record the landmarker returning the result for a frame.
+
+        Args:
+            frame_id: an int timestamp (ms) the frame was submitted with
+            complete_time: an optional float clock time the result was
+                returned (s), by default now
+        """
+        with self._lock:
+            record = self._pending.get(frame_id)
+            if record is not None:
+                record["complete"] = (
+                    self._clock() if complete_time is None else complete_time
+                )
+
+    def update(self, frame_id):
+        """
+        Record the paddles being updated from a frame's result. Later updates
+        from the same result are ignored.
+
+        Args:
+            frame_id: an int timestamp (ms) the frame was submitted with
+        """
+        with self._lock:
+            record = self._pending.pop(frame_id, None)
+            if record is not None and "complete" in record:
+                record["update"] = self._clock()
+                self._updated.append(record)
+            # frames submitted before this one won't update a paddle now
+            for older in [key for key in self._pending if key < frame_id]:
+                del self._pending[older]
+                self.dropped += 1
+
+    def render(self):
+        """
+        Record a render, finishing the trace of every frame whose paddle
+        update it shows.
+        """
+        with self._lock:
+            now = self._clock()
+            for record in self._updated:
+                record["render"] = now
+                record["render_frame"] = self._renders
+                self.records.append(record)
+                self._recent.append(
+                    tuple(
+                        record[end] - record[start] for _, start, end in SPANS
+                    )
+                )
+            self._updated = []
+            self._renders += 1
+
+    def percentiles(self):
+        """
+        Returns a dict mapping each latency name in SPANS to a dict of its
+        PERCENTILES (ms) over the latest window of finished frames, or an
+        empty dict if no frame has finished yet.
+        """
+        with self._lock:
+            if not self._recent:
+                return {}
+            values = np.percentile(
+                np.array(self._recent) * 1000, PERCENTILES, axis=0
+            )
+        return {
+            name: {
+                f"p{percentile}": float(values[row, column])
+                for row, percentile in enumerate(PERCENTILES)
+            }
+            for column, (name, _, _) in enumerate(SPANS)
+        }
+
+    def summary(self):
+        """
+        Returns a list of strings, one per latency, of its percentiles for
+        showing on screen.
+        """
+        return [
+            f"{name:9} "
+            + " ".join(f"{key} {value:5.1f}" for key, value in values.items())
+            + " ms"
+            for name, values in self.percentiles().items()
+        ]
+
+    def export(self, path):
+        """
+        Write every finished frame's trace to a file, as JSON with the
+        percentiles if the path ends in .json and as CSV otherwise.
+
+        Latencies are written in milliseconds alongside the raw stage times.
+
+        Args:
+            path: a string path to write to
+        """
+        with self._lock:
+            rows = [
+                dict(
+                    record,
+                    **{
+                        f"{name}_ms": (record[end] - record[start]) * 1000
+                        for name, start, end in SPANS
+                    },
+                )
+                for record in self.records
+            ]
+            dropped = self.dropped
+        fields = (
+            ["frame", "render_frame"]
+            + list(STAGES)
+            + [f"{name}_ms" for name, _, _ in SPANS]
+        )
+        if str(path).endswith(".json"):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {
+                        "percentiles": self.percentiles(),
+                        "dropped": dropped,
+                        "records": rows,
+                    },
+                    file,
+                    indent=1,
+                )
+        else:
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.DictWriter(file, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(rows)
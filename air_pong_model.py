@@ -1,11 +1,32 @@
-from vpython import vector
+from collections import namedtuple
+from math import acos
+import struct
 import numpy as np
+from air_pong_vector import Vector
+
+# Where and when the ball is predicted to reach something, with the time
+# from now (sec) and the ball's position and velocity there.
+Crossing = namedtuple("Crossing", "time position velocity")
+# The predicted first table bounce, net crossing and its clearance (m) and
+# crossing of each paddle plane, each None if the ball doesn't reach it.
+Prediction = namedtuple("Prediction", "bounce net clearance paddles")
+# A cached roll of the ball, with the step it reached, whether the ball left
+# play by then and its events at times from the model's first step (sec),
+# whether it dropped out of play, and an array of the step, start x, y and
+# z, velocity x, y and z, duration and time of each straight segment it
+# moved in, to find the paddle plane crossings again when a paddle moves.
+_Roll = namedtuple(
+    "_Roll", "end final bounce net clearance paddles dropped segments"
+)
 
 
 class PongModel:
     """
     Class for storing the state of a ping pong game.
 
+    Vectors of the game state are air_pong_vector Vector objects owned by the
+    model and updated in place each step. Public properties return copies.
+
     Attributes:
         ball_position - A vector representing the x,y,z position of the ball.
         ball_velocity - A vector representing the velocity of the ball.
@@ -40,7 +61,18 @@ class PongModel:
             pong table (meters).
         ball_mass - Float equal to the mass of the ball (kg).
         ball_radius - Float equal to the radius of the ball (m).
-        time_step - Float establishing the amount of time between frames (sec).
+        time_step - Float establishing the default amount of time between
+            frames (sec). Contact and spin physics are always resolved at this
+            rate.
+        step_size - Float giving the amount of time simulated by each call to
+            trajectory (sec).
+        swept_collisions - A boolean enabling continuous collision detection,
+            which stops the ball at the moment it reaches the table, net or
+            paddle within a step instead of checking only the step endpoints.
+        max_impacts - Integer giving the most collisions resolved within a
+            single step.
+        impact_margin - Float giving the time past a time of impact the ball
+            is moved so the collision is detected (sec).
         acc_gravity - Float giving the acceleration due to gravity (ms^-2)
         ball_rebound - Float corresponding to the percentage of kinetic energy
             conserved in a table bounce.
@@ -56,6 +88,12 @@ class PongModel:
             ping pong ball.
         paddle_force - A float equal to the force applied by a player wielding
             their paddle (N).
+        tick - An integer counting the steps the ball has been in flight,
+            which the times of predictions are measured from.
+        prediction - The cached roll of the ball behind predict and
+            predict_until, None once the ball collides.
+        snapshot_size - Integer giving the bytes snapshot packs the whole
+            game state into.
     """
 
     # All variables use base SI units.
@@ -66,7 +104,7 @@ class PongModel:
     _ball_mass = 0.0027
     _ball_radius = 0.02
     _time_step = 0.01
-    _acc_gravity = vector(0, -9.8, 0)
+    _acc_gravity = Vector(0, -9.8, 0)
     _ball_rebound = 0.9
     _paddle_friction = 0.95
     _table_friction = 0.75
@@ -75,8 +113,36 @@ class PongModel:
     _drag_coefficient = 0.47
     _lift_coefficient = 2.5
     _paddle_force = 0.5
+    _max_impacts = 4
+    _impact_margin = 1e-9
+    # Events predict_until can stop at.
+    _events = ("bounce", "net", "paddle")
+    # Snapshot layout: the ball position, velocity and spin, its angle to
+    # the table, the bounce count, current bounce, player 1 serving, ball
+    # home, both scores and the tick, then each paddle's normal, velocity,
+    # position and edges, whether it has a frame and the frame's normal and
+    # face rows and front, back, top and bottom.
+    _snapshot_ball = struct.Struct("<17d")
+    _snapshot_paddle = struct.Struct("<26d")
+    _snapshot_size = _snapshot_ball.size + 2 * _snapshot_paddle.size
+    # Shared axes so steps don't need to allocate them.
+    _y_axis = Vector(0, 1, 0)
+    _z_axis = Vector(0, 0, 1)
+    # Paddle contact is solved over precomputed steps of time_step / 10.
+    _contact_steps = 1000
+    _contact_omega = np.sqrt(_paddle_stiff / _ball_mass)
+    _contact_index = np.arange(1, _contact_steps + 1)
+    _contact_times = _time_step / 10 * _contact_index
+    _contact_square_sum = np.cumsum(_contact_times**2)
+    _contact_sin_sum = np.cumsum(np.sin(_contact_omega * _contact_times))
 
-    def __init__(self, win_threshold, serve_increment):
+    def __init__(
+        self,
+        win_threshold,
+        serve_increment,
+        time_step=_time_step,
+        swept_collisions=True,
+    ):
         """
         Define default ball state in time and space.
 
@@ -84,27 +150,33 @@ class PongModel:
             win_threshold - An integer designating how many points to play to.
             serve_increment - An integer dictating the number of points before the
                 serve switches players.
+            time_step - A float giving the time simulated by each call to
+                trajectory (sec).
+            swept_collisions - A boolean, True to find the time of impact with
+                the table, net and paddles within each step.
         """
-        self._ball_position = vector(
+        self._step_size = time_step
+        self._swept_collisions = swept_collisions
+        self._ball_position = Vector(
             PongModel._table_front, PongModel._table_height + 0.3, 0
         )
-        self._ball_velocity = vector(0, 0, 0)
-        self._ball_spin = vector(0, 0, 0)
+        self._ball_velocity = Vector(0, 0, 0)
+        self._ball_spin = Vector(0, 0, 0)
         self._angle = 0
-        self._mag_force = vector(0, 0, 0)
-        self._drag_force = vector(0, 0, 0)
-        self._paddle_normal_pair = [vector(1, 0, 0).hat, vector(-1, 0, 0)]
+        self._mag_force = Vector(0, 0, 0)
+        self._drag_force = Vector(0, 0, 0)
+        self._paddle_normal_pair = [Vector(1, 0, 0), Vector(-1, 0, 0)]
         self._paddle_normal = self._paddle_normal_pair[0]
-        self._paddle_velocity_pair = [vector(0, 0, 0), vector(0, 0, 0)]
+        self._paddle_velocity_pair = [Vector(0, 0, 0), Vector(0, 0, 0)]
         self._paddle_velocity = self._paddle_velocity_pair[0]
         self._paddle_position_pair = [
-            vector(
+            Vector(
                 PongModel._table_front - 0.25,
                 PongModel._table_height,
                 0,
             ),
             # Start 5cm away from edge so as not to interfere with serve.
-            vector(
+            Vector(
                 PongModel._table_front + PongModel._table_length + 0.25,
                 PongModel._table_height,
                 0,
@@ -112,9 +184,15 @@ class PongModel:
         ]
         self._paddle_position = self._paddle_position_pair[0]
         self._paddle_edges_pair = [[[], []], [[], []]]
+        self._paddle_frame_pair = [None, None]
+        self._paddle_packed_pair = [None, None]
         self._player_score = (0, 0)
         self._win_threshold = win_threshold
         self._serve_increment = serve_increment
+        self._tick = 0
+        self._prediction = None
+        self._paddles_moved = False
+        self._shadow = None
         self.update_paddle(
             self._paddle_normal, self._paddle_position, self._paddle_velocity, 0
         )
@@ -125,42 +203,67 @@ class PongModel:
             1,
         )
         self._paddle_edges = self._paddle_edges_pair[0]
+        self._paddle_frame = self._paddle_frame_pair[0]
         self._bounce_count = 0
         self._current_bounce = 0
         self._player1_serving = True
         self._ball_home = True
 
-    def compute_magnus_force(self):
+    def compute_magnus_force(self, out=None):
         """
         Returns a vector giving the magnus force (N) on the ping pong ball.
+
+        Args:
+            out - An optional vector to store the force in instead of
+                allocating a new one.
         """
-        return (
+        _velocity = self._ball_velocity
+        _spin_scale = PongModel._time_step / (2 * np.pi)
+        _spin_x = self._ball_spin.x * _spin_scale
+        _spin_y = self._ball_spin.y * _spin_scale
+        _spin_z = self._ball_spin.z * _spin_scale
+        _scale = (
             0.5
             * PongModel._lift_coefficient
             * PongModel._ball_radius**2
             * np.pi
-            * self._ball_velocity.mag2
-            * vector.cross(
-                self._ball_velocity,
-                self._ball_spin / (2 * np.pi) * PongModel._time_step,
-            )
+            * (_velocity.x**2 + _velocity.y**2 + _velocity.z**2)
+        )
+        if out is None:
+            out = Vector()
+        return out.set(
+            _scale * (_velocity.y * _spin_z - _velocity.z * _spin_y),
+            _scale * (_velocity.z * _spin_x - _velocity.x * _spin_z),
+            _scale * (_velocity.x * _spin_y - _velocity.y * _spin_x),
         )
 
-    def compute_drag(self):
+    def compute_drag(self, out=None):
         """
         Returns a vector giving the opposing drag force (N) on the ping pong ball.
+
+        Args:
+            out - An optional vector to store the force in instead of
+                allocating a new one.
         """
-        return (
-            0.5
-            * PongModel._air_density
-            * vector(
-                -self._ball_velocity.hat.x * self._ball_velocity.x**2,
-                -self._ball_velocity.hat.y * self._ball_velocity.y**2,
-                -self._ball_velocity.hat.z * self._ball_velocity.z**2,
+        _velocity = self._ball_velocity
+        _speed = _velocity.mag
+        _scale = 0.0
+        if _speed > 0:
+            _scale = (
+                -0.5
+                * PongModel._air_density
+                * PongModel._drag_coefficient
+                * np.pi
+                * PongModel._ball_radius**2
+                / _speed
             )
-            * PongModel._drag_coefficient
-            * np.pi
-            * PongModel._ball_radius**2
+        if out is None:
+            out = Vector()
+        # Each component opposes the velocity with the square of its speed.
+        return out.set(
+            _scale * _velocity.x * _velocity.x**2,
+            _scale * _velocity.y * _velocity.y**2,
+            _scale * _velocity.z * _velocity.z**2,
         )
 
     def hit_table(self):
@@ -178,26 +281,26 @@ class PongModel:
             and self._ball_position.y
             < PongModel._table_height + PongModel._ball_radius
         ):
+            self._prediction = None
             # Adjust position slightly to prevent double bounce.
-            self._ball_position += vector(0, 0.0001, 0)
+            self._ball_position.y += 0.0001
             # Rotate velocity vector and scale (energy lost in bounce).
-            self._ball_velocity = PongModel._ball_rebound * vector.rotate(
-                self._ball_velocity,
-                angle=2 * self._angle,
-                axis=vector(0, 0, 1),
+            self._ball_velocity = PongModel._ball_rebound * (
+                self._ball_velocity.rotate(
+                    angle=2 * self._angle, axis=PongModel._z_axis
+                )
             )
             # Calculate angular momentum converted to linear momentum.
             _sp_angular_momentum = (
-                vector.cross(-self._ball_spin, vector(0, -1, 0))
-                * self._ball_radius**2
+                self._ball_spin.cross(PongModel._y_axis) * self._ball_radius**2
             )
-            self._ball_velocity += (
-                PongModel._table_friction * _sp_angular_momentum
+            self._ball_velocity.add_scaled(
+                _sp_angular_momentum, PongModel._table_friction
             )
             # Update spin after bounce.
             self._ball_spin = (
                 (1 - PongModel._table_friction)
-                * vector.cross(_sp_angular_momentum, vector(0, 1, 0))
+                * _sp_angular_momentum.cross(PongModel._y_axis)
                 / self._ball_radius**2
             )
             # Update bounce count depending on the active player to
@@ -206,8 +309,11 @@ class PongModel:
                 self._bounce_count += 1
             else:
                 self._bounce_count -= 1
-        # Update angle to table after each time_step
-        self._angle = vector.diff_angle(self._ball_velocity, vector(1, 0, 0))
+        # Update angle to table after each time_step, the angle between the
+        # velocity and the x axis.
+        _speed = self._ball_velocity.mag
+        _cosine = self._ball_velocity.x / _speed if _speed > 0 else 0.0
+        self._angle = acos(min(max(_cosine, -1.0), 1.0))
 
     def hit_net(self):
         """
@@ -224,20 +330,22 @@ class PongModel:
                 self._ball_position.y
                 < PongModel._net_height + PongModel._table_height
             ):
-                self._ball_velocity = vector(
+                self._prediction = None
+                self._ball_velocity = Vector(
                     -0.1 * self._player_coefficient(), 0, 0
                 )
             # Check if only the bottom half of ball is below the top of net.
             elif (
-                self.ball_position.y - self._ball_radius
+                self._ball_position.y - self._ball_radius
                 <= PongModel._net_height + PongModel._table_height
                 and self._current_bounce != self._bounce_count
             ):
                 # Redefine current_bounce so elif statement isn't repeatedly
                 # called.
                 self._current_bounce = self._bounce_count
+                self._prediction = None
                 # Rotate and scale velocity depending on spin and contact point.
-                self._ball_velocity = vector.rotate(
+                self._ball_velocity = (
                     2
                     * np.arcsin(
                         (
@@ -248,8 +356,9 @@ class PongModel:
                         / PongModel._ball_radius
                     )
                     / np.pi
-                    * self._ball_velocity,
-                    axis=vector(0, 0, 1) + self._ball_spin,
+                    * self._ball_velocity
+                ).rotate(
+                    axis=PongModel._z_axis + self._ball_spin,
                     angle=np.arccos(
                         (
                             self._ball_position.y
@@ -264,25 +373,442 @@ class PongModel:
         """
         Base method for determining where the ball will go next after a time_step.
         Method updates ball_position and ball_velocity attributes.
+
+        With swept collisions, the step is split at each time of impact with
+        the table, net or paddle so fast balls can't pass through them between
+        the start and end of a step.
         """
         # Check whether ball is in free motion.
         if self._ball_home is False:
-            # Switch which paddle the ball will hit next.
-            self.switch_paddle()
-            # Check for collisions.
-            self.hit_table()
-            self.paddle_bounce()
-            self.hit_net()
-            # Compute forces.
-            self._mag_force = self.compute_magnus_force()
-            self._drag_force = self.compute_drag()
-            # Update position based on current velocity.
-            self._ball_position += PongModel._time_step * self._ball_velocity
-            # Update velocity based on acting forces.
-            self._ball_velocity += (
-                PongModel._acc_gravity
-                + (self._mag_force + self._drag_force) / PongModel._ball_mass
-            ) * PongModel._time_step
+            _remaining = self._step_size
+            for _impacts in range(PongModel._max_impacts + 1):
+                # Switch which paddle the ball will hit next.
+                self.switch_paddle()
+                # Check for collisions.
+                self.hit_table()
+                self.paddle_bounce()
+                self.hit_net()
+                _impact = None
+                if self._swept_collisions and _impacts < PongModel._max_impacts:
+                    _impact = self.time_of_impact(_remaining)
+                if _impact is None:
+                    break
+                # Move just past the impact so the collision is handled next.
+                _impact += PongModel._impact_margin
+                self.advance_ball(_impact)
+                _remaining -= _impact
+            self.advance_ball(_remaining)
+            self._tick += 1
+
+    def advance_ball(self, duration):
+        """
+        Move the ball in free flight, without checking for collisions.
+
+        Args:
+            duration - A float giving the time to move the ball for (sec).
+        """
+        # Compute forces.
+        self.compute_magnus_force(out=self._mag_force)
+        self.compute_drag(out=self._drag_force)
+        # Update position based on current velocity.
+        self._ball_position.add_scaled(self._ball_velocity, duration)
+        # Update velocity based on acting forces.
+        _force_scale = duration / PongModel._ball_mass
+        self._ball_velocity.add_scaled(PongModel._acc_gravity, duration)
+        self._ball_velocity.add_scaled(self._mag_force, _force_scale)
+        self._ball_velocity.add_scaled(self._drag_force, _force_scale)
+
+    def time_of_impact(self, duration):
+        """
+        Method to find when the ball, moving at its current velocity, first
+        touches the table, net or active paddle.
+
+        Args:
+            duration - A float giving the time to look ahead (sec).
+
+        Returns:
+            A float giving the time until the first impact (sec), or None if
+            the ball touches nothing within the duration.
+        """
+        _times = [
+            _time
+            for _time in (
+                self._table_impact(),
+                self._net_impact(),
+                self._paddle_impact(),
+            )
+            if _time is not None and _time + PongModel._impact_margin < duration
+        ]
+        return min(_times, default=None)
+
+    def _table_impact(self):
+        """
+        Returns the time (sec) until the bottom of the ball reaches the table
+        surface, or None if it is not falling onto the table.
+        """
+        _height = (
+            self._ball_position.y
+            - PongModel._table_height
+            - PongModel._ball_radius
+        )
+        if _height < 0 or self._ball_velocity.y >= 0:
+            return None
+        _time = _height / -self._ball_velocity.y
+        _x_position = self._ball_position.x + _time * self._ball_velocity.x
+        if (
+            PongModel._table_front - PongModel._ball_radius
+            <= _x_position
+            <= PongModel._table_front
+            + PongModel._table_length
+            + PongModel._ball_radius
+        ):
+            return _time
+        return None
+
+    def _net_impact(self):
+        """
+        Returns the time (sec) until the leading edge of the ball reaches the
+        net, or None if it will pass over the net or is moving away from it.
+        """
+        _coefficient = self._player_coefficient()
+        # Distance and closing speed of the leading edge to the net.
+        _gap = _coefficient * (
+            PongModel._table_front
+            + round(PongModel._table_length / 2, 2)
+            - self._ball_position.x
+            - _coefficient * PongModel._ball_radius
+        )
+        _closing = _coefficient * self._ball_velocity.x
+        if _gap <= 0 or _closing <= 0:
+            return None
+        _time = _gap / _closing
+        if (
+            self._ball_position.y
+            + _time * self._ball_velocity.y
+            - PongModel._ball_radius
+            <= PongModel._net_height + PongModel._table_height
+        ):
+            return _time
+        return None
+
+    def _paddle_impact(self):
+        """
+        Returns the time (sec) until the ball reaches the face of the active
+        paddle, or None if it misses the paddle or is moving away from it.
+        """
+        if self._paddle_frame is None:
+            return None
+        _normal_row, _face_row, _front, _, _top, _bottom = self._paddle_frame
+        _coefficient = self._player_coefficient()
+        _position = self._ball_position
+        _velocity = self._ball_velocity
+        # Distance from the ball surface to the paddle face along the normal.
+        _gap = (
+            _normal_row[0] * _position.x
+            + _normal_row[1] * _position.y
+            + _normal_row[2] * _position.z
+            - _coefficient * PongModel._ball_radius
+            - _front
+        )
+        _closing = -(
+            _normal_row[0] * _velocity.x
+            + _normal_row[1] * _velocity.y
+            + _normal_row[2] * _velocity.z
+        )
+        if _gap <= 0 or _closing <= 0:
+            return None
+        _time = _gap / _closing
+        _lateral = _coefficient * (
+            _face_row[0] * (_position.x + _time * _velocity.x)
+            + _face_row[1] * (_position.y + _time * _velocity.y)
+            + _face_row[2] * (_position.z + _time * _velocity.z)
+        )
+        if _coefficient * _bottom <= _lateral <= _coefficient * _top:
+            return _time
+        return None
+
+    def predict(self, horizon):
+        """
+        Method to predict where the ball goes over the next horizon seconds,
+        if the paddles stay where they are.
+
+        The ball is rolled forward on a copy of its state with the same steps
+        and collisions as trajectory, except that it passes through the
+        paddles, and stops once it crosses a paddle plane or drops out of
+        play. The roll is cached until the ball collides with something, and
+        kept when a paddle is updated, with only its paddle plane crossings
+        found again, so predicting on every step only rolls the ball forward
+        again after a collision.
+
+        Args:
+            horizon - A float giving the time to look ahead (sec).
+
+        Returns:
+            A Prediction of the events the ball reaches within the horizon.
+        """
+        return self._predicted(horizon, None)
+
+    def predict_until(self, event, horizon=2.0):
+        """
+        Method to predict where the ball goes until it first reaches an
+        event, if the paddles stay where they are.
+
+        Args:
+            event - A string, "bounce", "net" or "paddle", giving the event to
+                stop at.
+            horizon - A float giving the most time to look ahead (sec).
+
+        Returns:
+            A Prediction of the events the ball reaches up to and including
+            the first event of the given kind, within the horizon.
+
+        Raises:
+            ValueError - If the event isn't one of the kinds predicted.
+        """
+        if event not in PongModel._events:
+            raise ValueError(f"can't predict until {event!r}")
+        return self._predicted(horizon, event)
+
+    def _predicted(self, horizon, event):
+        """
+        Returns the Prediction of the events within the horizon and up to the
+        first given event, from the cached roll of the ball if it reaches far
+        enough and otherwise from a new one.
+
+        Args:
+            horizon - A float giving the time to look ahead (sec).
+            event - A string giving the event to stop at, or None.
+        """
+        if self._ball_home:
+            return Prediction(None, None, None, (None, None))
+        _now = self._tick * self._step_size
+        _steps = int(np.ceil(horizon / self._step_size))
+        _roll = self._prediction
+        if _roll is not None and self._paddles_moved:
+            _roll = self._prediction = self._recross(_roll)
+        self._paddles_moved = False
+        _stop = None if _roll is None else _event_time(_roll, event)
+        if _roll is None or not (
+            _roll.final
+            or _roll.end >= self._tick + _steps
+            or (_stop is not None and _stop >= _now)
+        ):
+            _roll = self._prediction = self._roll(_steps, event)
+            _stop = _event_time(_roll, event)
+        # Only report events from now until the horizon or the given event.
+        _until = _now + horizon
+        if _stop is not None:
+            _until = min(_until, _stop)
+
+        def _from_now(crossing):
+            if crossing is None or not _now <= crossing.time <= _until:
+                return None
+            return Crossing(
+                crossing.time - _now,
+                crossing.position.copy(),
+                crossing.velocity.copy(),
+            )
+
+        _net = _from_now(_roll.net)
+        return Prediction(
+            bounce=_from_now(_roll.bounce),
+            net=_net,
+            clearance=None if _net is None else _roll.clearance,
+            paddles=tuple(_from_now(_paddle) for _paddle in _roll.paddles),
+        )
+
+    def _roll(self, steps, event):
+        """
+        Roll a copy of the ball forward in the same steps as trajectory, and
+        find where it first bounces, crosses the net and crosses each paddle
+        plane.
+
+        Args:
+            steps - An integer giving the most steps to roll forward.
+            event - A string giving the event to stop after, or None.
+
+        Returns:
+            A _Roll of the events found.
+        """
+        # The shadow is this model's own copy, stepped through its internals.
+        # pylint: disable=protected-access
+        if self._shadow is None:
+            # A model of its own for the ball, with no paddles to bounce off.
+            self._shadow = PongModel(
+                self._win_threshold,
+                self._serve_increment,
+                time_step=self._step_size,
+                swept_collisions=self._swept_collisions,
+            )
+            self._shadow._paddle_frame_pair = [None, None]
+            self._shadow._ball_home = False
+        _shadow = self._shadow
+        _shadow._ball_position = self._ball_position.copy()
+        _shadow._ball_velocity = self._ball_velocity.copy()
+        _shadow._ball_spin = self._ball_spin.copy()
+        _shadow._angle = self._angle
+        _shadow._bounce_count = self._bounce_count
+        _shadow._current_bounce = self._current_bounce
+        # Each plane is a normal and offset, with the ball in front of it
+        # while the normal dotted with the ball position exceeds the offset.
+        _net_x = PongModel._table_front + round(PongModel._table_length / 2, 2)
+        _net_planes = [
+            (-1.0, 0.0, 0.0, PongModel._ball_radius - _net_x),
+            (1.0, 0.0, 0.0, PongModel._ball_radius + _net_x),
+        ]
+        _paddle_planes = [
+            (_normal.x, _normal.y, _normal.z, _normal.dot(_position))
+            for _normal, _position in zip(
+                self._paddle_normal_pair, self._paddle_position_pair
+            )
+        ]
+        _bounce = _net = None
+        _paddles = [None, None]
+        _segments = []
+        _tick = self._tick
+        _final = _dropped = False
+        for _ in range(steps):
+            _time = _tick * self._step_size
+            _remaining = self._step_size
+            for _impacts in range(PongModel._max_impacts + 1):
+                _shadow.switch_paddle()
+                _position = _shadow._ball_position
+                _start = (_position.x, _position.y, _position.z)
+                _bounces = _shadow._bounce_count
+                _shadow.hit_table()
+                if _bounce is None and _shadow._bounce_count != _bounces:
+                    _bounce = Crossing(
+                        _time, Vector(*_start), _shadow._ball_velocity.copy()
+                    )
+                # The net replaces the ball's velocity when it touches it.
+                _velocity = _shadow._ball_velocity
+                _shadow.hit_net()
+                if _net is None and _shadow._ball_velocity is not _velocity:
+                    _net = Crossing(_time, _position.copy(), _velocity)
+                _duration = _remaining
+                _impact = None
+                if self._swept_collisions and _impacts < PongModel._max_impacts:
+                    _impact = _shadow.time_of_impact(_remaining)
+                if _impact is not None:
+                    _duration = _impact + PongModel._impact_margin
+                # Free flight moves the ball in a straight line at the
+                # velocity it starts the segment with.
+                _position = _shadow._ball_position
+                _velocity = _shadow._ball_velocity
+                _start = (_position.x, _position.y, _position.z)
+                _motion = (_velocity.x, _velocity.y, _velocity.z)
+                _shadow.advance_ball(_duration)
+                _segments.append((_tick, *_start, *_motion, _duration, _time))
+                if _net is None:
+                    _net = _plane_crossing(
+                        _net_planes[_start[0] >= _net_x],
+                        _start,
+                        _motion,
+                        _duration,
+                        _time,
+                    )
+                for _player, _plane in enumerate(_paddle_planes):
+                    if _paddles[_player] is None:
+                        _paddles[_player] = _plane_crossing(
+                            _plane, _start, _motion, _duration, _time
+                        )
+                _time += _duration
+                _remaining -= _duration
+                if _impact is None:
+                    break
+            _tick += 1
+            # Past a paddle it's up to the player where the ball goes next.
+            _dropped = _shadow._ball_position.y < -2
+            if any(_paddles) or _dropped:
+                _final = True
+                break
+            if (event == "bounce" and _bounce is not None) or (
+                event == "net" and _net is not None
+            ):
+                break
+        # Height of the bottom of the ball over the net as it reaches it.
+        _clearance = None
+        if _net is not None:
+            _clearance = (
+                _net.position.y
+                - PongModel._ball_radius
+                - PongModel._net_height
+                - PongModel._table_height
+            )
+        return _Roll(
+            end=_tick,
+            final=_final,
+            bounce=_bounce,
+            net=_net,
+            clearance=_clearance,
+            paddles=tuple(_paddles),
+            dropped=_dropped,
+            segments=np.array(_segments, dtype=float).reshape(-1, 9),
+        )
+
+    def _recross(self, roll):
+        """
+        Method to find where a cached roll of the ball crosses the paddle
+        planes as they are now, from the segments the ball moved in, without
+        rolling the ball again. The roll ends with the step the ball first
+        crosses a paddle plane in, as if it had been rolled with the paddles
+        where they are now.
+
+        Args:
+            roll - A _Roll of the ball.
+
+        Returns:
+            A _Roll of the same ball with the paddle plane crossings found
+            again, ending early if the ball now reaches a paddle sooner.
+        """
+        _segments = roll.segments
+        _paddles = [None, None]
+        _ends = [None, None]
+        for _player, (_normal, _position) in enumerate(
+            zip(self._paddle_normal_pair, self._paddle_position_pair)
+        ):
+            _plane = (_normal.x, _normal.y, _normal.z, _normal.dot(_position))
+            _axis = np.array(_plane[:3])
+            # Segments starting in front of the plane and reaching it.
+            _before = _segments[:, 1:4] @ _axis - _plane[3]
+            _closing = -(_segments[:, 4:7] @ _axis)
+            for _index in np.flatnonzero(
+                (_before > 0) & (_closing * _segments[:, 7] >= _before)
+            ):
+                _row = _segments[_index].tolist()
+                _paddles[_player] = _plane_crossing(
+                    _plane, _row[1:4], _row[4:7], _row[7], _row[8]
+                )
+                if _paddles[_player] is not None:
+                    _ends[_player] = int(_row[0]) + 1
+                    break
+        if not any(_paddles):
+            # The roll goes as far as before, and is only final if the ball
+            # dropped out of play.
+            return roll._replace(final=roll.dropped, paddles=(None, None))
+        _end = min(_step for _step in _ends if _step is not None)
+        # Events after the step the ball now reaches a paddle in are dropped.
+        _until = _end * self._step_size
+
+        def _before_end(crossing):
+            if crossing is None or crossing.time >= _until:
+                return None
+            return crossing
+
+        _net = _before_end(roll.net)
+        return roll._replace(
+            end=_end,
+            final=True,
+            bounce=_before_end(roll.bounce),
+            net=_net,
+            clearance=None if _net is None else roll.clearance,
+            paddles=tuple(
+                _paddle if _step == _end else None
+                for _paddle, _step in zip(_paddles, _ends)
+            ),
+            dropped=False,
+            segments=_segments[_segments[:, 0] < _end],
+        )
 
     def update_paddle(
         self, paddle_normal, paddle_position, paddle_velocity, player_paddle
@@ -299,38 +825,104 @@ class PongModel:
             player_paddle - An integer, 0 or 1, corresponding to the index of the list of
             paddles.
         """
-        # Update paddle attributes from input for a given paddle.
-        self._paddle_normal_pair[player_paddle] = paddle_normal
-        self._paddle_velocity_pair[player_paddle] = paddle_velocity
-        self._paddle_position_pair[player_paddle] = paddle_position
+        # Copy paddle attributes from input into the paddle's own vectors.
+        _normal = self._paddle_normal_pair[player_paddle].set(
+            float(paddle_normal.x),
+            float(paddle_normal.y),
+            float(paddle_normal.z),
+        )
+        self._paddle_velocity_pair[player_paddle].set(
+            float(paddle_velocity.x),
+            float(paddle_velocity.y),
+            float(paddle_velocity.z),
+        )
+        _position = self._paddle_position_pair[player_paddle].set(
+            float(paddle_position.x),
+            float(paddle_position.y),
+            float(paddle_position.z),
+        )
         # Compute the edges of the paddle based on input normal vector.
-        self._paddle_edges_pair[player_paddle] = [
-            paddle_position
-            + vector.rotate(
-                PongModel._paddle_width / 2 * paddle_normal,
-                angle=np.pi / 2,
-                axis=vector(0, 0, 1),
-            ),
-            paddle_position
-            - vector.rotate(
-                PongModel._paddle_width / 2 * paddle_normal,
-                angle=np.pi / 2,
-                axis=vector(0, 0, 1),
-            ),
-        ]
+        _half_face = (PongModel._paddle_width / 2 * _normal).rotate(
+            angle=np.pi / 2, axis=PongModel._z_axis
+        )
+        _top = _position + _half_face
+        _bottom = _position - _half_face
         # Convert updated paddle edges into a 2D array.
         self._paddle_edges_pair[player_paddle] = [
-            [
-                round(self._paddle_edges_pair[player_paddle][0].x, 5),
-                round(self._paddle_edges_pair[player_paddle][0].y, 5),
-                round(self._paddle_edges_pair[player_paddle][0].z, 5),
-            ],
-            [
-                round(self._paddle_edges_pair[player_paddle][1].x, 5),
-                round(self._paddle_edges_pair[player_paddle][1].y, 5),
-                round(self._paddle_edges_pair[player_paddle][1].z, 5),
-            ],
+            [round(_top.x, 5), round(_top.y, 5), round(_top.z, 5)],
+            [round(_bottom.x, 5), round(_bottom.y, 5), round(_bottom.z, 5)],
         ]
+        # Cache the paddle basis used to check for contact with the ball.
+        self._paddle_frame_pair[player_paddle] = self._compute_paddle_frame(
+            _normal, self._paddle_edges_pair[player_paddle]
+        )
+        self._pack_paddle(player_paddle)
+        # The ball's roll passes through the paddles, so only where it
+        # crosses their planes needs finding again, next time it's predicted.
+        self._paddles_moved = True
+
+    def _compute_paddle_frame(self, paddle_normal, paddle_edges):
+        """
+        Method to express a paddle in a basis of its normal and face
+        directions, as seen from the left side of the table. Seen from the
+        right side, the face directions are reversed.
+
+        Args:
+            paddle_normal - A vector representing the normal vector to the paddle.
+            paddle_edges - A 2D array of the paddle's top and bottom edges.
+
+        Returns:
+            A tuple of the normal and short face direction rows of the inverse
+            change of basis matrix, the rounded position of the paddle face and
+            the position of the back of the paddle along the normal, and the
+            rounded top and bottom edge positions along the short face
+            direction. None if the paddle faces straight up or down.
+        """
+        if paddle_normal.x == 0 and paddle_normal.z == 0:
+            return None
+        # Define vector parallel to paddle face (long direction).
+        _horizontal_factor = (
+            Vector(paddle_normal.x, 0, paddle_normal.z)
+            .norm()
+            .rotate(angle=np.pi / 2, axis=PongModel._y_axis)
+        )
+        # Define vector parallel to paddle face (short direction).
+        _vertical_factor = _horizontal_factor.rotate(
+            angle=np.pi / 2, axis=paddle_normal
+        )
+        # The first two rows of the inverse of the change of basis matrix,
+        # whose columns are the normal, vertical and horizontal vectors, are
+        # cross products of its columns over its determinant.
+        _normal_row = _vertical_factor.cross(_horizontal_factor)
+        _face_row = _horizontal_factor.cross(paddle_normal)
+        _determinant = _normal_row.dot(paddle_normal)
+        _normal_row = _normal_row / _determinant
+        _face_row = _face_row / _determinant
+        # Define new paddle edges in new basis.
+        _top, _bottom = paddle_edges
+        _front = (
+            _normal_row.x * _top[0]
+            + _normal_row.y * _top[1]
+            + _normal_row.z * _top[2]
+        )
+        return (
+            (_normal_row.x, _normal_row.y, _normal_row.z),
+            (_face_row.x, _face_row.y, _face_row.z),
+            round(_front, 3),
+            _front - PongModel._paddle_length,
+            round(
+                _face_row.x * _top[0]
+                + _face_row.y * _top[1]
+                + _face_row.z * _top[2],
+                4,
+            ),
+            round(
+                _face_row.x * _bottom[0]
+                + _face_row.y * _bottom[1]
+                + _face_row.z * _bottom[2],
+                4,
+            ),
+        )
 
     def hit_or_miss(self):
         """
@@ -340,167 +932,129 @@ class PongModel:
         Returns:
             A boolean, True if the ball hits the paddle and False otherwise.
         """
-        # Define vector parallel to paddle face (long direction).
-        _horizontal_factor = vector.rotate(
-            self._player_coefficient()
-            * vector.norm(
-                vector(
-                    self._paddle_normal.x,
-                    0,
-                    self._paddle_normal.z,
-                )
-            ),
-            angle=np.pi / 2,
-            axis=vector(0, 1, 0),
+        if self._paddle_frame is None:
+            return False
+        _normal_row, _face_row, _front, _back, _top, _bottom = (
+            self._paddle_frame
         )
-        # Define vector parallel to paddle face (short direction).
-        _vertical_factor = vector.rotate(
-            _horizontal_factor,
-            angle=np.pi / 2,
-            axis=(self._paddle_normal),
-        )
-        # Define a matrix to change basis in terms of the normal vector.
-        _change_basis = np.array(
-            [
-                [
-                    self._paddle_normal.x,
-                    _vertical_factor.x,
-                    _horizontal_factor.x,
-                ],
-                [
-                    self._paddle_normal.y,
-                    _vertical_factor.y,
-                    _horizontal_factor.y,
-                ],
-                [
-                    self._paddle_normal.z,
-                    _vertical_factor.z,
-                    _horizontal_factor.z,
-                ],
-            ]
+        _coefficient = self._player_coefficient()
+        _position = self._ball_position
+        # Ball surface position along the paddle normal.
+        _depth = (
+            _normal_row[0] * _position.x
+            + _normal_row[1] * _position.y
+            + _normal_row[2] * _position.z
+            - _coefficient * PongModel._ball_radius
         )
-        # Define new paddle edges in new basis.
-        _paddle_edges_check = np.transpose(
-            np.linalg.inv(_change_basis)
-            @ np.transpose(np.array(self._paddle_edges))
-        )
-        # Define new ball position in new basis.
-        _ball_position_check = np.transpose(
-            np.linalg.inv(_change_basis)
-            @ np.transpose(
-                np.array(
-                    [
-                        self.ball_position.x,
-                        self.ball_position.y,
-                        self.ball_position.z,
-                    ]
-                )
-            )
+        # Ball position along the paddle face.
+        _lateral = _coefficient * round(
+            _face_row[0] * _position.x
+            + _face_row[1] * _position.y
+            + _face_row[2] * _position.z,
+            4,
         )
         # Check whether ball is in contact with paddle.
         return (
-            round(_ball_position_check[1], 4)
-            <= round(_paddle_edges_check[0][1], 4)
-            and round(_ball_position_check[1], 4)
-            >= round(_paddle_edges_check[1][1], 4)
-            and round(_paddle_edges_check[0][0], 3)
-            >= _ball_position_check[0]
-            - self._player_coefficient() * PongModel._ball_radius
-            >= _paddle_edges_check[0][0] - self.paddle_dim.y
+            _coefficient * _bottom <= _lateral <= _coefficient * _top
+            and _front >= _depth >= _back
         )
 
     def paddle_bounce(self):
         """
         Base method for updating the ball state after hitting a paddle,
         given a velocity and spin for the ball and a velocity and angle for the paddle.
+
+        The ball is pushed off the paddle by the paddle force and the spring of
+        the rubber in steps of time_step / 10 until it leaves the paddle face.
+        Sums over those steps are precomputed, so the exit state is found in
+        closed form rather than by stepping through the contact.
         """
         # Check if the ball is in contact with a paddle.
         _hit_paddle = bool(self.hit_or_miss())
         if _hit_paddle is True:
-            # Define initial relative ball speed and position normal to the paddle face.
-            _spring_disp = vector.proj(self._ball_position, self._paddle_normal)
-            _initial_velocity = abs(
-                vector.proj(self._ball_velocity, self._paddle_normal).mag
-            ) + abs(vector.proj(self._paddle_velocity, self._paddle_normal).mag)
-            # Define a cumulative time step because spring equation is deterministic not iterative.
-            _cumm_time = 0
+            self._prediction = None
+            _omega = PongModel._contact_omega
+            _paddle_acc = PongModel._paddle_force / PongModel._ball_mass
+            _normal_hat = self._paddle_normal.hat
+            _paddle_speed = abs(self._paddle_velocity.dot(_normal_hat))
+            # Define initial ball position and relative speed normal to the paddle face.
+            _spring_disp = self._ball_position.dot(_normal_hat)
+            _initial_velocity = (
+                abs(self._ball_velocity.dot(_normal_hat)) + _paddle_speed
+            )
             # Compute velocity parallel to paddle.
-            _parallel_velocity = self._ball_radius * vector.cross(
-                self._ball_spin, self._paddle_normal
-            ) + vector.proj(
-                self._paddle_velocity,
-                vector.rotate(
-                    self._paddle_normal, axis=vector(0, 0, 1), angle=np.pi / 2
-                ),
+            _parallel_velocity = self._ball_radius * self._ball_spin.cross(
+                self._paddle_normal
+            ) + self._paddle_velocity.proj(
+                self._paddle_normal.rotate(
+                    axis=PongModel._z_axis, angle=np.pi / 2
+                )
             )
-            # Run loop until the ball leaves the paddle face.
-            while (
-                _spring_disp.mag
-                >= vector.proj(
-                    self._player_coefficient() * self._ball_position,
-                    self._paddle_normal,
-                ).mag
-            ):
-                _cumm_time += PongModel._time_step / 10
-                # The force per unit mass due to the paddle-spring/ball system.
-                _spring_acc = (
-                    _initial_velocity
-                    / (
-                        (PongModel._paddle_stiff / PongModel._ball_mass)
-                        ** (3 / 2)
-                    )
-                    * np.sin(
-                        _cumm_time
-                        * np.sqrt(
-                            PongModel._paddle_stiff / PongModel._ball_mass
-                        )
-                    )
+            # Total displacement along the normal after each contact step.
+            _displacement = (
+                0.5 * _paddle_acc * PongModel._contact_square_sum
+                - _initial_velocity / _omega * PongModel._contact_sin_sum
+            )
+            # The ball leaves the paddle face on the first step that takes it
+            # further along the normal than where it started.
+            _left_paddle = np.abs(
+                _spring_disp + self._paddle_normal.mag * _displacement
+            ) > abs(_spring_disp)
+            _steps = (
+                int(np.argmax(_left_paddle)) + 1
+                if _left_paddle.any()
+                else PongModel._contact_steps
+            )
+            _cumm_time = PongModel._contact_times[_steps - 1]
+            self._ball_position.add_scaled(
+                self._paddle_normal, float(_displacement[_steps - 1])
+            )
+            # Compute final velocity when the ball leaves the paddle.
+            self._ball_velocity = (
+                -self._player_coefficient()
+                * self._paddle_normal
+                * (
+                    -_paddle_acc * _cumm_time
+                    + _initial_velocity * np.cos(_cumm_time * _omega)
                 )
-                # Compute displacement and update position for cum_time.
-                self._ball_position += self._paddle_normal * (
-                    0.5
-                    * PongModel._paddle_force
-                    / PongModel._ball_mass
-                    * _cumm_time**2
-                    - _spring_acc
-                    * (PongModel._paddle_stiff / PongModel._ball_mass)
+            )
+            # Friction with the paddle slows the parallel velocity each step,
+            # reversing it back and forth once it reaches zero.
+            _friction = (
+                PongModel._paddle_friction
+                * PongModel._time_step
+                * (
+                    _paddle_acc * PongModel._contact_index[:_steps]
+                    + _initial_velocity
+                    / _omega**3
+                    * PongModel._contact_sin_sum[:_steps]
                 )
-                # Compute final velocity for cum_time.
-                self._ball_velocity = (
-                    -self._player_coefficient()
-                    * self._paddle_normal
-                    * (
-                        -PongModel._paddle_force
-                        / PongModel._ball_mass
-                        * _cumm_time
-                        + _initial_velocity
-                        * np.cos(
-                            _cumm_time
-                            * np.sqrt(
-                                PongModel._paddle_stiff / PongModel._ball_mass
-                            )
+            )
+            _parallel_speed = _parallel_velocity.mag
+            _stopped = _friction > _parallel_speed
+            if _parallel_speed > 0 and _stopped.any():
+                _stop_step = int(np.argmax(_stopped))
+                _parallel_speed = _friction[_stop_step] - _parallel_speed
+                if (_steps - 1 - _stop_step) % 2 == 1:
+                    _parallel_speed = (
+                        PongModel._paddle_friction
+                        * PongModel._time_step
+                        * (
+                            _paddle_acc
+                            + _initial_velocity
+                            / _omega**3
+                            * np.sin(_cumm_time * _omega)
                         )
+                        - _parallel_speed
                     )
-                )
-                # Compute relative velocity between paddle face and ball edge
-                # (parallel component).
-                _parallel_velocity -= _parallel_velocity.hat * (
-                    PongModel._paddle_friction
-                    * (PongModel._paddle_force / self._ball_mass + _spring_acc)
-                    * PongModel._time_step
-                )
-                # Update spin based on friction force with paddle and relative velocity.
-                self._ball_spin = vector(
-                    0,
-                    0,
-                    (
-                        _parallel_velocity.mag
-                        - vector.proj(
-                            self._paddle_velocity, self._paddle_normal
-                        ).mag
-                    )
-                    / self._ball_radius,
-                )
+            elif _parallel_speed > 0:
+                _parallel_speed -= _friction[-1]
+            # Update spin based on friction force with paddle and relative velocity.
+            self._ball_spin = Vector(
+                0,
+                0,
+                (_parallel_speed - _paddle_speed) / self._ball_radius,
+            )
 
     def check_point(self):
         """
@@ -508,8 +1062,8 @@ class PongModel:
         """
         # Check if player 2 has won a point and update score if so.
         if self._bounce_count == 2 or (
-            self.ball_position.y < -2
-            and self.ball_position.x < self._table_front
+            self._ball_position.y < -2
+            and self._ball_position.x < self._table_front
         ):
             if self._bounce_count == 2:
                 self._bounce_count = 1
@@ -518,7 +1072,8 @@ class PongModel:
                 self._player_score[1] + 1,
             )
             # Send ball to home and end trajectory.
-            self._ball_position = vector(0, 0, 0)
+            self._ball_position.set(0.0, 0.0, 0.0)
+            self._prediction = None
             self._ball_home = True
             # Change player to serve based on given serve increment.
             if (
@@ -529,8 +1084,8 @@ class PongModel:
                 self._player1_serving = not (self._player1_serving)
         # Check if player 1 has won a point and update score if so.
         if self._bounce_count == -1 or (
-            self.ball_position.y < -2
-            and self.ball_position.x > self.table_dim.x + self._table_front
+            self._ball_position.y < -2
+            and self._ball_position.x > self._table_length + self._table_front
         ):
             if self._bounce_count == -1:
                 self._bounce_count = 0
@@ -539,7 +1094,8 @@ class PongModel:
                 self._player_score[1],
             )
             # Send ball to home and end trajectory.
-            self._ball_position = vector(0, 0, 0)
+            self._ball_position.set(0.0, 0.0, 0.0)
+            self._prediction = None
             self._ball_home = True
             # Change player to serve based on given serve increment.
             if (
@@ -597,12 +1153,11 @@ class PongModel:
                 PongModel._table_front + PongModel._table_length + 0.1
             )
         # Set ball position and vertical velocity to initial a serve.
-        self._ball_position = vector(
-            _serving_position, PongModel._table_height, 0
-        )
-        self._ball_velocity = vector(0, 3, 0)
+        self._ball_position.set(_serving_position, PongModel._table_height, 0.0)
+        self._ball_velocity.set(0.0, 3.0, 0.0)
         self._ball_home = False
         self._bounce_count = (-self._player_coefficient() + 1) // 2
+        self._prediction = None
 
     def switch_paddle(self):
         """
@@ -615,10 +1170,148 @@ class PongModel:
         self._paddle_velocity = self._paddle_velocity_pair[_paddle_index]
         self._paddle_position = self._paddle_position_pair[_paddle_index]
         self._paddle_edges = self._paddle_edges_pair[_paddle_index]
+        self._paddle_frame = self._paddle_frame_pair[_paddle_index]
+
+    def snapshot(self, out=None):
+        """
+        Method to pack the whole game state into a fixed size buffer, to
+        restore it from later.
+
+        The paddles are packed when they are updated, so only the ball,
+        score and serve are packed here.
+
+        Args:
+            out - An optional writable buffer of at least snapshot_size bytes
+                to pack the state into instead of allocating a new one.
+
+        Returns:
+            The buffer holding the state.
+        """
+        if out is None:
+            out = bytearray(PongModel._snapshot_size)
+        _position = self._ball_position
+        _velocity = self._ball_velocity
+        _spin = self._ball_spin
+        PongModel._snapshot_ball.pack_into(
+            out,
+            0,
+            _position.x,
+            _position.y,
+            _position.z,
+            _velocity.x,
+            _velocity.y,
+            _velocity.z,
+            _spin.x,
+            _spin.y,
+            _spin.z,
+            self._angle,
+            self._bounce_count,
+            self._current_bounce,
+            self._player1_serving,
+            self._ball_home,
+            self._player_score[0],
+            self._player_score[1],
+            self._tick,
+        )
+        _offset = PongModel._snapshot_ball.size
+        _size = PongModel._snapshot_paddle.size
+        out[_offset : _offset + _size] = self._paddle_packed_pair[0]
+        out[_offset + _size : _offset + 2 * _size] = self._paddle_packed_pair[1]
+        return out
+
+    def restore(self, snapshot):
+        """
+        Method to set the whole game state to that packed in a snapshot.
+
+        Args:
+            snapshot - A buffer filled by snapshot.
+        """
+        _values = PongModel._snapshot_ball.unpack_from(snapshot)
+        self._ball_position.set(_values[0], _values[1], _values[2])
+        self._ball_velocity.set(_values[3], _values[4], _values[5])
+        self._ball_spin.set(_values[6], _values[7], _values[8])
+        self._angle = _values[9]
+        self._bounce_count = int(_values[10])
+        self._current_bounce = int(_values[11])
+        self._player1_serving = bool(_values[12])
+        self._ball_home = bool(_values[13])
+        self._player_score = (int(_values[14]), int(_values[15]))
+        self._tick = int(_values[16])
+        self._prediction = None
+        # Paddles are only unpacked if they have moved since the snapshot.
+        _offset = PongModel._snapshot_ball.size
+        _size = PongModel._snapshot_paddle.size
+        for _player in (0, 1):
+            _start = _offset + _player * _size
+            _packed = snapshot[_start : _start + _size]
+            if _packed != self._paddle_packed_pair[_player]:
+                self._unpack_paddle(_player, _packed)
+        self.switch_paddle()
+
+    def _pack_paddle(self, player_paddle):
+        """
+        Method to pack a paddle's state for snapshots, after it is updated.
+
+        Args:
+            player_paddle - An integer, 0 or 1, giving the paddle to pack.
+        """
+        _normal = self._paddle_normal_pair[player_paddle]
+        _velocity = self._paddle_velocity_pair[player_paddle]
+        _position = self._paddle_position_pair[player_paddle]
+        _top, _bottom = self._paddle_edges_pair[player_paddle]
+        _frame = self._paddle_frame_pair[player_paddle]
+        if _frame is None:
+            _frame = ((0.0,) * 3, (0.0,) * 3, 0.0, 0.0, 0.0, 0.0)
+        self._paddle_packed_pair[player_paddle] = (
+            PongModel._snapshot_paddle.pack(
+                _normal.x,
+                _normal.y,
+                _normal.z,
+                _velocity.x,
+                _velocity.y,
+                _velocity.z,
+                _position.x,
+                _position.y,
+                _position.z,
+                *_top,
+                *_bottom,
+                self._paddle_frame_pair[player_paddle] is not None,
+                *_frame[0],
+                *_frame[1],
+                *_frame[2:],
+            )
+        )
+
+    def _unpack_paddle(self, player_paddle, packed):
+        """
+        Method to set a paddle's state to that packed in a snapshot.
+
+        Args:
+            player_paddle - An integer, 0 or 1, giving the paddle to set.
+            packed - A buffer of the paddle's packed state.
+        """
+        _values = PongModel._snapshot_paddle.unpack(packed)
+        self._paddle_normal_pair[player_paddle].set(*_values[0:3])
+        self._paddle_velocity_pair[player_paddle].set(*_values[3:6])
+        self._paddle_position_pair[player_paddle].set(*_values[6:9])
+        self._paddle_edges_pair[player_paddle] = [
+            list(_values[9:12]),
+            list(_values[12:15]),
+        ]
+        self._paddle_frame_pair[player_paddle] = (
+            (_values[16:19], _values[19:22], *_values[22:26])
+            if _values[15]
+            else None
+        )
+        self._paddle_packed_pair[player_paddle] = bytes(packed)
 
     @property
     def ball_position(self):
-        return self._ball_position
+        return self._ball_position.copy()
+
+    @property
+    def ball_velocity(self):
+        return self._ball_velocity.copy()
 
     @property
     def ball_radius(self):
@@ -626,7 +1319,7 @@ class PongModel:
 
     @property
     def table_dim(self):
-        return vector(
+        return Vector(
             PongModel._table_length,
             PongModel._table_width,
             PongModel._table_height,
@@ -634,7 +1327,31 @@ class PongModel:
 
     @property
     def paddle_dim(self):
-        return vector(PongModel._paddle_width, PongModel._paddle_length, 0.011)
+        return Vector(PongModel._paddle_width, PongModel._paddle_length, 0.011)
+
+    @property
+    def ball_home(self):
+        return self._ball_home
+
+    @property
+    def time_step(self):
+        return self._step_size
+
+    @property
+    def snapshot_size(self):
+        return PongModel._snapshot_size
+
+    @property
+    def swept_collisions(self):
+        return self._swept_collisions
+
+    @property
+    def win_threshold(self):
+        return self._win_threshold
+
+    @property
+    def serve_increment(self):
+        return self._serve_increment
 
     @property
     def table_front(self):
@@ -646,7 +1363,7 @@ class PongModel:
 
     @property
     def ball_spin(self):
-        return self._ball_spin
+        return self._ball_spin.copy()
 
     @property
     def paddle_edges(self):
@@ -656,14 +1373,79 @@ class PongModel:
     def player_score(self):
         return self._player_score
 
+    @property
+    def bounce_count(self):
+        return self._bounce_count
+
+    @property
+    def player1_serving(self):
+        return self._player1_serving
+
     @property
     def paddle_normal(self):
-        return self._paddle_normal_pair
+        return [_paddle.copy() for _paddle in self._paddle_normal_pair]
 
     @property
     def paddle_position(self):
-        return self._paddle_position_pair
+        return [_paddle.copy() for _paddle in self._paddle_position_pair]
 
     @property
     def paddle_velocity(self):
-        return self._paddle_velocity_pair
+        return [_paddle.copy() for _paddle in self._paddle_velocity_pair]
+
+
+def _plane_crossing(plane, start, velocity, duration, time):
+    """
+    Returns the Crossing where a ball moving in a straight line passes from
+    in front of a plane to behind it, or None if it doesn't.
+
+    Args:
+        plane - A tuple of the plane's normal x, y and z and its offset along
+            the normal (m).
+        start - A tuple of the ball's x, y and z position at the start (m).
+        velocity - A tuple of the ball's x, y and z velocity (m/s).
+        duration - A float giving the time the ball moves for (sec).
+        time - A float giving the time the ball starts moving (sec).
+    """
+    _normal_x, _normal_y, _normal_z, _offset = plane
+    _before = (
+        _normal_x * start[0]
+        + _normal_y * start[1]
+        + _normal_z * start[2]
+        - _offset
+    )
+    _closing = -(
+        _normal_x * velocity[0]
+        + _normal_y * velocity[1]
+        + _normal_z * velocity[2]
+    )
+    if _before <= 0 or _closing * duration < _before:
+        return None
+    _time = _before / _closing
+    return Crossing(
+        time + _time,
+        Vector(
+            start[0] + _time * velocity[0],
+            start[1] + _time * velocity[1],
+            start[2] + _time * velocity[2],
+        ),
+        Vector(*velocity),
+    )
+
+
+def _event_time(roll, event):
+    """
+    Returns the time (sec) of the first event of a kind in a roll of the
+    ball, or None if it isn't reached or no event is given.
+
+    Args:
+        roll - A _Roll of the ball.
+        event - A string, "bounce", "net" or "paddle", or None.
+    """
+    if event == "paddle":
+        return min(
+            (_paddle.time for _paddle in roll.paddles if _paddle is not None),
+            default=None,
+        )
+    _crossing = {"bounce": roll.bounce, "net": roll.net}.get(event)
+    return None if _crossing is None else _crossing.time
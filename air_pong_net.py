@@ -0,0 +1,912 @@
+"""Networked air-pong, with an authoritative server and remote players"""
+
+import argparse
+import collections
+import heapq
+import random
+import socket
+import struct
+import time
+from air_pong_model import PongModel
+from air_pong_scheduler import FixedStepScheduler
+from air_pong_vector import Vector
+
+# Datagram kinds, each sent as the first byte of the datagram.
+HELLO, WELCOME, INPUT, SNAPSHOT = 0, 1, 2, 3
+_MAGIC = b"PONG"
+_VERSION = 1
+# Kind, magic and protocol version.
+_HELLO = struct.Struct("<B4sH")
+# Kind, player index (FULL if the server has no room), win threshold, serve
+# increment, physics time step and snapshot rate.
+_WELCOME = struct.Struct("<BBHHdd")
+FULL = 255
+# Kind, input sequence number, newest snapshot tick received, count of
+# serves requested, then the paddle normal, position and velocity.
+_INPUT = struct.Struct("<BIIB9f")
+# Kind, snapshot tick, tick of the baseline the snapshot is a delta from
+# (NO_BASELINE for a full snapshot) and a bit mask of the fields sent.
+_SNAPSHOT = struct.Struct("<BIII")
+NO_BASELINE = 0xFFFFFFFF
+# Snapshots are the ball position (mm) and spin (0.1 rad/s), each paddle's
+# normal (1/10000) and position (mm), both scores, flags for the ball being
+# home and player 1 serving, and the bounce count, as integers.
+_SCALES = (1000,) * 3 + (10,) * 3 + ((10000,) * 3 + (1000,) * 3) * 2 + (1,) * 4
+# Fields that are blended between snapshots rather than held.
+_CONTINUOUS = 18
+# Snapshots kept to delta compress against and interpolate between.
+HISTORY = 32
+
+
+def parse_address(text):
+    """
+    Returns a (host, port) tuple for a HOST:PORT string.
+
+    Raises:
+        argparse.ArgumentTypeError: if the text isn't HOST:PORT
+    """
+    host, _, port = text.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {text!r}")
+    return host, int(port)
+
+
+def quantize_state(model):
+    """
+    Returns a tuple of the integers a snapshot of the model is made of.
+
+    Args:
+        model: air pong PongModel object
+    """
+    position = model.ball_position
+    spin = model.ball_spin
+    values = [position.x, position.y, position.z, spin.x, spin.y, spin.z]
+    for normal, paddle in zip(model.paddle_normal, model.paddle_position):
+        values += [normal.x, normal.y, normal.z, paddle.x, paddle.y, paddle.z]
+    values += [
+        model.player_score[0],
+        model.player_score[1],
+        int(model.ball_home) | int(model.player1_serving) << 1,
+        model.bounce_count,
+    ]
+    return tuple(
+        int(round(value * scale)) for value, scale in zip(values, _SCALES)
+    )
+
+
+def dequantize_state(state):
+    """
+    Returns a list of the floats a quantized snapshot stands for.
+
+    Args:
+        state: a tuple of snapshot integers from quantize_state()
+    """
+    return [value / scale for value, scale in zip(state, _SCALES)]
+
+
+def _put_varint(data, value):
+    """
+    Append a signed integer to a bytearray as a zigzag encoded varint, one
+    byte for values from -64 to 63.
+    """
+    value = value << 1 if value >= 0 else (-value << 1) - 1
+    while value >= 0x80:
+        data.append(value & 0x7F | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def _get_varint(data, offset):
+    """
+    Returns a signed integer decoded from a zigzag encoded varint in data at
+    offset, and the offset after it.
+    """
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    return (value >> 1) ^ -(value & 1), offset
+
+
+def encode_snapshot(tick, state, baseline_tick=None, baseline=None):
+    """
+    Returns a snapshot datagram of a state, holding only the fields that
+    changed since a baseline state the receiver has, as differences from it.
+
+    Args:
+        tick: an int physics step the state is from
+        state: a tuple of snapshot integers from quantize_state()
+        baseline_tick: an optional int step of the baseline state
+        baseline: an optional tuple of the baseline state, None to send
+            every non zero field
+    """
+    if baseline is None:
+        baseline_tick = NO_BASELINE
+        baseline = (0,) * len(state)
+    mask = 0
+    values = bytearray()
+    for field, (value, base) in enumerate(zip(state, baseline)):
+        if value != base:
+            mask |= 1 << field
+            _put_varint(values, value - base)
+    return _SNAPSHOT.pack(SNAPSHOT, tick, baseline_tick, mask) + values
+
+
+def decode_snapshot(data, baselines):
+    """
+    Returns the tick and state tuple of a snapshot datagram.
+
+    Args:
+        data: bytes of a datagram from encode_snapshot()
+        baselines: a dict mapping ticks to the states received at them
+
+    Raises:
+        KeyError: if the snapshot's baseline isn't in baselines
+    """
+    _, tick, baseline_tick, mask = _SNAPSHOT.unpack_from(data)
+    if baseline_tick == NO_BASELINE:
+        state = [0] * len(_SCALES)
+    else:
+        state = list(baselines[baseline_tick])
+    offset = _SNAPSHOT.size
+    for field, value in enumerate(state):
+        if mask >> field & 1:
+            change, offset = _get_varint(data, offset)
+            state[field] = value + change
+    return tick, tuple(state)
+
+
+class LossyLink:
+    """
+    Sending side of a UDP socket that can drop and delay datagrams, to try
+    out the game over a bad network on localhost.
+
+    Delayed datagrams are queued and sent by pump(), which the server and
+    client call every time they check for datagrams.
+
+    Attributes:
+        sock: the socket.socket datagrams are sent from
+        loss: a float fraction of datagrams dropped
+        latency: a float for the time each datagram is held (s)
+        jitter: a float for the most extra random time held (s)
+        sent: an int count of datagrams handed to the link
+        dropped: an int count of datagrams dropped
+    """
+
+    def __init__(
+        self,
+        sock,
+        loss=0.0,
+        latency=0.0,
+        jitter=0.0,
+        seed=None,
+        clock=time.perf_counter,
+    ):
+        """
+        Set up the link.
+
+        Args:
+            sock: a socket.socket to send from
+            loss: a float fraction of datagrams to drop
+            latency: a float for the time to hold each datagram (s)
+            jitter: a float for the most extra random time to hold one (s)
+            seed: an optional int seeding the drops and jitter
+            clock: a function returning the current time in seconds
+        """
+        self.sock = sock
+        self.loss = loss
+        self.latency = latency
+        self.jitter = jitter
+        self.sent = 0
+        self.dropped = 0
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._queue = []
+
+    def sendto(self, data, address):
+        """
+        Send a datagram, or drop it or queue it to send later.
+
+        Args:
+            data: bytes to send
+            address: a (host, port) tuple to send to
+        """
+        self.sent += 1
+        if self.loss and self._random.random() < self.loss:
+            self.dropped += 1
+            return
+        if not self.latency and not self.jitter:
+            self.sock.sendto(data, address)
+            return
+        due = self._clock() + self.latency
+        due += self._random.uniform(0, self.jitter)
+        # The count breaks ties so queued datagrams are never compared.
+        heapq.heappush(self._queue, (due, self.sent, data, address))
+
+    def pump(self):
+        """
+        Send the queued datagrams that are due.
+        """
+        now = self._clock()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(self._queue)
+            self.sock.sendto(data, address)
+
+
+def _open_socket(address):
+    """
+    Returns a non blocking UDP socket bound to address.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(address)
+    sock.setblocking(False)
+    return sock
+
+
+def _receive(sock):
+    """
+    Yields each (data, address) datagram waiting on a non blocking socket.
+    """
+    while True:
+        try:
+            yield sock.recvfrom(2048)
+        except (BlockingIOError, ConnectionResetError):
+            return
+
+
+class _Peer:
+    """
+    A remote player connected to a PongServer.
+
+    Attributes:
+        player: an int (0 or 1) for the paddle the player moves
+        last_seen: a float for when the player last sent a datagram (s)
+        sequence: an int for the newest input sequence number applied
+        ack: an int for the newest snapshot tick the player has, or None
+        serves: an int count of serves the player has requested
+        joined: a float for when the player joined (s)
+        bytes_sent: an int count of snapshot bytes sent to the player
+        bytes_received: an int count of bytes received from the player
+        snapshots: an int count of snapshots sent to the player
+        full_snapshots: an int count of those that weren't deltas
+    """
+
+    def __init__(self, player, now):
+        self.player = player
+        self.last_seen = now
+        self.sequence = -1
+        self.ack = None
+        self.serves = 0
+        self.joined = now
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.full_snapshots = 0
+
+
+class PongServer:
+    """
+    Authoritative air-pong server, which runs the only PongModel of a game
+    and takes each player's paddle from a remote client over UDP.
+
+    Physics runs at the model's time step. At a fixed tick rate, every
+    client is sent a snapshot of the game, delta compressed against the
+    newest snapshot it has acknowledged, so lost snapshots never need to be
+    sent again.
+
+    Attributes:
+        model: the air pong PongModel object being played
+        tick_rate: a float for the snapshots sent per second
+        timeout: a float for the time without a datagram before a client is
+            dropped (s)
+        link: a LossyLink the server sends through
+        peers: a dict mapping client (host, port) addresses to _Peer objects
+        step: an int count of physics steps run, which snapshots are stamped
+            with
+        tick_times: a deque of the times of the latest snapshot ticks (s)
+    """
+
+    def __init__(
+        self,
+        model=None,
+        address=("127.0.0.1", 0),
+        tick_rate=30.0,
+        timeout=5.0,
+        loss=0.0,
+        latency=0.0,
+        jitter=0.0,
+        seed=None,
+        clock=time.perf_counter,
+    ):
+        """
+        Open the server's socket.
+
+        Args:
+            model: an optional PongModel to run, by default a new one
+            address: a (host, port) tuple to listen on, port 0 for any
+            tick_rate: a float for the snapshots to send per second
+            timeout: a float for the time without a datagram before a
+                client is dropped (s)
+            loss, latency, jitter, seed: simulated network conditions for
+                the datagrams the server sends, as for LossyLink
+            clock: a function returning the current time in seconds
+        """
+        self.model = model if model is not None else PongModel(11, 2)
+        self.tick_rate = tick_rate
+        self.timeout = timeout
+        self.link = LossyLink(
+            _open_socket(address), loss, latency, jitter, seed, clock
+        )
+        self.peers = {}
+        self.step = 0
+        self.tick_times = collections.deque(maxlen=1000)
+        self._clock = clock
+        self._history = collections.OrderedDict()
+
+    @property
+    def address(self):
+        """
+        The (host, port) tuple the server's socket is bound to.
+        """
+        return self.link.sock.getsockname()
+
+    def receive(self):
+        """
+        Handle every datagram waiting for the server, then send the delayed
+        datagrams that are due.
+        """
+        now = self._clock()
+        for data, address in _receive(self.link.sock):
+            if data[:1] == bytes([HELLO]) and len(data) == _HELLO.size:
+                self._welcome(address, data, now)
+            elif data[:1] == bytes([INPUT]) and len(data) == _INPUT.size:
+                peer = self.peers.get(address)
+                if peer is not None:
+                    peer.last_seen = now
+                    peer.bytes_received += len(data)
+                    self._apply_input(peer, _INPUT.unpack(data))
+        for address, peer in list(self.peers.items()):
+            if now - peer.last_seen > self.timeout:
+                del self.peers[address]
+        self.link.pump()
+
+    def _welcome(self, address, data, now):
+        """
+        Give a client that says hello a player, if there is one free.
+
+        Args:
+            address: the client's (host, port) tuple
+            data: bytes of the client's HELLO datagram
+            now: a float for the current time (s)
+        """
+        _, magic, version = _HELLO.unpack(data)
+        if magic != _MAGIC or version != _VERSION:
+            return
+        peer = self.peers.get(address)
+        if peer is None:
+            taken = {peer.player for peer in self.peers.values()}
+            free = [player for player in (0, 1) if player not in taken]
+            if free:
+                peer = self.peers[address] = _Peer(free[0], now)
+        self.link.sendto(
+            _WELCOME.pack(
+                WELCOME,
+                FULL if peer is None else peer.player,
+                self.model.win_threshold,
+                self.model.serve_increment,
+                self.model.time_step,
+                self.tick_rate,
+            ),
+            address,
+        )
+
+    def _apply_input(self, peer, values):
+        """
+        Move a client's paddle and serve for it, unless the input is older
+        than one already applied.
+
+        Args:
+            peer: the _Peer the input came from
+            values: the tuple of unpacked INPUT values
+        """
+        _, sequence, ack, serves, *paddle = values
+        if ack in self._history and (peer.ack is None or ack > peer.ack):
+            peer.ack = ack
+        if sequence <= peer.sequence:
+            return
+        peer.sequence = sequence
+        self.model.update_paddle(
+            paddle_normal=Vector(*paddle[0:3]),
+            paddle_position=Vector(*paddle[3:6]),
+            paddle_velocity=Vector(*paddle[6:9]),
+            player_paddle=peer.player,
+        )
+        # Serves are counted so that one lost with its datagram isn't missed.
+        if serves != peer.serves:
+            peer.serves = serves
+            if self.model.ball_home:
+                self.model.serve()
+
+    def update_physics(self):
+        """
+        Run one physics step of the game.
+        """
+        self.model.trajectory()
+        self.model.check_point()
+        self.step += 1
+
+    def broadcast(self):
+        """
+        Send every client a snapshot of the game as it is now.
+        """
+        self.tick_times.append(self._clock())
+        state = quantize_state(self.model)
+        self._history[self.step] = state
+        while len(self._history) > HISTORY:
+            self._history.popitem(last=False)
+        for address, peer in self.peers.items():
+            baseline = self._history.get(peer.ack)
+            data = encode_snapshot(
+                self.step,
+                state,
+                None if baseline is None else peer.ack,
+                baseline,
+            )
+            self.link.sendto(data, address)
+            peer.bytes_sent += len(data)
+            peer.snapshots += 1
+            peer.full_snapshots += baseline is None
+
+    def run(self, duration=None, stop=None):
+        """
+        Run the game until a player wins, the duration is up or stop is set.
+
+        Args:
+            duration: an optional float for the most time to run for (s)
+            stop: an optional threading.Event to stop at
+        """
+        scheduler = FixedStepScheduler(
+            physics_step=self.model.time_step,
+            input_interval=0.002,
+            render_interval=1 / self.tick_rate,
+            clock=self._clock,
+        )
+        end = None if duration is None else self._clock() + duration
+        while not (stop is not None and stop.is_set()):
+            scheduler.tick(
+                self.receive, self.update_physics, lambda _: self.broadcast()
+            )
+            if self.model.check_win() is not False:
+                self.broadcast()
+                break
+            if end is not None and self._clock() >= end:
+                break
+
+    def stats(self):
+        """
+        Returns a dict of the snapshot tick rate and jitter (ms), as the mean
+        and largest difference between consecutive ticks and 1 / tick_rate,
+        and a list of a dict for each client with its player, the snapshot
+        bytes sent to it per second and per snapshot, and its snapshot and
+        full snapshot counts.
+        """
+        now = self._clock()
+        times = list(self.tick_times)
+        gaps = [
+            abs(later - earlier - 1 / self.tick_rate) * 1000
+            for earlier, later in zip(times, times[1:])
+        ]
+        clients = []
+        for peer in self.peers.values():
+            elapsed = now - peer.joined
+            clients.append(
+                {
+                    "player": peer.player,
+                    "bandwidth": (
+                        peer.bytes_sent / elapsed if elapsed > 0 else 0.0
+                    ),
+                    "bytes_per_snapshot": (
+                        peer.bytes_sent / peer.snapshots
+                        if peer.snapshots
+                        else 0.0
+                    ),
+                    "snapshots": peer.snapshots,
+                    "full_snapshots": peer.full_snapshots,
+                }
+            )
+        return {
+            "tick_rate": (
+                (len(times) - 1) / (times[-1] - times[0])
+                if len(times) > 1 and times[-1] > times[0]
+                else 0.0
+            ),
+            "tick_jitter": sum(gaps) / len(gaps) if gaps else 0.0,
+            "max_tick_jitter": max(gaps, default=0.0),
+            "clients": clients,
+        }
+
+    def close(self):
+        """
+        Close the server's socket.
+        """
+        self.link.sock.close()
+
+
+def apply_state(model, values, skip_player=None):
+    """
+    Set a model's ball, paddles, score and serve to those of a snapshot.
+
+    Args:
+        model: air pong PongModel object to update
+        values: a list of snapshot floats from dequantize_state()
+        skip_player: an optional int player whose paddle is left alone
+    """
+    # pylint: disable=protected-access
+    model._ball_position.set(*values[0:3])
+    model._ball_spin = Vector(*values[3:6])
+    for player in (0, 1):
+        if player != skip_player:
+            offset = 6 + 6 * player
+            model.update_paddle(
+                Vector(*values[offset : offset + 3]),
+                Vector(*values[offset + 3 : offset + 6]),
+                Vector(),
+                player,
+            )
+    model._player_score = (int(values[18]), int(values[19]))
+    model._ball_home = bool(int(values[20]) & 1)
+    model._player1_serving = bool(int(values[20]) & 2)
+    model._bounce_count = int(values[21])
+
+
+class PongClient:
+    """
+    Remote player of a PongServer game, which stands in for the model
+    wherever a controller or view would use it.
+
+    Paddle updates for the client's own player and serves are sent to the
+    server, and the paddle is moved at once in a local mirror of the game.
+    The rest of the mirror is drawn from the server's snapshots, blended
+    between the two either side of a time interpolation_delay behind the
+    newest, so the ball moves smoothly between snapshots and across lost
+    ones. Every other attribute is read from the mirror.
+
+    Attributes:
+        server_address: the server's (host, port) tuple
+        interpolation_delay: a float for how far behind the newest snapshot
+            the game is shown (s)
+        input_interval: a float for the longest time between inputs sent,
+            which also acknowledge snapshots (s)
+        link: a LossyLink the client sends through
+        player: an int (0 or 1) for the client's paddle, None until
+            connected
+        tick_rate: a float for the server's snapshots per second
+        mirror: a PongModel showing the game, None until connected
+        snapshots: a dict mapping ticks to the latest snapshot states
+        bytes_received: an int count of snapshot bytes received
+        undecodable: an int count of snapshots whose baseline was missing
+    """
+
+    def __init__(
+        self,
+        server_address,
+        interpolation_delay=0.1,
+        input_interval=0.05,
+        loss=0.0,
+        latency=0.0,
+        jitter=0.0,
+        seed=None,
+        clock=time.perf_counter,
+    ):
+        """
+        Open the client's socket.
+
+        Args:
+            server_address: the server's (host, port) tuple
+            interpolation_delay: a float for how far behind the newest
+                snapshot to show the game (s)
+            input_interval: a float for the longest time between inputs
+                sent (s)
+            loss, latency, jitter, seed: simulated network conditions for
+                the datagrams the client sends, as for LossyLink
+            clock: a function returning the current time in seconds
+        """
+        self.server_address = server_address
+        self.interpolation_delay = interpolation_delay
+        self.input_interval = input_interval
+        self.link = LossyLink(
+            _open_socket(("", 0)), loss, latency, jitter, seed, clock
+        )
+        self.player = None
+        self.tick_rate = None
+        self.mirror = None
+        self.snapshots = {}
+        self.bytes_received = 0
+        self.undecodable = 0
+        self._clock = clock
+        self._sequence = 0
+        self._serves = 0
+        self._paddle = (0.0,) * 9
+        self._last_sent = None
+        # Local time minus server time of recent snapshots, the least of
+        # which is the best guess of the offset between the two clocks.
+        self._offsets = collections.deque(maxlen=64)
+
+    def __getattr__(self, name):
+        if name == "mirror":
+            raise AttributeError(name)
+        return getattr(self.mirror, name)
+
+    def connect(self, timeout=5.0):
+        """
+        Say hello to the server until it gives the client a player.
+
+        Args:
+            timeout: a float for the most time to wait (s)
+
+        Returns:
+            The client, for chaining.
+
+        Raises:
+            RuntimeError: if the server is full
+            TimeoutError: if the server doesn't answer in time
+        """
+        deadline = self._clock() + timeout
+        while self.player is None:
+            if self._clock() > deadline:
+                raise TimeoutError(f"no answer from {self.server_address}")
+            self.link.sendto(
+                _HELLO.pack(HELLO, _MAGIC, _VERSION), self.server_address
+            )
+            wait = self._clock() + 0.1
+            while self.player is None and self._clock() < wait:
+                self.link.pump()
+                for data, _ in _receive(self.link.sock):
+                    if data[:1] == bytes([WELCOME]):
+                        self._welcomed(_WELCOME.unpack(data))
+                time.sleep(0.002)
+        return self
+
+    def _welcomed(self, values):
+        """
+        Set up the mirror of the game from the server's WELCOME values.
+
+        Raises:
+            RuntimeError: if the server is full
+        """
+        _, player, win_threshold, serve_increment, time_step, tick_rate = values
+        if player == FULL:
+            raise RuntimeError(f"{self.server_address} has no free player")
+        self.player = player
+        self.tick_rate = tick_rate
+        self.mirror = PongModel(
+            win_threshold, serve_increment, time_step=time_step
+        )
+        paddle = (
+            self.mirror.paddle_normal[player],
+            self.mirror.paddle_position[player],
+            Vector(),
+        )
+        self._paddle = tuple(
+            value
+            for vector in paddle
+            for value in (vector.x, vector.y, vector.z)
+        )
+
+    def _send_input(self):
+        """
+        Send the server the latest paddle, serves and snapshot received.
+        """
+        self._sequence += 1
+        ack = max(self.snapshots, default=NO_BASELINE)
+        self.link.sendto(
+            _INPUT.pack(
+                INPUT, self._sequence, ack, self._serves, *self._paddle
+            ),
+            self.server_address,
+        )
+        self._last_sent = self._clock()
+
+    def update_paddle(
+        self, paddle_normal, paddle_position, paddle_velocity, player_paddle
+    ):
+        """
+        Move the client's own paddle and send it to the server. Other
+        players' paddles are ignored, since the server owns them.
+
+        Args:
+            paddle_normal: a vector for the unit normal vector to the paddle
+            paddle_position: a vector for the center of the paddle
+            paddle_velocity: a vector for the velocity of the paddle
+            player_paddle: an int (0 or 1) for the paddle to update
+        """
+        if player_paddle != self.player:
+            return
+        self.mirror.update_paddle(
+            paddle_normal, paddle_position, paddle_velocity, player_paddle
+        )
+        self._paddle = tuple(
+            float(value)
+            for vector in (paddle_normal, paddle_position, paddle_velocity)
+            for value in (vector.x, vector.y, vector.z)
+        )
+        self._send_input()
+
+    def serve(self):
+        """
+        Ask the server to serve.
+        """
+        self._serves = (self._serves + 1) % 256
+        self._send_input()
+
+    def receive(self):
+        """
+        Take in every snapshot waiting for the client, and send an input if
+        one is due to acknowledge them.
+        """
+        now = self._clock()
+        for data, _ in _receive(self.link.sock):
+            if data[:1] != bytes([SNAPSHOT]):
+                continue
+            self.bytes_received += len(data)
+            try:
+                tick, state = decode_snapshot(data, self.snapshots)
+            except KeyError:
+                self.undecodable += 1
+                continue
+            if tick in self.snapshots:
+                continue
+            self.snapshots[tick] = state
+            if len(self.snapshots) > HISTORY:
+                del self.snapshots[min(self.snapshots)]
+            self._offsets.append(now - tick * self.mirror.time_step)
+        self.link.pump()
+        if self._last_sent is None or now - self._last_sent >= (
+            self.input_interval
+        ):
+            self._send_input()
+
+    def state_at(self, server_time):
+        """
+        Returns a list of the snapshot floats of the game at a server time,
+        blended between the snapshots either side of it, or None if there
+        are no snapshots yet.
+
+        The ball, spin and paddles are blended, and the score and serve are
+        those of the earlier snapshot. The ball isn't blended across a point
+        being won or a serve, when it jumps.
+
+        Args:
+            server_time: a float for the server's physics time (s)
+        """
+        if not self.snapshots:
+            return None
+        ticks = sorted(self.snapshots)
+        tick = server_time / self.mirror.time_step
+        if tick <= ticks[0]:
+            return dequantize_state(self.snapshots[ticks[0]])
+        later = next((later for later in ticks if later >= tick), None)
+        if later is None:
+            return dequantize_state(self.snapshots[ticks[-1]])
+        if later == tick:
+            return dequantize_state(self.snapshots[later])
+        earlier = max(earlier for earlier in ticks if earlier < tick)
+        start = dequantize_state(self.snapshots[earlier])
+        end = dequantize_state(self.snapshots[later])
+        alpha = (tick - earlier) / (later - earlier)
+        first = 0 if start[20] == end[20] else 6
+        for field in range(first, _CONTINUOUS):
+            start[field] += alpha * (end[field] - start[field])
+        return start
+
+    def trajectory(self):
+        """
+        Take in the server's snapshots and show the game as it was
+        interpolation_delay behind the newest of them.
+        """
+        self.receive()
+        if not self._offsets:
+            return
+        server_time = (
+            self._clock() - min(self._offsets) - self.interpolation_delay
+        )
+        apply_state(self.mirror, self.state_at(server_time), self.player)
+
+    def check_point(self):
+        """
+        Do nothing, since points are scored by the server.
+        """
+
+    def close(self):
+        """
+        Close the client's socket. The server drops the client once it
+        hears nothing more from it.
+        """
+        self.link.sock.close()
+
+
+def main(argv=None):
+    """
+    Run an air-pong server from the command line, printing each client's
+    bandwidth and the tick jitter as the game goes.
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    parser = argparse.ArgumentParser(description="Host an air-pong game.")
+    parser.add_argument(
+        "--host", default="0.0.0.0", help="address to listen on"
+    )
+    parser.add_argument(
+        "--port", type=int, default=5005, help="UDP port to listen on"
+    )
+    parser.add_argument(
+        "--tick-rate",
+        type=float,
+        default=30.0,
+        help="snapshots sent to each client per second",
+    )
+    parser.add_argument(
+        "--loss",
+        type=float,
+        default=0.0,
+        help="fraction of datagrams to drop, to simulate a bad network",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds to delay each datagram by",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="most extra random seconds to delay each datagram by",
+    )
+    parser.add_argument(
+        "--report",
+        type=float,
+        default=5.0,
+        help="seconds between printed reports",
+    )
+    args = parser.parse_args(argv)
+
+    server = PongServer(
+        address=(args.host, args.port),
+        tick_rate=args.tick_rate,
+        loss=args.loss,
+        latency=args.latency,
+        jitter=args.jitter,
+    )
+    print(f"serving air-pong on {server.address[0]}:{server.address[1]}")
+    try:
+        while server.model.check_win() is False:
+            server.run(duration=args.report)
+            stats = server.stats()
+            print(
+                f"{stats['tick_rate']:.1f} ticks/sec, jitter "
+                f"{stats['tick_jitter']:.2f} ms mean, "
+                f"{stats['max_tick_jitter']:.2f} ms max"
+            )
+            for client in stats["clients"]:
+                print(
+                    f"  player {client['player'] + 1}: "
+                    f"{client['bandwidth'] / 1000:.2f} kB/s, "
+                    f"{client['bytes_per_snapshot']:.1f} B/snapshot, "
+                    f"{client['full_snapshots']} of {client['snapshots']} "
+                    "snapshots full"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return server.stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Hand landmark overlay for the air-pong camera preview"""
+
+import cv2
+import numpy as np
+
+# Hand skeleton as (colour, thickness, connections) groups, in mediapipe's
+# default hand style: grey palm, then each finger from the thumb outwards.
+CONNECTION_STYLE = (
+    ((128, 128, 128), 3, ((0, 1), (0, 5), (0, 17), (5, 9), (9, 13), (13, 17))),
+    ((180, 229, 255), 2, ((1, 2), (2, 3), (3, 4))),
+    ((128, 64, 128), 2, ((5, 6), (6, 7), (7, 8))),
+    ((0, 204, 255), 2, ((9, 10), (10, 11), (11, 12))),
+    ((48, 255, 48), 2, ((13, 14), (14, 15), (15, 16))),
+    ((192, 101, 21), 2, ((17, 18), (18, 19), (19, 20))),
+)
+HAND_CONNECTIONS = tuple(
+    connection
+    for _, _, connections in CONNECTION_STYLE
+    for connection in connections
+)
+# Fill colour of each of the 21 landmarks, drawn over a white border.
+LANDMARK_COLOURS = (
+    ((48, 48, 255),) * 2
+    + ((180, 229, 255),) * 3
+    + ((48, 48, 255),)
+    + ((128, 64, 128),) * 3
+    + ((48, 48, 255),)
+    + ((0, 204, 255),) * 3
+    + ((48, 48, 255),)
+    + ((48, 255, 48),) * 3
+    + ((48, 48, 255),)
+    + ((192, 101, 21),) * 3
+)
+BORDER_COLOUR = (224, 224, 224)
+LANDMARK_RADIUS = 5
+
+
+class LandmarkOverlay:
+    """
+    Draws detected hand landmarks and their connections onto camera frames
+    straight from the landmark coordinates, with OpenCV.
+
+    Frames are copied, or shrunk, into a buffer that is reused from frame to
+    frame, so the frame passed in is left untouched and drawing allocates
+    nothing once the frame size settles. The styles are worked out once
+    when the overlay is created.
+
+    Attributes:
+        scale: a float for the size of the drawn image relative to the frame,
+            below 1 to draw a smaller preview
+    """
+
+    def __init__(self, scale=1.0):
+        """
+        Set up the drawing styles for a preview scale.
+
+        Args:
+            scale: a float for the size of the drawn image relative to the
+                frame, between 0 and 1
+        """
+        self.scale = scale
+        self._buffer = None
+        self._radius = max(1, round(LANDMARK_RADIUS * scale))
+        self._border_radius = max(self._radius + 1, int(self._radius * 1.2))
+        self._connection_style = [
+            (
+                colour,
+                max(1, round(thickness * scale)),
+                np.array(connections, dtype=np.intp),
+            )
+            for colour, thickness, connections in CONNECTION_STYLE
+        ]
+
+    def _prepare(self, frame):
+        """
+        Copy or shrink a frame into the reused buffer and return the buffer.
+
+        Args:
+            frame: a numpy image array of shape (height, width, 3)
+        """
+        height, width = frame.shape[:2]
+        if self.scale != 1:
+            height = max(1, round(height * self.scale))
+            width = max(1, round(width * self.scale))
+        shape = (height, width) + frame.shape[2:]
+        if (
+            self._buffer is None
+            or self._buffer.shape != shape
+            or self._buffer.dtype != frame.dtype
+        ):
+            self._buffer = np.empty(shape, dtype=frame.dtype)
+        if self.scale == 1:
+            np.copyto(self._buffer, frame)
+        else:
+            cv2.resize(  # pylint: disable=no-member
+                frame,
+                (width, height),
+                dst=self._buffer,
+                interpolation=cv2.INTER_LINEAR,  # pylint: disable=no-member
+            )
+        return self._buffer
+
+    def draw(self, frame, detection_result):
+        """
+        Returns the frame with the detected hands drawn on it.
+
+        The returned array is the overlay's buffer, so it is overwritten by
+        the next call to draw(), or the frame itself if there are no hands
+        and the preview is full size.
+
+        Args:
+            frame: a numpy RGB image array
+            detection_result: a mp HandLandmarkerResult object of the
+                landmarks to draw
+        """
+        if not detection_result.hand_landmarks and self.scale == 1:
+            return frame
+        image = self._prepare(frame)
+        height, width = image.shape[:2]
+        for hand_landmarks in detection_result.hand_landmarks:
+            normalized = np.array(
+                [(landmark.x, landmark.y) for landmark in hand_landmarks]
+            )
+            pixels = np.minimum(
+                np.floor(normalized * (width, height)), (width - 1, height - 1)
+            ).astype(np.int32)
+            # Landmarks outside the frame aren't drawn, as in mediapipe.
+            visible = np.all((normalized >= 0) & (normalized <= 1), axis=1)
+            all_visible = visible.all()
+            for colour, thickness, connections in self._connection_style:
+                if not all_visible:
+                    connections = connections[
+                        visible[connections[:, 0]] & visible[connections[:, 1]]
+                    ]
+                    if connections.size == 0:
+                        continue
+                cv2.polylines(  # pylint: disable=no-member
+                    image, pixels[connections], False, colour, thickness
+                )
+            centers = pixels.tolist()
+            for index in np.flatnonzero(visible).tolist():
+                cv2.circle(  # pylint: disable=no-member
+                    image,
+                    centers[index],
+                    self._border_radius,
+                    BORDER_COLOUR,
+                    -1,
+                )
+                cv2.circle(  # pylint: disable=no-member
+                    image,
+                    centers[index],
+                    self._radius,
+                    LANDMARK_COLOURS[index],
+                    -1,
+                )
+        return image
+
+
+def draw_landmarks_on_image(rgb_image, detection_result):
+    """
+    Returns a copy of an rgb frame with the detected hand landmarks drawn on
+    it, or the frame itself if no hands were detected.
+
+    Use a LandmarkOverlay to draw every frame of a preview without
+    allocating a new image each time.
+
+    Args:
+        rgb_image: a numpy RGB image object
+        detection_result: a mp HandLandmarkerResult object of desired
+            landmarks to draw
+    """
+    return LandmarkOverlay().draw(rgb_image, detection_result)
@@ -0,0 +1,452 @@
+"""Binary recording and deterministic replay of air-pong matches"""
+
+import argparse
+import struct
+import threading
+import time
+from air_pong_model import PongModel
+from air_pong_vector import Vector
+
+# Log layout: a header, then records that each start with a kind byte, the
+# physics step they apply to and the seconds since recording started.
+_MAGIC = b"PONG"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHHdB")
+_RECORD = struct.Struct("<BId")
+PADDLE, SERVE, SNAPSHOT = 0, 1, 2
+# Player index, then paddle normal, position and velocity.
+_PADDLE = struct.Struct("<B9d")
+# Ball position, velocity and spin, bounce count, both scores, whether
+# player 1 is serving and whether the ball is home.
+_SNAPSHOT = struct.Struct("<9dbHHBB")
+
+
+def model_state(model):
+    """
+    Returns a tuple of the ball, score and serve state of a model, in the
+    order it is stored in a snapshot record.
+
+    Args:
+        model: air pong PongModel object
+    """
+    position = model.ball_position
+    velocity = model.ball_velocity
+    spin = model.ball_spin
+    return (
+        position.x,
+        position.y,
+        position.z,
+        velocity.x,
+        velocity.y,
+        velocity.z,
+        spin.x,
+        spin.y,
+        spin.z,
+        model.bounce_count,
+        model.player_score[0],
+        model.player_score[1],
+        int(model.player1_serving),
+        int(model.ball_home),
+    )
+
+
+class MatchRecorder:
+    """
+    Wrapper around a PongModel that forwards every call to the model and
+    appends the paddle inputs, serves and periodic state snapshots to a
+    binary log.
+
+    The recorder is passed to controllers and game loops in place of the
+    model. Each input is stamped with the number of trajectory() calls made
+    so far, so a replay can apply it before the same physics step. A serve
+    made between a step and its check_point() is held until the point has
+    been checked, which is where a replay makes it.
+
+    Attributes:
+        model: the PongModel being recorded
+        path: a string path to the log file
+        snapshot_interval: an int number of steps between state snapshots
+        step: an int count of physics steps recorded
+    """
+
+    def __init__(self, model, path, snapshot_interval=100, clock=None):
+        """
+        Create the log file and write its header.
+
+        Args:
+            model: air pong PongModel object to record
+            path: a string path to write the log to
+            snapshot_interval: an int number of steps between state snapshots
+            clock: an optional function returning the current time in seconds
+        """
+        self.model = model
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.step = 0
+        self._clock = clock or time.perf_counter
+        self._start = self._clock()
+        # Inputs can arrive from the keyboard listener thread.
+        self._lock = threading.Lock()
+        # A replay serves before a step or after its check_point(), so a
+        # serve arriving between trajectory() and check_point() waits.
+        self._checked = True
+        self._held_serve = False
+        self._file = open(path, "wb")  # pylint: disable=consider-using-with
+        self._file.write(
+            _HEADER.pack(
+                _MAGIC,
+                _VERSION,
+                model.win_threshold,
+                model.serve_increment,
+                model.time_step,
+                int(model.swept_collisions),
+            )
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write(self, kind, payload=b""):
+        """
+        Append a record for the current step to the log.
+
+        Args:
+            kind: an int record kind, PADDLE, SERVE or SNAPSHOT
+            payload: bytes of the record's packed values
+        """
+        self._file.write(
+            _RECORD.pack(kind, self.step, self._clock() - self._start) + payload
+        )
+
+    def update_paddle(
+        self, paddle_normal, paddle_position, paddle_velocity, player_paddle
+    ):
+        """
+        Record a paddle input and pass it to the model.
+
+        Args:
+            paddle_normal: a vector for the unit normal vector to the paddle
+            paddle_position: a vector for the center of the paddle
+            paddle_velocity: a vector for the velocity of the paddle
+            player_paddle: an int (0 or 1) for the paddle to update
+        """
+        with self._lock:
+            self._write(
+                PADDLE,
+                _PADDLE.pack(
+                    player_paddle,
+                    paddle_normal.x,
+                    paddle_normal.y,
+                    paddle_normal.z,
+                    paddle_position.x,
+                    paddle_position.y,
+                    paddle_position.z,
+                    paddle_velocity.x,
+                    paddle_velocity.y,
+                    paddle_velocity.z,
+                ),
+            )
+            self.model.update_paddle(
+                paddle_normal, paddle_position, paddle_velocity, player_paddle
+            )
+
+    def serve(self):
+        """
+        Record a serve and pass it to the model, or hold it until the point
+        has been checked if a physics step has just run.
+        """
+        with self._lock:
+            if self._checked:
+                self._serve()
+            else:
+                self._held_serve = True
+
+    def _serve(self):
+        """
+        Record a serve and pass it to the model, with the lock held.
+        """
+        self._held_serve = False
+        self._write(SERVE)
+        self.model.serve()
+
+    def check_point(self):
+        """
+        Check the model for a point, then make any serve held back since the
+        last physics step.
+        """
+        with self._lock:
+            self.model.check_point()
+            self._checked = True
+            if self._held_serve:
+                self._serve()
+
+    def trajectory(self):
+        """
+        Snapshot the model state if one is due, then run a physics step.
+        """
+        with self._lock:
+            # A serve is held at most until the next step if the point
+            # isn't checked.
+            if self._held_serve:
+                self._serve()
+            self._checked = False
+            if self.step % self.snapshot_interval == 0:
+                self._write(SNAPSHOT, _SNAPSHOT.pack(*model_state(self.model)))
+            self.model.trajectory()
+            self.step += 1
+
+    def close(self):
+        """
+        Write a final snapshot and close the log.
+        """
+        with self._lock:
+            if not self._file.closed:
+                self._write(SNAPSHOT, _SNAPSHOT.pack(*model_state(self.model)))
+                self._file.close()
+
+
+class MatchLog:
+    """
+    Contents of a binary match log.
+
+    Attributes:
+        win_threshold: an int for the points the match was played to
+        serve_increment: an int for the points between serve switches
+        time_step: a float for the simulated time per physics step (s)
+        swept_collisions: a bool for whether swept collisions were enabled
+        inputs: a dict mapping step ints to lists of the (kind, kwargs)
+            tuples recorded before that step, in order, where kwargs are the
+            update_paddle arguments of a PADDLE record or None for a SERVE
+        snapshots: a dict mapping step ints to state tuples, in the order
+            returned by model_state()
+        times: a dict mapping step ints to the seconds since recording
+            started of the last record for that step
+        steps: an int number of physics steps recorded
+    """
+
+    def __init__(self, path):
+        """
+        Read a log file.
+
+        Args:
+            path: a string path to the log file
+
+        Raises:
+            ValueError: if the file isn't a match log of this version
+        """
+        with open(path, "rb") as file:
+            data = file.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not an air-pong match log")
+        (
+            magic,
+            version,
+            self.win_threshold,
+            self.serve_increment,
+            self.time_step,
+            swept_collisions,
+        ) = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not an air-pong match log")
+        self.swept_collisions = bool(swept_collisions)
+        self.inputs = {}
+        self.snapshots = {}
+        self.times = {}
+        self.steps = 0
+        offset = _HEADER.size
+        while offset + _RECORD.size <= len(data):
+            kind, step, seconds = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            if kind == PADDLE:
+                # Stop at a record cut short by the game closing mid-write.
+                if offset + _PADDLE.size > len(data):
+                    break
+                values = _PADDLE.unpack_from(data, offset)
+                offset += _PADDLE.size
+                self.inputs.setdefault(step, []).append(
+                    (
+                        PADDLE,
+                        {
+                            "paddle_normal": Vector(*values[1:4]),
+                            "paddle_position": Vector(*values[4:7]),
+                            "paddle_velocity": Vector(*values[7:10]),
+                            "player_paddle": values[0],
+                        },
+                    )
+                )
+            elif kind == SERVE:
+                self.inputs.setdefault(step, []).append((SERVE, None))
+            elif kind == SNAPSHOT:
+                if offset + _SNAPSHOT.size > len(data):
+                    break
+                self.snapshots[step] = _SNAPSHOT.unpack_from(data, offset)
+                offset += _SNAPSHOT.size
+            else:
+                raise ValueError(f"unknown record kind {kind} in {path}")
+            self.times[step] = seconds
+            self.steps = max(self.steps, step)
+
+    def create_model(self):
+        """
+        Returns a new PongModel set up the way the recorded one was.
+        """
+        return PongModel(
+            self.win_threshold,
+            self.serve_increment,
+            time_step=self.time_step,
+            swept_collisions=self.swept_collisions,
+        )
+
+
+def replay(log, model=None, on_step=None):
+    """
+    Re-drive a model with the inputs of a match log as fast as possible,
+    checking its state against every snapshot in the log.
+
+    Args:
+        log: a MatchLog to replay
+        model: an optional PongModel to drive, by default a new one set up
+            like the recorded model
+        on_step: an optional function called with the model and step after
+            each physics step, for example to render it
+
+    Returns:
+        A dict with the steps replayed, seconds taken, steps per second, the
+        final score, the winner (or False), the number of snapshots checked,
+        the first step whose state didn't match its snapshot (or None) and
+        the largest difference between a state and its snapshot.
+    """
+    if model is None:
+        model = log.create_model()
+    first_mismatch = None
+    divergence = 0.0
+    start = time.perf_counter()
+    for step in range(log.steps + 1):
+        for kind, paddle_input in log.inputs.get(step, ()):
+            if kind == PADDLE:
+                model.update_paddle(**paddle_input)
+            else:
+                model.serve()
+        if step in log.snapshots:
+            state = model_state(model)
+            difference = max(
+                abs(actual - expected)
+                for actual, expected in zip(state, log.snapshots[step])
+            )
+            divergence = max(divergence, difference)
+            if difference > 0 and first_mismatch is None:
+                first_mismatch = step
+        if step == log.steps:
+            break
+        model.trajectory()
+        model.check_point()
+        if on_step is not None:
+            on_step(model, step)
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": log.steps,
+        "seconds": elapsed,
+        "steps_per_second": (
+            log.steps / elapsed if elapsed > 0 else float("inf")
+        ),
+        "score": model.player_score,
+        "winner": model.check_win(),
+        "snapshots": len(log.snapshots),
+        "first_mismatch": first_mismatch,
+        "divergence": divergence,
+    }
+
+
+def _display_steps(model, speed):
+    """
+    Returns a function that draws the model in a pygame window after each
+    replayed step, paced to the given multiple of real time.
+
+    Args:
+        model: air pong PongModel object being replayed
+        speed: a float multiple of real time to play at, 0 for no pacing
+    """
+    # pylint: disable=import-outside-toplevel
+    import pygame
+    from air_pong_view import PongView
+
+    screen = pygame.display.set_mode((1500, 600))
+    view = PongView(screen, model)
+    view.prepare_images()
+    start = time.perf_counter()
+    next_render = 0.0
+
+    def on_step(model, step):
+        nonlocal next_render
+        sim_time = (step + 1) * model.time_step
+        if sim_time < next_render:
+            return
+        next_render = sim_time + 1 / 60
+        if speed > 0:
+            wait = sim_time / speed - (time.perf_counter() - start)
+            if wait > 0:
+                time.sleep(wait)
+        pygame.event.pump()
+        pygame.display.update(view.display())
+
+    return on_step
+
+
+def main(argv=None):
+    """
+    Replay a recorded match from the command line and print a report.
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded air-pong match."
+    )
+    parser.add_argument("log", help="match log recorded with --record")
+    parser.add_argument(
+        "--display",
+        action="store_true",
+        help="draw the replay in a window instead of running headless",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="multiple of real time to display at, 0 for no pacing",
+    )
+    args = parser.parse_args(argv)
+
+    log = MatchLog(args.log)
+    model = log.create_model()
+    on_step = _display_steps(model, args.speed) if args.display else None
+    results = replay(log, model, on_step)
+
+    recorded = log.times.get(log.steps, 0.0)
+    print(
+        f"{results['steps']} steps in {results['seconds']:.3f} s "
+        f"({results['steps_per_second']:.0f} steps/sec, recorded in "
+        f"{recorded:.1f} s)"
+    )
+    print(f"score {results['score'][0]}-{results['score'][1]}", end="")
+    if results["winner"] is not False:
+        print(f", player {results['winner']} wins")
+    else:
+        print()
+    if results["first_mismatch"] is None:
+        print(f"all {results['snapshots']} snapshots matched")
+    else:
+        print(
+            f"state diverged at step {results['first_mismatch']}, largest "
+            f"difference {results['divergence']:.3g}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Rewinding and resimulating air-pong when inputs arrive late"""
+
+from air_pong_record import PADDLE, SERVE
+from air_pong_vector import Vector
+
+
+class RollbackBuffer:
+    """
+    Wrapper around a PongModel that snapshots it before every physics step
+    into a ring of preallocated buffers, so that an input arriving for a
+    step already run can be applied where it belongs.
+
+    The buffer is passed to controllers and game loops in place of the
+    model, as MatchRecorder is. Inputs are kept by the step they apply to.
+    An input for an earlier step rewinds the model to its snapshot from
+    before that step, and every step since is run again with the inputs
+    it had.
+
+    Attributes:
+        model: the PongModel being stepped
+        ticks: an int number of steps that can be rolled back
+        tick: an int count of steps run, which is the step the next inputs
+            apply to
+        inputs: a dict mapping step ints to lists of the (kind, kwargs)
+            tuples applied before that step, as in MatchLog.inputs
+        rollbacks: an int count of rewinds for late inputs
+        resimulated: an int count of steps run again after rewinding
+    """
+
+    def __init__(self, model, ticks=64):
+        """
+        Allocate the snapshot ring.
+
+        Args:
+            model: air pong PongModel object to step
+            ticks: an int number of steps that can be rolled back
+        """
+        self.model = model
+        self.ticks = ticks
+        self.tick = 0
+        self.inputs = {}
+        self.rollbacks = 0
+        self.resimulated = 0
+        self._slots = [bytearray(model.snapshot_size) for _ in range(ticks)]
+        model.snapshot(self._slots[0])
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def oldest(self):
+        """
+        Returns the int earliest step that can still be rolled back to.
+        """
+        return max(self.tick - self.ticks + 1, 0)
+
+    def update_paddle(
+        self,
+        paddle_normal,
+        paddle_position,
+        paddle_velocity,
+        player_paddle,
+        tick=None,
+    ):
+        """
+        Apply a paddle input before a step.
+
+        Args:
+            paddle_normal: a vector for the unit normal vector to the paddle
+            paddle_position: a vector for the center of the paddle
+            paddle_velocity: a vector for the velocity of the paddle
+            player_paddle: an int (0 or 1) for the paddle to update
+            tick: an optional int step the input applies to, by default the
+                next one. Inputs for steps too old to roll back to apply to
+                the next.
+        """
+        self._add(
+            PADDLE,
+            {
+                "paddle_normal": Vector(
+                    paddle_normal.x, paddle_normal.y, paddle_normal.z
+                ),
+                "paddle_position": Vector(
+                    paddle_position.x, paddle_position.y, paddle_position.z
+                ),
+                "paddle_velocity": Vector(
+                    paddle_velocity.x, paddle_velocity.y, paddle_velocity.z
+                ),
+                "player_paddle": player_paddle,
+            },
+            tick,
+        )
+
+    def serve(self, tick=None):
+        """
+        Serve before a step.
+
+        Args:
+            tick: an optional int step to serve before, by default the next
+                one. Serves for steps too old to roll back to are before the
+                next.
+        """
+        self._add(SERVE, None, tick)
+
+    def _add(self, kind, paddle_input, tick):
+        """
+        Keep an input for its step, and apply it now if that is the next
+        step, by rolling back to its step if that has been run or once its
+        step comes if it is later.
+
+        Args:
+            kind: an int input kind, PADDLE or SERVE
+            paddle_input: a dict of update_paddle kwargs, or None to serve
+            tick: an int step the input applies to, or None for the next
+        """
+        if tick is None or tick < self.oldest():
+            tick = self.tick
+        self.inputs.setdefault(tick, []).append((kind, paddle_input))
+        if tick == self.tick:
+            self._apply(kind, paddle_input)
+        elif tick < self.tick:
+            self.rollback(tick)
+
+    def _apply(self, kind, paddle_input):
+        """
+        Pass an input to the model.
+        """
+        if kind == PADDLE:
+            self.model.update_paddle(**paddle_input)
+        else:
+            self.model.serve()
+
+    def rollback(self, tick):
+        """
+        Rewind the model to before a step and run every step since again,
+        with the inputs each step had.
+
+        Args:
+            tick: an int step from oldest() up to the current tick
+
+        Raises:
+            ValueError: if the step is too old to roll back to
+        """
+        if not self.oldest() <= tick <= self.tick:
+            raise ValueError(
+                f"can't roll back to step {tick}, only to steps "
+                f"{self.oldest()} to {self.tick}"
+            )
+        present = self.tick
+        self.rollbacks += 1
+        self.tick = tick
+        self.model.restore(self._slots[tick % self.ticks])
+        for kind, paddle_input in self.inputs.get(tick, ()):
+            self._apply(kind, paddle_input)
+        while self.tick < present:
+            self.trajectory()
+            self.resimulated += 1
+
+    def trajectory(self):
+        """
+        Run a physics step and check for a point, then snapshot the model and
+        apply any inputs already given for the next step.
+        """
+        self.model.trajectory()
+        self.model.check_point()
+        self.tick += 1
+        self.inputs.pop(self.tick - self.ticks, None)
+        self.model.snapshot(self._slots[self.tick % self.ticks])
+        for kind, paddle_input in self.inputs.get(self.tick, ()):
+            self._apply(kind, paddle_input)
+
+    def check_point(self):
+        """
+        Do nothing, since each step checks for a point as it runs.
+        """
@@ -0,0 +1,120 @@
+"""Fixed timestep game loop scheduler for the air-pong game"""
+
+import time
+
+
+class FixedStepScheduler:
+    """
+    Game loop scheduler that runs physics at a fixed timestep independent of
+    how fast input and rendering happen to be.
+
+    Real time elapsed between ticks is added to an accumulator, and as many
+    fixed physics steps are run as the accumulator holds. Hand input and
+    rendering run at their own rates, and rendering is given the fraction
+    of a physics step left in the accumulator so it can interpolate between
+    the last two physics states.
+
+    Attributes:
+        physics_step: a float for the simulated time per physics step (s)
+        input_interval: a float for the time between input updates (s)
+        render_interval: a float for the time between renders (s), 0 renders
+            on every tick
+        max_frame_time: a float capping the real time counted per tick (s) so
+            a slow frame can't queue an unbounded number of physics steps
+        accumulator: a float for the real time not yet simulated (s)
+        physics_steps: an int count of physics steps run
+        renders: an int count of renders run
+    """
+
+    def __init__(
+        self,
+        physics_step,
+        input_interval,
+        render_interval=1 / 60,
+        max_frame_time=0.25,
+        clock=time.perf_counter,
+        sleep=time.sleep,
+    ):
+        """
+        Set up the scheduler.
+
+        Args:
+            physics_step: a float for the simulated time per physics step (s)
+            input_interval: a float for the time between input updates (s)
+            render_interval: a float for the time between renders (s)
+            max_frame_time: a float capping the real time counted per tick (s)
+            clock: a function returning the current time in seconds
+            sleep: a function that waits for the given number of seconds
+        """
+        self.physics_step = physics_step
+        self.input_interval = input_interval
+        self.render_interval = render_interval
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+        self.physics_steps = 0
+        self.renders = 0
+        self._clock = clock
+        self._sleep = sleep
+        self._last_time = None
+        self._next_input = 0.0
+        self._next_render = 0.0
+
+    def tick(self, update_input, update_physics, render):
+        """
+        Run every input update, physics step and render that is due, then
+        sleep until the next one is due.
+
+        Args:
+            update_input: a function called to process input
+            update_physics: a function called to run one physics step
+            render: a function called with a float from 0 to 1 giving how far
+                real time is between the last two physics states
+        """
+        now = self._clock()
+        if self._last_time is None:
+            self._last_time = now
+            self._next_input = now
+            self._next_render = now
+        self.accumulator += min(now - self._last_time, self.max_frame_time)
+        self._last_time = now
+
+        if now >= self._next_input:
+            update_input()
+            self._next_input = max(self._next_input + self.input_interval, now)
+
+        # allow for rounding error so a step isn't left a hair short
+        while self.accumulator >= self.physics_step - 1e-9:
+            update_physics()
+            self.physics_steps += 1
+            self.accumulator = max(self.accumulator - self.physics_step, 0.0)
+
+        if now >= self._next_render:
+            render(self.accumulator / self.physics_step)
+            self.renders += 1
+            self._next_render = max(
+                self._next_render + self.render_interval, now
+            )
+
+        # sleep until something is due to cap CPU usage
+        next_physics = now + self.physics_step - self.accumulator
+        wait = (
+            min(self._next_input, self._next_render, next_physics)
+            - self._clock()
+        )
+        if wait > 0:
+            self._sleep(wait)
+
+
+def interpolate(previous, current, alpha):
+    """
+    Blend two physics states for rendering.
+
+    Args:
+        previous: a vector for the state before the last physics step
+        current: a vector for the state after the last physics step
+        alpha: a float from 0 to 1 for how far to blend towards current
+
+    Returns:
+        A vector between previous and current.
+    """
+    return previous + alpha * (current - previous)
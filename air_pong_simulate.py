@@ -0,0 +1,250 @@
+"""Runs air-pong matches headless, without a display, camera or keyboard."""
+
+import argparse
+import csv
+import random
+import time
+from air_pong_vector import Vector
+from air_pong_model import PongModel
+from air_pong_record import MatchRecorder
+
+
+class TrackingPaddle:
+    """
+    Scripted paddle that follows the height of the ball just behind its end
+    of the table.
+
+    Attributes:
+        player: an int (0 or 1) representing which paddle is controlled
+        tilt: a float for the upward tilt of the paddle normal
+        swing: a float for the speed of the paddle towards the net (m/s)
+        jitter: a float for the maximum random change in tilt per update
+        offset: a float for the distance of the paddle behind the table (m)
+    """
+
+    def __init__(self, player, tilt=0.4, swing=1.0, jitter=0.0, seed=None):
+        """
+        Set up the scripted paddle.
+
+        Args:
+            player: an int (0 or 1) representing which paddle is controlled
+            tilt: a float for the upward tilt of the paddle normal
+            swing: a float for the speed of the paddle towards the net (m/s)
+            jitter: a float for the maximum random change in tilt per update
+            seed: an optional int seeding the tilt jitter
+        """
+        self.player = player
+        self.tilt = tilt
+        self.swing = swing
+        self.jitter = jitter
+        self.offset = 0.05
+        self._random = random.Random(seed)
+
+    def update(self, model, step):  # pylint: disable=unused-argument
+        """
+        Move the paddle to the height of the ball and pass it to the model.
+
+        Args:
+            model: air pong PongModel object
+            step: an int for the current simulation step
+        """
+        direction = 1 if self.player == 0 else -1
+        if self.player == 0:
+            x_position = model.table_front - self.offset
+        else:
+            x_position = model.table_front + model.table_dim.x + self.offset
+        tilt = self.tilt + self._random.uniform(-self.jitter, self.jitter)
+        model.update_paddle(
+            paddle_normal=Vector(direction, tilt, 0).hat,
+            paddle_position=Vector(x_position, model.ball_position.y, 0),
+            paddle_velocity=Vector(direction * self.swing, 0, 0),
+            player_paddle=self.player,
+        )
+
+
+class RecordedPaddles:
+    """
+    Paddle inputs replayed from a CSV file.
+
+    The file needs a header row with the columns step, player, normal_x,
+    normal_y, normal_z, position_x, position_y, position_z, velocity_x,
+    velocity_y and velocity_z. Each row is passed to the model on its step.
+
+    Attributes:
+        inputs: a dict mapping step ints to lists of paddle update kwargs
+    """
+
+    def __init__(self, path):
+        """
+        Load the recorded paddle inputs.
+
+        Args:
+            path: a string path to the CSV file of paddle inputs
+        """
+        self.inputs = {}
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                self.inputs.setdefault(int(row["step"]), []).append(
+                    {
+                        "paddle_normal": _row_vector(row, "normal"),
+                        "paddle_position": _row_vector(row, "position"),
+                        "paddle_velocity": _row_vector(row, "velocity"),
+                        "player_paddle": int(row["player"]),
+                    }
+                )
+
+    def update(self, model, step):
+        """
+        Pass every paddle input recorded for the given step to the model.
+
+        Args:
+            model: air pong PongModel object
+            step: an int for the current simulation step
+        """
+        for paddle_input in self.inputs.get(step, []):
+            model.update_paddle(**paddle_input)
+
+
+def _row_vector(row, name):
+    """
+    Build a vector from the x, y and z columns of a CSV row.
+
+    Args:
+        row: a dict of CSV column names to strings
+        name: a string prefix of the columns to read
+    """
+    return Vector(
+        float(row[f"{name}_x"]),
+        float(row[f"{name}_y"]),
+        float(row[f"{name}_z"]),
+    )
+
+
+def simulate(model, policies, max_points=None, max_rally_steps=10000):
+    """
+    Run the model at full speed, serving after every point until a player
+    wins or max_points have been played.
+
+    Args:
+        model: air pong PongModel object
+        policies: a list of objects with an update(model, step) method that
+            set the paddles before each physics step
+        max_points: an optional int limit on the number of points to play
+        max_rally_steps: an int limit on the steps in a single rally, after
+            which the rally is abandoned without a point
+
+    Returns:
+        A dict with the steps and seconds simulated, steps per second, the
+        final score, the winner (or False) and a list of rallies, each a dict
+        of the rally's steps and the player (1 or 2) that won it, or None if
+        the rally was abandoned.
+    """
+    rallies = []
+    step = 0
+    start = time.perf_counter()
+    while model.check_win() is False and (
+        max_points is None or len(rallies) < max_points
+    ):
+        score = model.player_score
+        model.serve()
+        rally_steps = 0
+        while model.player_score == score:
+            if rally_steps == max_rally_steps:
+                break
+            for policy in policies:
+                policy.update(model, step)
+            model.trajectory()
+            model.check_point()
+            step += 1
+            rally_steps += 1
+        winner = None
+        if model.player_score[0] > score[0]:
+            winner = 1
+        elif model.player_score[1] > score[1]:
+            winner = 2
+        rallies.append({"steps": rally_steps, "winner": winner})
+    elapsed = time.perf_counter() - start
+    return {
+        "steps": step,
+        "seconds": elapsed,
+        "steps_per_second": step / elapsed if elapsed > 0 else float("inf"),
+        "score": model.player_score,
+        "winner": model.check_win(),
+        "rallies": rallies,
+    }
+
+
+def main(argv=None):
+    """
+    Run a headless simulation from the command line and print a report.
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    parser = argparse.ArgumentParser(
+        description="Run the air-pong model without a display or camera."
+    )
+    parser.add_argument(
+        "--points", type=int, default=None, help="number of points to play"
+    )
+    parser.add_argument(
+        "--win-threshold", type=int, default=11, help="points to play to"
+    )
+    parser.add_argument(
+        "--time-step",
+        type=float,
+        default=0.01,
+        help="simulated seconds per physics step",
+    )
+    parser.add_argument(
+        "--inputs", help="CSV file of recorded paddle inputs to replay"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.2,
+        help="random tilt jitter of the scripted paddles",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="seed for the scripted paddles"
+    )
+    parser.add_argument(
+        "--record", help="binary match log to record the simulation to"
+    )
+    args = parser.parse_args(argv)
+
+    model = PongModel(args.win_threshold, 2, time_step=args.time_step)
+    if args.inputs is not None:
+        policies = [RecordedPaddles(args.inputs)]
+    else:
+        seed = random.Random(args.seed)
+        policies = [
+            TrackingPaddle(player, jitter=args.jitter, seed=seed.random())
+            for player in (0, 1)
+        ]
+    if args.record is not None:
+        with MatchRecorder(model, args.record) as recorder:
+            results = simulate(recorder, policies, max_points=args.points)
+    else:
+        results = simulate(model, policies, max_points=args.points)
+
+    rally_steps = [rally["steps"] for rally in results["rallies"]]
+    print(
+        f"{results['steps']} steps in {results['seconds']:.3f} s "
+        f"({results['steps_per_second']:.0f} steps/sec)"
+    )
+    print(
+        f"{len(rally_steps)} points, mean rally "
+        f"{sum(rally_steps) / max(len(rally_steps), 1):.1f} steps, "
+        f"longest {max(rally_steps, default=0)} steps"
+    )
+    print(f"score {results['score'][0]}-{results['score'][1]}", end="")
+    if results["winner"] is not False:
+        print(f", player {results['winner']} wins")
+    else:
+        print()
+    return results
+
+
+if __name__ == "__main__":
+    main()
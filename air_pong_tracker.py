@@ -0,0 +1,135 @@
+"""Paddle tracking from timestamped hand detections for air-pong"""
+
+import numpy as np
+
+
+class PaddleTracker:
+    """
+    Constant velocity Kalman filter over a player's detected paddle
+    positions, with forward prediction to cover detection latency.
+
+    Detections are weighed against where the paddle was expected to be,
+    given the time since the last one, so detection jitter is smoothed while
+    a swing is followed closely, even when detections arrive unevenly. The
+    filtered velocity is used both as the paddle velocity and to extrapolate
+    the position from the detected frame's timestamp to the time the paddle
+    is used.
+
+    The x, y and z axes are filtered separately, but with the same noise and
+    the same detection times they share one covariance.
+
+    Attributes:
+        acceleration: a float for the typical hand acceleration (per s^2),
+            higher follows changes of direction faster but smooths less
+        noise: a float for the typical detection error, in position units
+        max_prediction: a float for the longest time to extrapolate over (s)
+        reset_after: a float gap between detections (s) after which the hand
+            is taken to have been lost and tracking starts over
+        position: a numpy array of the filtered position, or None before the
+            first detection
+        velocity: a numpy array of the filtered velocity (per s)
+        timestamp: a float time of the last detection (s)
+    """
+
+    def __init__(
+        self, acceleration=10.0, noise=0.01, max_prediction=0.1, reset_after=0.5
+    ):
+        """
+        Set up a tracker with no detections.
+
+        Args:
+            acceleration: a float typical hand acceleration (per s^2)
+            noise: a float typical detection error
+            max_prediction: a float longest time to extrapolate over (s)
+            reset_after: a float gap between detections (s) to start over after
+        """
+        self.acceleration = acceleration
+        self.noise = noise
+        self.max_prediction = max_prediction
+        self.reset_after = reset_after
+        self.position = None
+        self.velocity = np.zeros(3)
+        self.timestamp = None
+        self._covariance = None
+
+    def update(self, position, timestamp):
+        """
+        Filter in a detected position.
+
+        Detections with a timestamp that isn't newer than the last one, such
+        as the same result read twice, are ignored.
+
+        Args:
+            position: a sequence of 3 floats for the detected position
+            timestamp: a float time the position was detected at (s)
+        """
+        position = np.asarray(position, dtype=float)
+        if (
+            self.position is None
+            or timestamp - self.timestamp > self.reset_after
+        ):
+            self.position = position
+            self.velocity = np.zeros(3)
+            self.timestamp = timestamp
+            # the velocity is unknown, so trust the first detections of it
+            self._covariance = np.diag([self.noise**2, self.acceleration**2])
+            return
+        elapsed = timestamp - self.timestamp
+        if elapsed <= 0:
+            return
+        # Predict forward, with the velocity drifting by an unknown
+        # acceleration over the elapsed time.
+        transition = np.array([[1.0, elapsed], [0.0, 1.0]])
+        drift = np.array([[elapsed**2 / 2], [elapsed]])
+        covariance = (
+            transition @ self._covariance @ transition.T
+            + drift @ drift.T * self.acceleration**2
+        )
+        predicted = self.position + self.velocity * elapsed
+        # Correct by the detection, only the position of which is measured.
+        gain = covariance[:, 0] / (covariance[0, 0] + self.noise**2)
+        innovation = position - predicted
+        self.position = predicted + gain[0] * innovation
+        self.velocity = self.velocity + gain[1] * innovation
+        self._covariance = covariance - np.outer(gain, covariance[0])
+        self.timestamp = timestamp
+
+    def predict(self, timestamp):
+        """
+        Returns the filtered position extrapolated to a time, and the
+        velocity, as numpy arrays.
+
+        Args:
+            timestamp: a float time to predict the position at (s)
+        """
+        ahead = min(max(timestamp - self.timestamp, 0.0), self.max_prediction)
+        return self.position + self.velocity * ahead, self.velocity.copy()
+
+
+def prediction_error(times, detections, truth, latency, tracker=None):
+    """
+    Returns the root mean square distance between where a tracker predicts
+    a hand to be and where it is, a latency after each detection.
+
+    Args:
+        times: a sequence of float detection timestamps (s)
+        detections: a sequence of detected positions, each 3 floats
+        truth: a function returning the true position at a time as 3 floats
+        latency: a float time between a frame and using its detection (s)
+        tracker: a PaddleTracker, or None to score using the latest
+            detection as it is
+
+    Returns:
+        A float for the root mean square error, in the detections' units.
+    """
+    errors = []
+    for timestamp, detection in zip(times, detections):
+        if tracker is None:
+            predicted = np.asarray(detection, dtype=float)
+        else:
+            tracker.update(detection, timestamp)
+            predicted, _ = tracker.predict(timestamp + latency)
+        errors.append(
+            np.sum((predicted - np.asarray(truth(timestamp + latency))) ** 2)
+        )
+    return float(np.sqrt(np.mean(errors)))
@@ -0,0 +1,212 @@
+"""Lightweight 3D vector used by the air-pong physics model"""
+
+from math import acos, cos, sin, sqrt
+
+
+class Vector:
+    """
+    Three float components stored in slots, with the parts of the vpython
+    vector interface the game uses.
+
+    The model keeps its state in Vector objects so it can be imported and
+    stepped without loading vpython. Arithmetic operators return new vectors
+    like vpython's do, while set(), add_scaled() and the out arguments of the
+    model's force methods update a vector in place so a physics step doesn't
+    need to allocate. Any object with x, y and z attributes, including a
+    vpython vector, can be used as the other operand, and the model copies
+    vpython vectors passed to it into Vectors. The reverse doesn't hold:
+    vpython's own methods and comparisons, such as rotate, dot, cross and ==,
+    only work with vpython vectors, so convert a Vector with
+    vector(v.x, v.y, v.z) before handing it to one.
+
+    Attributes:
+        x: a float for the x component
+        y: a float for the y component
+        z: a float for the z component
+    """
+
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        """
+        Create a vector.
+
+        Args:
+            x: a number for the x component
+            y: a number for the y component
+            z: a number for the z component
+        """
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def copy(self):
+        """
+        Returns a new vector with the same components.
+        """
+        return Vector(self.x, self.y, self.z)
+
+    def set(self, x, y, z):
+        """
+        Overwrite the components in place.
+
+        Args:
+            x: a float for the x component
+            y: a float for the y component
+            z: a float for the z component
+
+        Returns:
+            This vector.
+        """
+        self.x = x
+        self.y = y
+        self.z = z
+        return self
+
+    def add_scaled(self, other, scale):
+        """
+        Add a multiple of another vector in place.
+
+        Args:
+            other: a vector to add
+            scale: a float to multiply other by
+
+        Returns:
+            This vector.
+        """
+        self.x += scale * other.x
+        self.y += scale * other.y
+        self.z += scale * other.z
+        return self
+
+    def __repr__(self):
+        return f"Vector({self.x:.6g}, {self.y:.6g}, {self.z:.6g})"
+
+    def __eq__(self, other):
+        try:
+            return self.x == other.x and self.y == other.y and self.z == other.z
+        except AttributeError:
+            return NotImplemented
+
+    __hash__ = None
+    # Make numpy scalars defer to the reflected operators below.
+    __array_ufunc__ = None
+
+    def __neg__(self):
+        return Vector(-self.x, -self.y, -self.z)
+
+    def __pos__(self):
+        return self
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __rsub__(self, other):
+        return Vector(other.x - self.x, other.y - self.y, other.z - self.z)
+
+    def __mul__(self, other):
+        return Vector(self.x * other, self.y * other, self.z * other)
+
+    def __rmul__(self, other):
+        return Vector(other * self.x, other * self.y, other * self.z)
+
+    def __truediv__(self, other):
+        return Vector(self.x / other, self.y / other, self.z / other)
+
+    @property
+    def mag(self):
+        return sqrt(self.x**2 + self.y**2 + self.z**2)
+
+    @property
+    def mag2(self):
+        return self.x**2 + self.y**2 + self.z**2
+
+    @property
+    def hat(self):
+        return Vector(*_unit_components(self))
+
+    def norm(self):
+        """
+        Returns the unit vector in the same direction, or a zero vector.
+        """
+        return self.hat
+
+    def dot(self, other):
+        """
+        Returns the float dot product with another vector.
+        """
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other):
+        """
+        Returns the cross product with another vector.
+        """
+        return Vector(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x,
+        )
+
+    def proj(self, other):
+        """
+        Returns the projection of this vector onto another vector.
+        """
+        direction = Vector(*_unit_components(other))
+        return self.dot(direction) * direction
+
+    def diff_angle(self, other):
+        """
+        Returns the float angle between this and another vector (radians).
+        """
+        cosine = Vector(*_unit_components(self)).dot(
+            Vector(*_unit_components(other))
+        )
+        return acos(min(max(cosine, -1.0), 1.0))
+
+    def rotate(self, angle=0.0, axis=None):
+        """
+        Returns this vector rotated about an axis.
+
+        Args:
+            angle: a float angle to rotate by (radians)
+            axis: a vector for the axis of rotation, which doesn't need to be
+                normalized, defaulting to the z axis. A zero axis scales the
+                vector by cos(angle), as vpython does.
+        """
+        if axis is None:
+            u_x, u_y, u_z = 0.0, 0.0, 1.0
+        else:
+            u_x, u_y, u_z = _unit_components(axis)
+        c = cos(angle)
+        s = sin(angle)
+        t = 1.0 - c
+        return Vector(
+            (t * u_x * u_x + c) * self.x
+            + (t * u_x * u_y - u_z * s) * self.y
+            + (t * u_x * u_z + u_y * s) * self.z,
+            (t * u_x * u_y + u_z * s) * self.x
+            + (t * u_y * u_y + c) * self.y
+            + (t * u_y * u_z - u_x * s) * self.z,
+            (t * u_x * u_z - u_y * s) * self.x
+            + (t * u_y * u_z + u_x * s) * self.y
+            + (t * u_z * u_z + c) * self.z,
+        )
+
+
+def _unit_components(vector):
+    """
+    Returns a tuple of the components of the unit vector in the direction of
+    a vector, or zeros for a zero vector.
+
+    Args:
+        vector: an object with x, y and z attributes
+    """
+    mag = sqrt(vector.x**2 + vector.y**2 + vector.z**2)
+    if mag > 0:
+        return (vector.x / mag, vector.y / mag, vector.z / mag)
+    return (0.0, 0.0, 0.0)
@@ -1,6 +1,7 @@
 """View module for the air-pong game"""
 
 import pygame
+from air_pong_assets import AssetManager
 
 
 class PongView:
@@ -16,17 +17,18 @@ class PongView:
         screen (pygame.Surface): pygame screen to display the game
         ping_pong_table (pygame.Surface): pygame surface containing the image of the ping pong table
         scoreboard (pygame.Surface): pygame surface containing the image of the scoreboard
-        win_screen (pygame.Surface): pygame surface containing the image of the win screen
         score_font (pygame.font.Font): font and size for the score
+        assets (AssetManager): cache of the loaded images and fonts
     """
 
-    def __init__(self, screen, pong_instance):
+    def __init__(self, screen, pong_instance, assets=None):
         """Initialize the PongView class
         Args:
             screen (pygame.Surface): pygame screen to display the game
             pong_instance (PongModel): instance of the PongModel class
+            assets (AssetManager): images and fonts to draw with, by default
+                a new AssetManager, which loads them when first needed
         """
-        pygame.font.init()  # Initialize pygame fonts
         self.pong_instance = pong_instance
         self.background_colour = (255, 255, 255)  # white background
         self.unit_scaling = 0  # conversion between model and screen, calculated in prepare_images
@@ -36,10 +38,20 @@ class PongView:
         self.y_shift = 2  # 2 is the height of the screen
         self.colour = (0, 0, 0)  # black color
         self.screen = screen  # 5 meter by 2 meter screen
-        self.ping_pong_table = pygame.image.load("models/ping_pong_table.png")
-        self.scoreboard = pygame.image.load("models/scoreboard.png")
-        self.win_screen = pygame.image.load("models/win_screen.png")
-        self.score_font = pygame.font.Font("models/monofonto_rg.otf", 0)
+        self.assets = assets if assets is not None else AssetManager()
+        # images and font at the screen's scale, loaded in prepare_images
+        self.ping_pong_table = None
+        self.scoreboard = None
+        self.score_font = None
+        # cached layers and score text, built on the first call to display
+        self._static_layer = None
+        self._background = None
+        self._static_size = None
+        self._static_score = None
+        self._score_text = {}
+        self._hud_text = {}
+        self._drawn_rects = []
+        self._full_redraw = True
 
     def prepare_images(self):
         """prepare images for the game
@@ -49,8 +61,8 @@ class PongView:
         self.unit_scaling = (
             self.screen.get_width() / 5
         )  # 5 is the width of the table in meters
-        self.ping_pong_table = pygame.transform.scale(
-            self.ping_pong_table,
+        self.ping_pong_table = self.assets.image(
+            "ping_pong_table.png",
             (
                 self.unit_scaling
                 * self.pong_instance.table_dim.x,  # length of the table in meters
@@ -58,96 +70,80 @@ class PongView:
                 * self.pong_instance.table_dim.z,  # width of the table in meters
             ),
         )
-        self.scoreboard = pygame.transform.scale(
-            self.scoreboard,
+        self.scoreboard = self.assets.image(
+            "scoreboard.png",
             (
                 self.unit_scaling * self.pong_instance.table_dim.x,
                 self.unit_scaling
                 * 0.1875,  # height of the scoreboard in meters
             ),
         )
-        self.score_font = pygame.font.Font(
-            "models/monofonto_rg.otf",
+        self.score_font = self.assets.font(
+            "monofonto_rg.otf",
             int(self.unit_scaling * 0.18),  # font size
         )
-        self.win_screen = pygame.transform.scale(
-            self.win_screen,
-            (
-                self.unit_scaling * 5,
-                self.unit_scaling * 2,
-            ),  # win screen fills the entire screen
-        )
+        # the win screen isn't needed until the end, so load it meanwhile
+        self.assets.preload("win_screen.png", self._win_screen_size())
+        # the cached layers were drawn at the old scale and font size
+        self._static_layer = None
+        self._score_text = {}
+        self._hud_text = {}
 
-    def display(self):
-        """display the game on the screen
+    def _win_screen_size(self):
+        """size of the win screen, which fills the entire screen
+        Returns:
+            tuple: width and height of the win screen in pixels
+        """
+        return (self.unit_scaling * 5, self.unit_scaling * 2)
+
+    def _score_surface(self, score):
+        """render a score, reusing the surface from the last time it was shown
         Args:
-            pong_instance (PongModel): instance of the PongModel class
+            score (int): score to render
+        Returns:
+            pygame.Surface: the rendered score text
         """
-        self.screen.fill(
-            (self.background_colour)
-        )  # fill the screen with white background
-        # Ball
-        spin_color = 17 * min(
-            self.pong_instance.ball_spin.mag, 15
-        )  # spin color, the ball is white at no spin and black at max spin
-        pygame.draw.circle(
-            self.screen,
-            (spin_color, spin_color, spin_color),
-            (
-                self.unit_scaling * self.pong_instance.ball_position.x,
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.ball_position.y),
-            ),
-            self.unit_scaling * self.pong_instance.ball_radius,
-            width=0,
-        )
-        # Ball outline
-        pygame.draw.circle(
-            self.screen,
-            self.colour,
-            (
-                self.unit_scaling * self.pong_instance.ball_position.x,
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.ball_position.y),
-            ),
-            self.unit_scaling * self.pong_instance.ball_radius,
-            width=1,
-        )
+        if score not in self._score_text:
+            self._score_text[score] = self.score_font.render(
+                f"{score}", True, (255, 255, 255)
+            )
+        return self._score_text[score]
 
-        # paddle
-        pygame.draw.line(
-            self.screen,
-            (255, 0, 0),
-            (
-                self.unit_scaling * self.pong_instance.paddle_edges[0][1][0],
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.paddle_edges[0][1][1]),
-            ),
-            (
-                self.unit_scaling * self.pong_instance.paddle_edges[0][0][0],
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.paddle_edges[0][0][1]),
-            ),
-            width=int(self.unit_scaling * self.pong_instance.paddle_dim.z),
-        )
-        # paddle 2
-        pygame.draw.line(
-            self.screen,
-            (0, 0, 255),
-            (
-                self.unit_scaling * self.pong_instance.paddle_edges[1][1][0],
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.paddle_edges[1][1][1]),
-            ),
-            (
-                self.unit_scaling * self.pong_instance.paddle_edges[1][0][0],
-                self.unit_scaling
-                * (self.y_shift - self.pong_instance.paddle_edges[1][0][1]),
-            ),
-            width=int(self.unit_scaling * self.pong_instance.paddle_dim.z),
+    def _hud_surface(self, line):
+        """render a line of heads up display text, reusing recent renders
+        Args:
+            line (str): text to render
+        Returns:
+            pygame.Surface: the rendered text
+        """
+        if line not in self._hud_text:
+            # the text changes a few times a second, so keep the cache small
+            if len(self._hud_text) > 64:
+                self._hud_text = {}
+            font = self.assets.font(
+                "monofonto_rg.otf",
+                max(8, int(self.unit_scaling * 0.05)),  # font size
+            )
+            self._hud_text[line] = font.render(line, True, self.colour)
+        return self._hud_text[line]
+
+    def _build_static_layer(self):
+        """compose the table, net and scoreboard into cached layers
+
+        The static layer is transparent apart from the table, net and
+        scoreboard, and is drawn over the ball and paddles so they pass
+        behind the table as before. The background is the static layer
+        over the background colour, used to erase the ball and paddles.
+        """
+        self._static_size = self.screen.get_size()
+        self._static_score = self.pong_instance.player_score
+        layer = self.assets.convert(
+            pygame.Surface(
+                self._static_size, pygame.SRCALPHA  # pylint: disable=no-member
+            )
         )
         # table
-        self.screen.blit(
+        layer.blit(
             self.ping_pong_table,
             (
                 self.unit_scaling * self.x_shift,
@@ -157,7 +153,7 @@ class PongView:
         )
         # table net
         pygame.draw.rect(
-            self.screen,
+            layer,
             self.colour,
             (
                 self.unit_scaling
@@ -173,17 +169,14 @@ class PongView:
             ),
         )
         # scoreboard
-        self.screen.blit(
+        layer.blit(
             self.scoreboard,
             (
                 self.unit_scaling * self.x_shift,
                 0,
             ),
         )
-        pygame.font.init()
-        left_score = self.score_font.render(
-            f"{self.pong_instance.player_score[0]}", True, (255, 255, 255)
-        )
+        left_score = self._score_surface(self._static_score[0])
         left_score_rect = left_score.get_rect()
         left_score_rect.topleft = (
             self.unit_scaling
@@ -192,10 +185,7 @@ class PongView:
                 self.unit_scaling * 0.017
             ),  # 0.017 is the space above the number in the font
         )
-        self.screen.blit(left_score, left_score_rect)
-        right_score = self.score_font.render(
-            f"{self.pong_instance.player_score[1]}", True, (255, 255, 255)
-        )
+        right_score = self._score_surface(self._static_score[1])
         right_score_rect = left_score.get_rect()
         right_score_rect.topright = (
             self.unit_scaling
@@ -206,20 +196,134 @@ class PongView:
                 self.unit_scaling * 0.017
             ),  # 0.017 is the space above the number in the font
         )
-        self.screen.blit(left_score, left_score_rect)
-        self.screen.blit(right_score, right_score_rect)
+        layer.blit(left_score, left_score_rect)
+        layer.blit(right_score, right_score_rect)
+        self._static_layer = layer
+        self._background = self.screen.copy()
+        self._background.fill(self.background_colour)
+        self._background.blit(layer, (0, 0))
+
+    def invalidate(self):
+        """redraw the whole screen on the next call to display, for when
+        something else has drawn over it
+        """
+        self._full_redraw = True
+
+    def display(self, ball_position=None, hud=None, preview=None):
+        """display the game on the screen
+
+        Only the areas the ball and paddles covered in the last frame or
+        cover in this one are redrawn, from the cached background, unless
+        the screen size or score has changed or invalidate was called.
+
+        Args:
+            ball_position (vector): position to draw the ball at, defaults to
+                the model's ball position
+            hud (list): strings to show in the top left corner, over the game
+            preview (numpy.ndarray): a contiguous uint8 BGR camera frame of
+                shape (height, width, 3) to show in the top right corner,
+                wrapped by pygame without being copied
+        Returns:
+            list: pygame.Rect areas of the screen that changed, to pass to
+                pygame.display.update
+        """
+        if ball_position is None:
+            ball_position = self.pong_instance.ball_position
+        if (
+            self._static_layer is None
+            or self._static_size != self.screen.get_size()
+            or self._static_score != self.pong_instance.player_score
+        ):
+            self._build_static_layer()
+            self._full_redraw = True
+        if self._full_redraw:
+            self.screen.blit(self._background, (0, 0))
+        else:
+            # erase the ball and paddles where they were last frame
+            for rect in self._drawn_rects:
+                self.screen.blit(self._background, rect, rect)
+        # Ball
+        spin_color = 17 * min(
+            self.pong_instance.ball_spin.mag, 15
+        )  # spin color, the ball is white at no spin and black at max spin
+        ball_center = (
+            self.unit_scaling * ball_position.x,
+            self.unit_scaling * (self.y_shift - ball_position.y),
+        )
+        ball_radius = self.unit_scaling * self.pong_instance.ball_radius
+        drawn_rects = [
+            pygame.draw.circle(
+                self.screen,
+                (spin_color, spin_color, spin_color),
+                ball_center,
+                ball_radius,
+                width=0,
+            ),
+            # Ball outline
+            pygame.draw.circle(
+                self.screen, self.colour, ball_center, ball_radius, width=1
+            ),
+        ]
+        # paddles
+        paddle_edges = self.pong_instance.paddle_edges
+        paddle_width = int(self.unit_scaling * self.pong_instance.paddle_dim.z)
+        for edges, paddle_colour in zip(
+            paddle_edges, ((255, 0, 0), (0, 0, 255))
+        ):
+            drawn_rects.append(
+                pygame.draw.line(
+                    self.screen,
+                    paddle_colour,
+                    (
+                        self.unit_scaling * edges[1][0],
+                        self.unit_scaling * (self.y_shift - edges[1][1]),
+                    ),
+                    (
+                        self.unit_scaling * edges[0][0],
+                        self.unit_scaling * (self.y_shift - edges[0][1]),
+                    ),
+                    width=paddle_width,
+                )
+            )
+        # table, net and scoreboard over the ball and paddles
+        for rect in drawn_rects:
+            self.screen.blit(self._static_layer, rect, rect)
+        # heads up display over everything, erased with the ball and paddles
+        top = 0
+        for line in hud or ():
+            text = self._hud_surface(line)
+            drawn_rects.append(self.screen.blit(text, (5, top)))
+            top += text.get_height()
+        if preview is not None:
+            surface = pygame.image.frombuffer(
+                preview, (preview.shape[1], preview.shape[0]), "BGR"
+            )
+            drawn_rects.append(
+                self.screen.blit(
+                    surface,
+                    surface.get_rect(topright=self.screen.get_rect().topright),
+                )
+            )
+        if self._full_redraw:
+            self._full_redraw = False
+            changed_rects = [self.screen.get_rect()]
+        else:
+            changed_rects = self._drawn_rects + drawn_rects
+        self._drawn_rects = drawn_rects
+        return changed_rects
 
     def win(self, winner):
         """display the win screen
         Args:
             winner (int): 1 for left player, 2 for right player
         """
-        if winner == 1:
+        if winner in (1, 2):
+            # the win screen shows the left player winning, mirrored for the
+            # right player
             self.screen.blit(
-                self.win_screen, (0, 0)
-            )  # display the win screen, left player wins
-        if winner == 2:
-
-            self.screen.blit(
-                pygame.transform.flip(self.win_screen, 1, 0), (0, 0)
-            )  # flip and display the win screen, right player wins
+                self.assets.image(
+                    "win_screen.png", self._win_screen_size(), flip=winner == 2
+                ),
+                (0, 0),
+            )
+        self.invalidate()
@@ -0,0 +1,441 @@
+"""Camera capture and hand detection in a separate process for air-pong"""
+
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from air_pong_camera import InferenceInput, configure_capture, open_capture
+from air_pong_capture import FrameGrabber
+from air_pong_landmarks import MAX_HANDS, RESULT_DTYPE, pack_result
+
+
+class ResultRing:
+    """
+    Single producer, single consumer queue of detection results in shared
+    memory, passed between processes without locks.
+
+    The producer marks a slot as being written, fills it, stamps it with its
+    sequence number and then publishes the new head. The consumer copies the
+    slots it hasn't read and keeps only those still stamped with the sequence
+    it expected once copied, so a slot overwritten while being read is
+    skipped rather than returned torn. When the consumer falls more than a
+    ring behind, the oldest results are lost.
+
+    Attributes:
+        slots: an int number of results held
+        name: a string name of the shared memory block
+        lost: an int count of results overwritten before being read
+    """
+
+    def __init__(self, slots=8, name=None):
+        """
+        Create the ring, or attach to one created in another process.
+
+        Args:
+            slots: an int number of results held
+            name: an optional string name of an existing ring's shared
+                memory, by default a new ring is created
+        """
+        self.slots = slots
+        size = 8 + slots * RESULT_DTYPE.itemsize
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self.lost = 0
+        self._head = np.ndarray((1,), dtype=np.int64, buffer=self._shm.buf)
+        self._records = np.ndarray(
+            (slots,), dtype=RESULT_DTYPE, buffer=self._shm.buf, offset=8
+        )
+        if name is None:
+            self._head[0] = 0
+            self._records["sequence"] = -1
+        self._tail = 0
+
+    def put(self, detection_result, timestamp_ms, times):
+        """
+        Add a result, overwriting the oldest if the ring is full.
+
+        Args:
+            detection_result: a mp HandLandmarkerResult object
+            timestamp_ms: an int timestamp (ms) the frame was detected with
+            times: a (capture, submit, complete) tuple of float perf_counter
+                times for the frame (s)
+        """
+        sequence = int(self._head[0])
+        record = self._records[sequence % self.slots]
+        record["sequence"] = -1
+        record["timestamp_ms"] = timestamp_ms
+        (
+            record["capture_time"],
+            record["submit_time"],
+            record["complete_time"],
+        ) = times
+        pack_result(detection_result, record)
+        record["sequence"] = sequence
+        self._head[0] = sequence + 1
+
+    def get(self):
+        """
+        Returns a numpy array of RESULT_DTYPE records added since the last
+        call, oldest first.
+        """
+        head = int(self._head[0])
+        start = max(self._tail, head - self.slots)
+        self.lost += start - self._tail
+        indices = np.arange(start, head)
+        records = self._records[indices % self.slots]
+        intact = (records["sequence"] == indices) & (
+            self._records["sequence"][indices % self.slots] == indices
+        )
+        self.lost += int(np.count_nonzero(~intact))
+        self._tail = head
+        return records[intact]
+
+    def close(self, unlink=False):
+        """
+        Detach from the shared memory.
+
+        Args:
+            unlink: a bool flag for also freeing it, done by its creator
+        """
+        self._head = self._records = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class FrameRing:
+    """
+    Ring of camera frames in shared memory, written by one process and read
+    by another without locks.
+
+    Each slot is stamped with the number of the frame in it, and the number
+    of the newest frame is published once it is written. A reader checks
+    the stamp with intact() after using a frame, as the writer only comes
+    back around to it after slots - 1 newer frames.
+
+    Attributes:
+        shape: a tuple for the shape of each frame
+        slots: an int number of frames held
+        name: a string name of the shared memory block
+    """
+
+    def __init__(self, shape, slots=3, name=None):
+        """
+        Create the ring, or attach to one created in another process.
+
+        Args:
+            shape: a tuple for the shape of each uint8 frame
+            slots: an int number of frames held
+            name: an optional string name of an existing ring's shared
+                memory, by default a new ring is created
+        """
+        self.shape = tuple(shape)
+        self.slots = slots
+        header = 8 * (slots + 1)
+        size = header + slots * int(np.prod(self.shape))
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.name = self._shm.name
+        self._stamps = np.ndarray(
+            (slots + 1,), dtype=np.int64, buffer=self._shm.buf
+        )
+        self._frames = np.ndarray(
+            (slots,) + self.shape,
+            dtype=np.uint8,
+            buffer=self._shm.buf,
+            offset=header,
+        )
+        if name is None:
+            self._stamps[:] = -1
+        self._written = int(self._stamps[slots]) + 1
+        self._read = -1
+
+    def put(self, frame):
+        """
+        Copy a frame into the next slot and publish it.
+
+        Args:
+            frame: a numpy uint8 array of the ring's frame shape
+        """
+        slot = self._written % self.slots
+        self._stamps[slot] = -1
+        np.copyto(self._frames[slot], frame)
+        self._stamps[slot] = self._written
+        self._stamps[self.slots] = self._written
+        self._written += 1
+
+    def latest(self):
+        """
+        Returns a (number, frame) tuple of the newest frame, a view into
+        shared memory, or None if no new frame has been published since the
+        last call.
+        """
+        number = int(self._stamps[self.slots])
+        if number < 0 or number == self._read:
+            return None
+        self._read = number
+        return number, self._frames[number % self.slots]
+
+    def intact(self, number):
+        """
+        Returns True if a frame returned by latest() hasn't been overwritten.
+
+        Args:
+            number: an int frame number returned by latest()
+        """
+        return self._stamps[number % self.slots] == number
+
+    def close(self, unlink=False):
+        """
+        Detach from the shared memory.
+
+        Args:
+            unlink: a bool flag for also freeing it, done by its creator
+        """
+        self._stamps = self._frames = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class LandmarkDetector:
+    """
+    Synchronous mediapipe hand landmarker, for detecting in a process of its
+    own where waiting on a result doesn't hold up the game.
+    """
+
+    def __init__(self, model_path="hand_landmarker.task"):
+        """
+        Load the hand landmarker model in video mode.
+
+        Args:
+            model_path: a string path to the hand landmarker .task file
+        """
+        # pylint: disable=import-outside-toplevel
+        import mediapipe as mp
+
+        self._mp = mp
+        options = mp.tasks.vision.HandLandmarkerOptions(
+            base_options=mp.tasks.BaseOptions(model_asset_path=model_path),
+            running_mode=mp.tasks.vision.RunningMode.VIDEO,
+            num_hands=MAX_HANDS,
+            min_hand_detection_confidence=0.1,
+            min_hand_presence_confidence=0.1,
+            min_tracking_confidence=0.1,
+        )
+        self._landmarker = mp.tasks.vision.HandLandmarker.create_from_options(
+            options
+        )
+
+    def __call__(self, image, timestamp_ms):
+        """
+        Returns the mp HandLandmarkerResult for an image.
+
+        Args:
+            image: a numpy RGB image array
+            timestamp_ms: an int timestamp (ms), increasing between calls
+        """
+        return self._landmarker.detect_for_video(
+            self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=image),
+            timestamp_ms,
+        )
+
+
+def _run_worker(connection, stop, settings):
+    """
+    Capture frames and detect hands in them until stopped, publishing frames
+    and results through shared memory. Runs in the worker process.
+
+    Args:
+        connection: a multiprocessing Connection to the game process, used
+            only while starting up
+        stop: a multiprocessing Event set to stop the worker
+        settings: a dict of the InferenceWorker's settings
+    """
+    grabber = FrameGrabber(settings["source"](), realtime=settings["realtime"])
+    capture_format = configure_capture(
+        grabber.cap,
+        settings["capture_size"],
+        settings["capture_fps"],
+        settings["capture_fourcc"],
+    )
+    grabber.start()
+    frame = None
+    while frame is None and grabber.running and not stop.is_set():
+        frame = grabber.latest()
+        time.sleep(0.001)
+    if frame is None:
+        connection.send(None)
+        grabber.stop()
+        return
+    connection.send((capture_format, frame.shape))
+    results_name, frames_name = connection.recv()
+    results = ResultRing(settings["result_slots"], results_name)
+    frames = None
+    if frames_name is not None:
+        frames = FrameRing(frame.shape, settings["frame_slots"], frames_name)
+    inference = InferenceInput(settings["roi"], settings["inference_width"])
+    detect = settings["detector"]()
+    timestamp_ms = 0
+    while not stop.is_set():
+        if frame is None:
+            frame = grabber.latest()
+            if frame is None:
+                if not grabber.running:
+                    break
+                time.sleep(0.001)
+                continue
+        if frames is not None:
+            frames.put(frame)
+        # timestamps must increase, and identify the frame's result
+        timestamp_ms = max(int(time.time() * 1000), timestamp_ms + 1)
+        submit_time = time.perf_counter()
+        result = inference.remap(detect(inference.prepare(frame), timestamp_ms))
+        results.put(
+            result,
+            timestamp_ms,
+            (grabber.capture_time, submit_time, time.perf_counter()),
+        )
+        frame = None
+    grabber.stop()
+    results.close()
+    if frames is not None:
+        frames.close()
+
+
+class InferenceWorker:
+    """
+    Runs camera capture and hand detection in a separate process, so they
+    use another core instead of competing with rendering and physics for the
+    game process's CPU time and GIL.
+
+    Frames are published to the game through a FrameRing for the preview,
+    and detections come back as compact landmark records through a
+    ResultRing, both in shared memory. Only the start up handshake goes
+    through a pipe.
+
+    Attributes:
+        capture_format: a (width, height, fps) tuple of the format the camera
+            is capturing in, once started
+        results: a ResultRing of detections, once started
+        frames: a FrameRing of camera frames, once started with the preview
+            on, and otherwise None
+        process: the multiprocessing Process capturing and detecting
+    """
+
+    def __init__(
+        self,
+        source=open_capture,
+        detector=LandmarkDetector,
+        capture_size=None,
+        capture_fps=None,
+        capture_fourcc=None,
+        roi=None,
+        inference_width=None,
+        preview=True,
+        realtime=False,
+        result_slots=8,
+        frame_slots=3,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Set up the worker without starting it.
+
+        Args:
+            source: a picklable function returning a cv2 VideoCapture like
+                object, called in the worker process
+            detector: a picklable function returning a function from an RGB
+                image and an int timestamp (ms) to a mp HandLandmarkerResult,
+                called in the worker process
+            capture_size: an optional (width, height) tuple of ints to ask
+                the camera to capture at
+            capture_fps: an optional float frame rate to ask the camera for
+            capture_fourcc: an optional four character string pixel format
+            roi: an optional (left, top, right, bottom) tuple of fractions of
+                the frame to detect hands in
+            inference_width: an optional int for the largest width in pixels
+                of the image hand detection runs on
+            preview: a bool flag for sharing frames for the preview
+            realtime: a bool flag for pacing reads to the source frame rate,
+                for video files
+            result_slots: an int number of results the game can fall behind
+            frame_slots: an int number of frames in the frame ring
+        """
+        self._settings = {
+            "source": source,
+            "detector": detector,
+            "capture_size": capture_size,
+            "capture_fps": capture_fps,
+            "capture_fourcc": capture_fourcc,
+            "roi": roi,
+            "inference_width": inference_width,
+            "realtime": realtime,
+            "result_slots": result_slots,
+            "frame_slots": frame_slots,
+        }
+        self._preview = preview
+        self.capture_format = None
+        self.results = None
+        self.frames = None
+        # spawn rather than fork, as the game process has threads running
+        context = multiprocessing.get_context("spawn")
+        self._stop = context.Event()
+        self._connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_run_worker,
+            args=(child_connection, self._stop, self._settings),
+            daemon=True,
+        )
+
+    def start(self, timeout=30):
+        """
+        Start the worker process and wait for its first frame.
+
+        Args:
+            timeout: a float for the longest time to wait (s)
+
+        Returns:
+            The started InferenceWorker.
+
+        Raises:
+            RuntimeError: if the camera gives no frames in time
+        """
+        self.process.start()
+        if not self._connection.poll(timeout):
+            self.stop()
+            raise RuntimeError("inference worker didn't start in time")
+        started = self._connection.recv()
+        if started is None:
+            self.stop()
+            raise RuntimeError("inference worker couldn't read the camera")
+        self.capture_format, frame_shape = started
+        self.results = ResultRing(self._settings["result_slots"])
+        if self._preview:
+            self.frames = FrameRing(frame_shape, self._settings["frame_slots"])
+        self._connection.send(
+            (
+                self.results.name,
+                None if self.frames is None else self.frames.name,
+            )
+        )
+        return self
+
+    def stop(self):
+        """
+        Stop the worker process and free the shared memory.
+        """
+        self._stop.set()
+        if self.process.is_alive():
+            self.process.join(5)
+        if self.process.is_alive():
+            self.process.terminate()
+        if self.results is not None:
+            self.results.close(unlink=True)
+            self.results = None
+        if self.frames is not None:
+            self.frames.close(unlink=True)
+            self.frames = None
@@ -0,0 +1,545 @@
+"""
+Benchmarks of the air-pong model, landmark overlay and view hot paths.
+
+These run on pytest-benchmark without a camera or display, and are kept out
+of the regular test run. Store a baseline, then compare later runs against
+it and fail on a regression:
+
+    python -m pytest bench_air_pong.py --benchmark-autosave
+    python -m pytest bench_air_pong.py --benchmark-compare \
+        --benchmark-compare-fail=median:20%
+"""
+
+import copy
+import os
+import random
+import numpy as np
+import pytest
+import air_pong_batch
+import air_pong_bot
+import air_pong_model
+import air_pong_overlay
+import air_pong_rollback
+import air_pong_simulate
+from air_pong_vector import Vector
+from test_air_pong_model import matrix_hit_or_miss
+
+# Draw to an offscreen surface so no display is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+# pylint: disable=protected-access
+
+
+def launch(model, position, velocity, spin=(0, 0, 0), bounce_count=0):
+    """
+    Put the model's ball in flight from the given state.
+
+    Args:
+        model: air pong PongModel object
+        position: a tuple for the ball position (m)
+        velocity: a tuple for the ball velocity (m/s)
+        spin: a tuple for the ball spin (rad/s)
+        bounce_count: an int for the bounce count to start with
+    """
+    model.serve()
+    model._ball_position.set(*position)
+    model._ball_velocity = Vector(*velocity)
+    model._ball_spin = Vector(*spin)
+    model._bounce_count = bounce_count
+    model._current_bounce = 0
+    model.switch_paddle()
+
+
+def run_steps(benchmark, model, steps, **state):
+    """
+    Benchmark a number of trajectory steps, relaunching the ball from the
+    same state before each round.
+
+    Args:
+        benchmark: the pytest-benchmark fixture
+        model: air pong PongModel object
+        steps: an int number of steps per round
+        state: keyword arguments passed to launch()
+    """
+
+    def run():
+        for _ in range(steps):
+            model.trajectory()
+
+    benchmark.pedantic(
+        run, setup=lambda: launch(model, **state), rounds=500, warmup_rounds=5
+    )
+
+
+@pytest.mark.benchmark(group="model")
+def test_free_flight(benchmark):
+    """
+    Benchmark steps of a ball flying over the table without touching it.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    run_steps(
+        benchmark,
+        model,
+        10,
+        position=(1.5, 1.2, 0),
+        velocity=(4, 1, 0),
+        spin=(0, 0, 20),
+    )
+    assert model.bounce_count == 0
+    assert model.ball_position.y > model.table_dim.z
+
+
+@pytest.mark.benchmark(group="model")
+def test_table_bounce(benchmark):
+    """
+    Benchmark a step in which the ball bounces on the table.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    run_steps(
+        benchmark,
+        model,
+        1,
+        position=(2.0, model.table_dim.z + model.ball_radius + 0.005, 0),
+        velocity=(3, -2, 0),
+        spin=(0, 0, 20),
+    )
+    assert model.bounce_count == 1
+    assert model.ball_velocity.y > 0
+
+
+@pytest.mark.benchmark(group="model")
+def test_net_clip(benchmark):
+    """
+    Benchmark a step in which the ball clips the top of the net.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    net_top = model.table_dim.z + model.net_height
+    run_steps(
+        benchmark,
+        model,
+        1,
+        position=(2.46, net_top + 0.01, 0),
+        velocity=(5, 0, 0),
+        spin=(0, 0, 20),
+        bounce_count=1,
+    )
+    assert model.ball_velocity.mag < 5
+
+
+def paddle_contact():
+    """
+    Return a model whose ball is just touching player 1's paddle.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.update_paddle(
+        Vector(np.cos(0.3), np.sin(0.3), 0),
+        Vector(model.table_front - 0.05, 1, 0),
+        Vector(2, 0.5, 0),
+        0,
+    )
+    launch(
+        model,
+        position=(model.table_front - 0.03, 1, 0),
+        velocity=(-6, -1, 0),
+        spin=(0, 0, 5),
+    )
+    return model
+
+
+@pytest.mark.benchmark(group="model")
+def test_hit_or_miss(benchmark):
+    """
+    Benchmark checking whether the ball is touching a paddle.
+    """
+    model = paddle_contact()
+    assert benchmark(model.hit_or_miss)
+
+
+@pytest.mark.benchmark(group="model")
+def test_hit_or_miss_matrix(benchmark):
+    """
+    Benchmark the same check building and inverting the paddle's change of
+    basis matrix on every call, as it was done before the paddle frame was
+    cached.
+    """
+    model = paddle_contact()
+    assert benchmark(matrix_hit_or_miss, model)
+
+
+@pytest.mark.benchmark(group="model")
+def test_paddle_hit(benchmark):
+    """
+    Benchmark the ball bouncing off a paddle.
+    """
+    models = []
+
+    def setup():
+        models.append(paddle_contact())
+        return (models[-1],), {}
+
+    benchmark.pedantic(
+        air_pong_model.PongModel.paddle_bounce,
+        setup=setup,
+        rounds=500,
+        warmup_rounds=5,
+    )
+    assert models[-1].ball_velocity.x > 0
+
+
+@pytest.mark.benchmark(group="model")
+def test_predict(benchmark):
+    """
+    Benchmark predicting a shot across the net to the far paddle plane, from
+    a new launch with nothing cached.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    normal = Vector(-1, 0, 0)
+    position = Vector(4.12, 0.9, 0)
+
+    def setup():
+        launch(model, (1.3, 0.9, 0), (6, 1, 0))
+        model.update_paddle(normal, position, Vector(), 1)
+
+    benchmark.pedantic(
+        model.predict_until,
+        args=("paddle",),
+        setup=setup,
+        rounds=500,
+        warmup_rounds=5,
+    )
+    assert model.predict_until("paddle").paddles[1] is not None
+
+
+@pytest.mark.benchmark(group="model")
+def test_predict_cached(benchmark):
+    """
+    Benchmark predicting the shot again on a later step, from the cache.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    launch(model, (1.3, 0.9, 0), (6, 1, 0))
+    model.predict_until("paddle")
+    model.trajectory()
+    assert benchmark(model.predict_until, "paddle").paddles[1] is not None
+
+
+@pytest.mark.benchmark(group="model")
+def test_predict_moved_paddle(benchmark):
+    """
+    Benchmark predicting the shot again after the far paddle moves up or
+    down, which only finds the paddle plane crossings on the cached roll
+    again.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    launch(model, (1.3, 0.9, 0), (6, 1, 0))
+    normal = Vector(-1, 0, 0)
+    velocity = Vector()
+    positions = [Vector(4.12, 0.9, 0), Vector(4.12, 1.0, 0)]
+    model.update_paddle(normal, positions[1], velocity, 1)
+    model.predict_until("paddle")
+
+    def predict():
+        positions.reverse()
+        model.update_paddle(normal, positions[0], velocity, 1)
+        return model.predict_until("paddle")
+
+    assert benchmark(predict).paddles[1] is not None
+
+
+@pytest.mark.benchmark(group="model")
+def test_snapshot_restore(benchmark):
+    """
+    Benchmark packing the model into a preallocated snapshot and restoring
+    it.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    launch(model, (1.3, 0.9, 0), (6, 1, 0))
+    snapshot = bytearray(model.snapshot_size)
+    benchmark(lambda: model.restore(model.snapshot(snapshot)))
+
+
+@pytest.mark.benchmark(group="model")
+def test_deepcopy(benchmark):
+    """
+    Benchmark deep copying the model, which a snapshot and restore replace.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    launch(model, (1.3, 0.9, 0), (6, 1, 0))
+    benchmark(copy.deepcopy, model)
+
+
+@pytest.mark.benchmark(group="model")
+def test_rollback(benchmark):
+    """
+    Benchmark a late paddle input rolling the game back 10 steps.
+    """
+    games = []
+
+    def setup():
+        game = air_pong_rollback.RollbackBuffer(air_pong_model.PongModel(11, 2))
+        launch(game.model, (1.3, 0.9, 0), (6, 1, 0))
+        for _ in range(20):
+            game.trajectory()
+        games.append(game)
+        paddle = (Vector(-1, 0, 0), Vector(4.12, 0.9, 0), Vector(), 1)
+        return (game, *paddle), {"tick": game.tick - 10}
+
+    benchmark.pedantic(
+        air_pong_rollback.RollbackBuffer.update_paddle,
+        setup=setup,
+        rounds=200,
+        warmup_rounds=5,
+    )
+    assert games[-1].resimulated == 10
+
+
+@pytest.mark.benchmark(group="model")
+def test_full_rally(benchmark):
+    """
+    Benchmark a whole point between scripted paddles, from the serve.
+    """
+    games = []
+
+    def setup():
+        model = air_pong_model.PongModel(11, 2)
+        seeds = random.Random(1)
+        policies = [
+            air_pong_simulate.TrackingPaddle(
+                player, jitter=0.2, seed=seeds.random()
+            )
+            for player in (0, 1)
+        ]
+        games.append(model)
+        return (model, policies), {"max_points": 1}
+
+    benchmark.pedantic(
+        air_pong_simulate.simulate, setup=setup, rounds=20, warmup_rounds=1
+    )
+    assert sum(games[-1].player_score) == 1
+
+
+@pytest.mark.benchmark(group="model")
+def test_bot_step(benchmark):
+    """
+    Benchmark a bot's steps through a whole point against a scripted paddle,
+    forecasts and tilt searches included, without the model's steps.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    bot = air_pong_bot.BotPaddle(1, difficulty=1.0, seed=1)
+    opponent = air_pong_simulate.TrackingPaddle(0, jitter=0.2, seed=2)
+    # record a point from the serve, to replay the bot's view of it
+    states = []
+    while not states or not model.ball_home:
+        if model.ball_home:
+            model.serve()
+        opponent.update(model, 0)
+        bot.update(model)
+        states.append(model.snapshot())
+        model.trajectory()
+        model.check_point()
+    steps = iter(states * 1000)
+
+    def step():
+        model.restore(next(steps))
+        bot.update(model)
+
+    benchmark.pedantic(step, rounds=len(states) * 10, warmup_rounds=5)
+    assert bot.forecasts > 0
+
+
+def batch_serve(num_games=100_000):
+    """
+    Return a batch of games with player 1's paddle set to a spread of angles
+    and velocities at the front of the table, with every ball served.
+
+    Args:
+        num_games: an int number of games in the batch
+    """
+    rng = np.random.default_rng(0)
+    batch = air_pong_batch.BatchPongModel(num_games, 11, 2)
+    angle = rng.uniform(-0.3, 0.9, num_games)
+    batch.update_paddle(
+        np.stack([np.cos(angle), np.sin(angle), np.zeros(num_games)], 1),
+        [batch.table_front, batch.table_dim[2], 0],
+        np.stack(
+            [
+                rng.uniform(0, 3, num_games),
+                rng.uniform(0, 1, num_games),
+                np.zeros(num_games),
+            ],
+            1,
+        ),
+        0,
+    )
+    batch.serve()
+    return batch
+
+
+def batch_step(batch):
+    """
+    Step every game in a batch once and check for finished points.
+
+    Args:
+        batch: air pong BatchPongModel object
+    """
+    batch.trajectory()
+    batch.check_point()
+
+
+@pytest.mark.benchmark(group="batch")
+def test_batch_serve_100k(benchmark):
+    """
+    Benchmark the first step of 100k served games, where every ball meets
+    the server's paddle at once.
+    """
+    benchmark.pedantic(
+        batch_step,
+        setup=lambda: ((batch_serve(),), {}),
+        rounds=5,
+        warmup_rounds=1,
+    )
+
+
+@pytest.mark.benchmark(group="batch")
+def test_batch_step_100k(benchmark):
+    """
+    Benchmark steps of 100k games once the served balls are in flight.
+    """
+    batch = batch_serve()
+    for _ in range(5):
+        batch_step(batch)
+    benchmark.pedantic(batch_step, args=(batch,), rounds=20, warmup_rounds=1)
+    assert batch.num_games == 100_000
+
+
+def synthetic_hands():
+    """
+    Return a HandLandmarkerResult with two hands of 21 landmarks each.
+    """
+    mp = pytest.importorskip("mediapipe")
+    containers = mp.tasks.components.containers
+    hands = []
+    handedness = []
+    for center, name in ((0.3, "Right"), (0.7, "Left")):
+        hand = [containers.NormalizedLandmark(x=center, y=0.8, z=0.0)]
+        # Four joints along each of five fingers fanned out from the wrist.
+        for finger in range(5):
+            angle = np.pi * (0.2 + 0.15 * finger)
+            for joint in range(1, 5):
+                hand.append(
+                    containers.NormalizedLandmark(
+                        x=center + 0.04 * joint * np.cos(angle),
+                        y=0.8 - 0.06 * joint * np.sin(angle),
+                        z=-0.01 * joint,
+                    )
+                )
+        hands.append(hand)
+        handedness.append([containers.Category(score=1.0, display_name=name)])
+    return mp.tasks.vision.HandLandmarkerResult(
+        handedness=handedness,
+        hand_landmarks=hands,
+        hand_world_landmarks=[],
+    )
+
+
+@pytest.mark.benchmark(group="overlay")
+@pytest.mark.parametrize("scale", [1.0, 0.5])
+def test_landmark_overlay(benchmark, scale):
+    """
+    Benchmark drawing two hands on a synthetic 1280x720 camera frame, at
+    full size and as a half size preview.
+    """
+    result = synthetic_hands()
+    overlay = air_pong_overlay.LandmarkOverlay(scale)
+    frame = np.random.default_rng(0).integers(
+        0, 256, (720, 1280, 3), dtype=np.uint8
+    )
+    annotated = benchmark(overlay.draw, frame, result)
+    assert annotated.shape == (round(720 * scale), round(1280 * scale), 3)
+    assert annotated[round(576 * scale), round(384 * scale)].any()
+
+
+def make_view():
+    """
+    Return a view of a model with the ball in flight, drawing to the dummy
+    display.
+    """
+    pygame = pytest.importorskip("pygame")
+    from air_pong_view import (  # pylint: disable=import-outside-toplevel
+        PongView,
+    )
+
+    model = air_pong_model.PongModel(11, 2)
+    launch(model, position=(2.0, 1.2, 0), velocity=(3, 0, 0))
+    view = PongView(pygame.display.set_mode((1500, 600)), model)
+    view.prepare_images()
+    return view
+
+
+@pytest.mark.benchmark(group="view")
+def test_render(benchmark):
+    """
+    Benchmark drawing a frame of the game to an offscreen surface, redrawing
+    only where the ball and paddles are.
+    """
+    view = make_view()
+    benchmark(view.display)
+    assert view.screen.get_at((0, 0))[:3] == view.background_colour
+
+
+@pytest.mark.benchmark(group="view")
+def test_render_full(benchmark):
+    """
+    Benchmark drawing a whole frame of the game to an offscreen surface, as
+    after a score change.
+    """
+    view = make_view()
+    benchmark.pedantic(
+        view.display, setup=view.invalidate, rounds=200, warmup_rounds=1
+    )
+    assert view.screen.get_at((0, 0))[:3] == view.background_colour
+
+
+@pytest.mark.benchmark(group="view")
+def test_render_preview(benchmark):
+    """
+    Benchmark drawing a frame of the game with a quarter size camera preview
+    with two hands in the corner, from drawing the hands to the screen.
+    """
+    view = make_view()
+    result = synthetic_hands()
+    overlay = air_pong_overlay.LandmarkOverlay(0.25)
+    frame = np.random.default_rng(0).integers(
+        0, 256, (720, 1280, 3), dtype=np.uint8
+    )
+
+    def render():
+        return view.display(preview=overlay.draw(frame, result))
+
+    # The first frame redraws the whole screen.
+    render()
+    rects = benchmark(render)
+    assert rects[-1].size == (320, 180)
+
+
+@pytest.mark.benchmark(group="input")
+def test_update_hand(benchmark):
+    """
+    Benchmark a controller input update from two scripted hands, each update
+    making a new detection, without a camera or keyboard.
+    """
+    # pylint: disable=import-outside-toplevel
+    from air_pong_controller import PongController
+    from air_pong_input import ScriptedInput
+
+    clock = iter(np.arange(0, 1e6, 1 / 30))
+    model = air_pong_model.PongModel(11, 2)
+    controller = PongController(
+        model,
+        hand_input=ScriptedInput(clock=lambda: next(clock)),
+        preview=False,
+        keyboard_input=False,
+    )
+    # The first detection has no earlier one to find a velocity from.
+    controller.update_hand()
+    benchmark(controller.update_hand)
+    assert model.paddle_velocity[0].mag > 0
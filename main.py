@@ -1,21 +1,277 @@
 """Main file to run the air-pong game"""
 
-import pygame
-from air_pong_view import PongView
-from air_pong_controller import PongController
+import argparse
+import functools
+import sys
+from air_pong_latency import LatencyTracer
 from air_pong_model import PongModel
+from air_pong_record import MatchRecorder
+from air_pong_scheduler import FixedStepScheduler, interpolate
 
+# Hand input backends to choose from, of which camera and video detect
+# hands with mediapipe.
+INPUTS = ("camera", "video", "landmarks", "scripted", "mouse", "keyboard")
 
-def main():
-    """Run the air-pong game"""
 
-    # initialize MVCC (2 controllers)
-    model = PongModel(11, 2)
-    controller = PongController(model)
+def create_hand_input(args, tracer):
+    """
+    Returns the HandInput backend chosen on the command line.
+
+    Args:
+        args: the parsed command line arguments
+        tracer: a LatencyTracer or None
+    """
+    # pylint: disable=import-outside-toplevel
+    import air_pong_input
+    from air_pong_camera import open_capture
+
+    if args.input in ("camera", "video"):
+        settings = {
+            "capture_size": args.camera_size,
+            "capture_fps": args.camera_fps,
+            "capture_fourcc": args.camera_fourcc,
+            "roi": args.roi,
+            "inference_width": args.inference_width,
+        }
+        source = 0 if args.input == "camera" else args.input_file
+        if args.inference_process:
+            hand_input = air_pong_input.WorkerInput(
+                tracer,
+                source=functools.partial(open_capture, source),
+                realtime=args.input == "video",
+                preview=not args.no_preview,
+                **settings,
+            )
+        else:
+            hand_input = air_pong_input.CameraInput(source, tracer, **settings)
+    elif args.input == "landmarks":
+        hand_input = air_pong_input.RecordedInput(args.input_file, loop=True)
+    elif args.input == "scripted":
+        hand_input = air_pong_input.ScriptedInput()
+    elif args.input == "mouse":
+        hand_input = air_pong_input.MouseInput()
+    else:
+        hand_input = air_pong_input.HandInput()
+    if args.save_landmarks is not None:
+        hand_input = air_pong_input.LandmarkRecorder(
+            hand_input, args.save_landmarks
+        )
+    return hand_input
+
+
+def main(argv=None):
+    """
+    Run the air-pong game
+
+    Args:
+        argv: an optional list of command line argument strings
+    """
+    # The camera, network and bot modules are only needed to play, so they
+    # are imported here to keep the other commands from loading them.
+    # pylint: disable=import-outside-toplevel
+    from air_pong_bot import BotOpponent
+    from air_pong_broadcast import SpectatorFeed
+    from air_pong_camera import parse_roi, parse_size
+    from air_pong_net import PongClient, parse_address
+
+    parser = argparse.ArgumentParser(description="Play air-pong.")
+    parser.add_argument(
+        "--record", help="binary match log to record the game to"
+    )
+    parser.add_argument(
+        "--connect",
+        type=parse_address,
+        metavar="HOST:PORT",
+        help=(
+            "play on an air-pong server started with 'main.py server', "
+            "moving one paddle with the hand on its side"
+        ),
+    )
+    parser.add_argument(
+        "--broadcast",
+        type=parse_address,
+        metavar="HOST:PORT",
+        help=(
+            "broadcast the game to spectators, who watch it with "
+            "'main.py spectate HOST:PORT'"
+        ),
+    )
+    parser.add_argument(
+        "--bot",
+        type=int,
+        choices=(1, 2),
+        help="let the computer play player 1 (left) or 2 (right)",
+    )
+    parser.add_argument(
+        "--bot-difficulty",
+        type=float,
+        default=0.5,
+        help="how well the computer plays, from 0 (easiest) to 1 (hardest)",
+    )
+    parser.add_argument(
+        "--input",
+        choices=INPUTS,
+        default="camera",
+        help=(
+            "where hands come from: the camera, a video file, a recorded "
+            "landmark stream, a scripted pair of hands, the mouse, or "
+            "nowhere, to play with the keyboard alone"
+        ),
+    )
+    parser.add_argument(
+        "--input-file",
+        help=(
+            "video file or landmark stream (.npy) for the video and "
+            "landmarks inputs"
+        ),
+    )
+    parser.add_argument(
+        "--save-landmarks",
+        help="landmark stream (.npy) to save the detected hands to",
+    )
+    parser.add_argument(
+        "--no-preview",
+        action="store_true",
+        help="don't show the camera preview with the detected hands",
+    )
+    parser.add_argument(
+        "--preview-scale",
+        type=float,
+        default=1.0,
+        help="size of the camera preview relative to the camera frame",
+    )
+    parser.add_argument(
+        "--preview-in-game",
+        action="store_true",
+        help=(
+            "draw the camera preview in the top right corner of the game "
+            "instead of in a separate window"
+        ),
+    )
+    parser.add_argument(
+        "--camera-size",
+        type=parse_size,
+        help="camera capture resolution, for example 1280x720",
+    )
+    parser.add_argument(
+        "--camera-fps", type=float, help="camera capture frame rate"
+    )
+    parser.add_argument(
+        "--camera-fourcc",
+        help="camera pixel format, for example MJPG",
+    )
+    parser.add_argument(
+        "--roi",
+        type=parse_roi,
+        help=(
+            "region of the camera frame to detect hands in, as fractions "
+            "LEFT,TOP,RIGHT,BOTTOM"
+        ),
+    )
+    parser.add_argument(
+        "--inference-width",
+        type=int,
+        help="largest width in pixels of the image hand detection runs on",
+    )
+    parser.add_argument(
+        "--inference-process",
+        action="store_true",
+        help=(
+            "capture and detect hands in a separate process, so the game "
+            "can use another CPU core"
+        ),
+    )
+    parser.add_argument(
+        "--latency",
+        help=(
+            "file to write each camera frame's latency to when the game "
+            "ends, JSON if it ends in .json and CSV otherwise"
+        ),
+    )
+    parser.add_argument(
+        "--latency-overlay",
+        action="store_true",
+        help="show camera to paddle latency percentiles on screen",
+    )
+    args = parser.parse_args(argv)
+    if args.input in ("video", "landmarks") and args.input_file is None:
+        parser.error(f"--input {args.input} needs an --input-file")
+    if args.bot is not None and args.connect is not None:
+        parser.error("--bot plays on the local game, not with --connect")
+
+    # Display, camera and keyboard modules are only needed to play, so they
+    # are imported here to keep headless simulation free of them.
+    import pygame
+    from air_pong_view import PongView
+    from air_pong_controller import PongController
+
+    # initialize MVCC (2 controllers), with the server's game standing in
+    # for the model when playing over the network
+    client = None
+    if args.connect is not None:
+        client = PongClient(args.connect).connect()
+        print(f"connected as player {client.player + 1}")
+        model = client
+    else:
+        model = PongModel(11, 2)
+    # the broadcast feed stands in for the model, publishing each step
+    feed = None
+    if args.broadcast is not None:
+        feed = model = SpectatorFeed(model, args.broadcast)
+    # the recorder stands in for the model wherever inputs or steps reach it
+    if args.record is not None:
+        model = MatchRecorder(model, args.record)
+    # the bot stands in for the model outside the recorder, so its paddle
+    # moves are recorded like a hand's
+    if args.bot is not None:
+        model = BotOpponent(
+            model, player=args.bot - 1, difficulty=args.bot_difficulty
+        )
+    tracer = None
+    if args.latency is not None or args.latency_overlay:
+        tracer = LatencyTracer()
+    # the window is opened first, for the mouse input to read
     screen = pygame.display.set_mode((1500, 600))
+    controller = PongController(
+        model,
+        hand_input=create_hand_input(args, tracer),
+        preview=not args.no_preview,
+        preview_scale=args.preview_scale,
+        preview_window=not args.preview_in_game,
+        tracer=tracer,
+    )
     view = PongView(screen, model)
     view.prepare_images()
 
+    # physics runs at the model's fixed timestep, input at the controller's
+    # assumed frame rate and rendering at the display rate
+    scheduler = FixedStepScheduler(
+        physics_step=model.time_step,
+        input_interval=controller.del_time,
+        render_interval=1 / 60,
+    )
+    previous_position = model.ball_position
+    hud = []
+
+    def update_physics():
+        nonlocal previous_position
+        previous_position = model.ball_position
+        model.trajectory()
+        model.check_point()
+
+    def render(alpha):
+        ball_position = model.ball_position
+        if not model.ball_home:
+            ball_position = interpolate(previous_position, ball_position, alpha)
+        # refresh the latency percentiles twice a second
+        if args.latency_overlay and scheduler.renders % 30 == 0:
+            hud[:] = tracer.summary()
+        pygame.display.update(
+            view.display(ball_position, hud, controller.preview_frame)
+        )
+        if tracer is not None:
+            tracer.render()
+
     # main loop to run code
     running = True
     while running:
@@ -23,17 +279,44 @@ def main():
             if event.type == pygame.QUIT:  # pylint: disable=no-member
                 running = False
 
-        controller.update_hand()
-        model.trajectory()
-        view.display()
-        model.check_point()
+        scheduler.tick(controller.update_hand, update_physics, render)
         if model.check_win() is not False:
+            view.display()
             view.win(model.check_win())
             pygame.display.flip()
             pygame.time.delay(5000)
             running = False
-        pygame.display.flip()
+    controller.close()
+    if args.record is not None:
+        model.close()
+    if feed is not None:
+        feed.close()
+    if client is not None:
+        client.close()
+    if args.latency is not None:
+        tracer.export(args.latency)
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:2] == ["simulate"]:
+        from air_pong_simulate import main as simulate
+
+        simulate(sys.argv[2:])
+    elif sys.argv[1:2] == ["arena"]:
+        from air_pong_arena import main as arena
+
+        arena(sys.argv[2:])
+    elif sys.argv[1:2] == ["replay"]:
+        from air_pong_record import main as replay
+
+        replay(sys.argv[2:])
+    elif sys.argv[1:2] == ["server"]:
+        from air_pong_net import main as server
+
+        server(sys.argv[2:])
+    elif sys.argv[1:2] == ["spectate"]:
+        from air_pong_broadcast import main as spectate
+
+        spectate(sys.argv[2:])
+    else:
+        main()
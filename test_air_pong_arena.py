@@ -0,0 +1,87 @@
+"""
+Test playing arenas of headless matches across worker processes.
+"""
+
+import io
+import json
+import pytest
+import air_pong_arena
+
+
+def without_timing(result):
+    """
+    Return a match's results without the times taken to play it.
+    """
+    return {
+        key: value
+        for key, value in result.items()
+        if key not in ("seconds", "cpu_seconds")
+    }
+
+
+def test_play_match():
+    """
+    Test that a match is played to a winner, the same way every time for
+    the same seed, with the players swapping sides in odd matches.
+    """
+    result = air_pong_arena.play_match(1, ("steady", "wild"), win_threshold=3)
+    assert result["players"] == ("wild", "steady")
+    assert result["winner"] in (1, 2)
+    assert max(result["score"]) >= 3
+    assert result["steps"] == sum(result["rallies"])
+    assert without_timing(result) == without_timing(
+        air_pong_arena.play_match(1, ("steady", "wild"), win_threshold=3)
+    )
+    other = air_pong_arena.play_match(
+        1, ("steady", "wild"), seed=1, win_threshold=3
+    )
+    assert other["rallies"] != result["rallies"]
+
+
+def test_run_arena():
+    """
+    Test that an arena streams back every match once, as played in this
+    process, and totals up the results.
+    """
+    settings = {"players": ("tracking", "flat"), "win_threshold": 2}
+    stats = air_pong_arena.ArenaStats(workers=2)
+    results = list(air_pong_arena.run_arena(6, workers=2, **settings))
+    assert sorted(result["match"] for result in results) == list(range(6))
+    for result in results:
+        assert without_timing(result) == without_timing(
+            air_pong_arena.play_match(result["match"], **settings)
+        )
+
+    for result in results:
+        stats.add(result)
+    summary = stats.summary()
+    assert summary["matches"] == 6 and summary["unfinished"] == 0
+    assert sum(summary["side_win_rates"]) == pytest.approx(1)
+    win_rates = summary["win_rates"]
+    assert set(win_rates) == {"tracking", "flat"}
+    # each policy plays every match, so their win rates add up to 1
+    assert win_rates["tracking"] + win_rates["flat"] == pytest.approx(1)
+    rallies = [steps for result in results for steps in result["rallies"]]
+    assert summary["longest_rally"] == max(rallies)
+    assert summary["games_per_second"] > 0
+    assert 0 < summary["efficiency"] <= 1
+
+
+def test_play_arena_streams_results():
+    """
+    Test that results are reported and written as each match comes in.
+    """
+    reports = []
+    results = io.StringIO()
+    stats = air_pong_arena.play_arena(
+        4,
+        workers=2,
+        results=results,
+        report=lambda stats: reports.append(stats.matches),
+        win_threshold=1,
+        chunk_size=1,
+    )
+    assert reports == [1, 2, 3, 4]
+    lines = [json.loads(line) for line in results.getvalue().splitlines()]
+    assert sorted(line["match"] for line in lines) == [0, 1, 2, 3]
+    assert stats.matches == 4
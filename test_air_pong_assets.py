@@ -0,0 +1,82 @@
+"""
+Test loading and caching images and fonts with the asset manager.
+"""
+
+import os
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+# pylint: disable=wrong-import-position,no-member
+from air_pong_assets import ASSET_DIRECTORY, AssetManager
+
+
+@pytest.fixture(name="assets")
+def fixture_assets(tmp_path):
+    """
+    Return an asset manager for a directory holding a small image that is
+    red on the left and blue on the right.
+    """
+    image = pygame.Surface((40, 20), pygame.SRCALPHA)
+    image.fill((255, 0, 0, 255), (0, 0, 20, 20))
+    image.fill((0, 0, 255, 128), (20, 0, 20, 20))
+    pygame.image.save(image, str(tmp_path / "image.png"))
+    return AssetManager(str(tmp_path))
+
+
+def test_variants_are_cached(assets):
+    """
+    Test that each size and flip of an image is made once, from a single
+    read of the file per size, and that nothing is read before it's needed.
+    """
+    assert assets.loads == 0
+    scaled = assets.image("image.png", (20.7, 10.2))
+    assert scaled.get_size() == (20, 10)
+    assert assets.image("image.png", (20, 10)) is scaled
+    flipped = assets.image("image.png", (20, 10), flip=True)
+    assert flipped is assets.image("image.png", (20, 10), flip=True)
+    assert flipped.get_at((0, 0)) == scaled.get_at((19, 0))
+    assert flipped.get_at((19, 0)) == scaled.get_at((0, 0))
+    assert assets.loads == 1
+    assert assets.image("image.png").get_size() == (40, 20)
+    assert assets.loads == 2
+
+
+def test_preload(assets):
+    """
+    Test that an image loaded in the background is the one image() returns,
+    without reading the file again.
+    """
+    assets.preload("image.png", (10, 5))
+    assets.preload("image.png", (10, 5))
+    image = assets.image("image.png", (10, 5))
+    assert image.get_size() == (10, 5)
+    assert image.get_at((9, 0)) == pygame.Color(0, 0, 255, 128)
+    assert assets.loads == 1
+
+
+def test_convert_to_display(assets):
+    """
+    Test that images are converted to the display format once a display
+    mode is set, keeping per-pixel alpha.
+    """
+    pygame.display.init()
+    try:
+        display = pygame.display.set_mode((100, 100))
+        image = assets.image("image.png", (10, 5))
+        assert image.get_bitsize() == display.get_bitsize()
+        assert image.get_flags() & pygame.SRCALPHA
+        assert image.get_at((9, 0)).a == 128
+    finally:
+        pygame.display.quit()
+
+
+def test_fonts_are_cached():
+    """
+    Test that a font is loaded once per size from the repository's assets.
+    """
+    assets = AssetManager()
+    assert assets.directory == ASSET_DIRECTORY
+    font = assets.font("monofonto_rg.otf", 20)
+    assert assets.font("monofonto_rg.otf", 20) is font
+    assert assets.font("monofonto_rg.otf", 30) is not font
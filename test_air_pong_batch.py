@@ -0,0 +1,166 @@
+"""
+Test batch model class stepping many ping pong games at once.
+"""
+
+import numpy as np
+from vpython import vector
+import air_pong_batch
+import air_pong_model
+from air_pong_vector import Vector
+
+# pylint: disable=protected-access
+
+
+def run_rally(paddle_normal, paddle_velocity):
+    """
+    Play a single serve in both the scalar and batch models and return the
+    largest difference in ball position along with both final scores.
+
+    Args:
+        paddle_normal - A vector giving player 1's paddle normal.
+        paddle_velocity - A vector giving player 1's paddle velocity.
+    """
+    scalar = air_pong_model.PongModel(11, 2, swept_collisions=False)
+    batch = air_pong_batch.BatchPongModel(1, 11, 2)
+    paddle_position = vector(scalar.table_front, scalar.table_dim.z, 0)
+    scalar.serve()
+    batch.serve()
+    scalar.update_paddle(paddle_normal, paddle_position, paddle_velocity, 0)
+    batch.update_paddle(
+        [paddle_normal.x, paddle_normal.y, paddle_normal.z],
+        [paddle_position.x, paddle_position.y, paddle_position.z],
+        [paddle_velocity.x, paddle_velocity.y, paddle_velocity.z],
+        0,
+    )
+    error = 0
+    while scalar.ball_position.y != 0:
+        scalar.trajectory()
+        scalar.check_point()
+        batch.trajectory()
+        batch.check_point()
+        position = scalar.ball_position
+        error = max(
+            error,
+            np.abs(
+                np.array([position.x, position.y, position.z])
+                - batch.ball_position[0]
+            ).max(),
+        )
+    return error, scalar.player_score, tuple(batch.player_score[0])
+
+
+def test_matches_scalar_model():
+    """
+    Test that a single batched game follows the scalar model's trajectory.
+    """
+    for paddle_normal, paddle_velocity in [
+        (vector(1, 1, 0).hat, vector(0, 1, 0)),
+        (vector(1, 0, 0).hat, vector(0, 0, 0)),
+        (vector(0.1, 1, 0).hat, vector(0, 0, 0)),
+        (vector(1, 0.3, 0).hat, vector(2, 1, 0)),
+        (vector(1, 0.5, 0).hat, vector(3, 0, 0)),
+    ]:
+        error, scalar_score, batch_score = run_rally(
+            paddle_normal, paddle_velocity
+        )
+        assert error < 1e-6
+        assert scalar_score == batch_score
+
+
+def paddle_sweep():
+    """
+    Returns a list of scalar models and a list of matching batch states, one
+    for each of a sweep of balls meeting both players' paddles.
+    """
+    scalars = []
+    batch_states = []
+    for player in (0, 1):
+        direction = 1 - 2 * player
+        x_position = air_pong_model.PongModel._table_front - 0.05
+        if player == 1:
+            x_position += air_pong_model.PongModel._table_length + 0.1
+        for speed in np.linspace(0.5, 15, 6):
+            for angle in np.linspace(-0.6, 0.6, 5):
+                for paddle_speed in (0, 1, 3):
+                    normal = vector(direction * np.cos(angle), np.sin(angle), 0)
+                    position = vector(x_position, 1, 0)
+                    velocity = vector(direction * paddle_speed, 0.5, 0)
+                    ball = (
+                        [x_position + (0.02 if player == 0 else 0.05), 1, 0],
+                        [-direction * speed, -1, 0],
+                        [0, 0, 5],
+                    )
+                    scalar = air_pong_model.PongModel(11, 2)
+                    scalar.update_paddle(normal, position, velocity, player)
+                    scalar._ball_position = Vector(*ball[0])
+                    scalar._ball_velocity = Vector(*ball[1])
+                    scalar._ball_spin = Vector(*ball[2])
+                    scalar.switch_paddle()
+                    scalars.append(scalar)
+                    batch_states.append(
+                        (player, normal, position, velocity, ball)
+                    )
+    return scalars, batch_states
+
+
+def test_paddle_bounce_matches_scalar_model():
+    """
+    Test that bouncing a sweep of balls off both paddles at once gives the
+    same ball states as the scalar model's closed form paddle bounce.
+    """
+    scalars, batch_states = paddle_sweep()
+    batch = air_pong_batch.BatchPongModel(len(scalars), 11, 2)
+    for game, (player, normal, position, velocity, ball) in enumerate(
+        batch_states
+    ):
+        batch.update_paddle(
+            normal.value, position.value, velocity.value, player, [game]
+        )
+        batch.ball_position[game] = ball[0]
+        batch.ball_velocity[game] = ball[1]
+        batch.ball_spin[game] = ball[2]
+    games = np.arange(len(scalars))
+    batch.paddle_bounce(games, np.array([state[0] for state in batch_states]))
+    for game, scalar in enumerate(scalars):
+        assert scalar.hit_or_miss()
+        scalar.paddle_bounce()
+        for expected, actual in (
+            (scalar.ball_position, batch.ball_position[game]),
+            (scalar.ball_velocity, batch.ball_velocity[game]),
+            (scalar.ball_spin, batch.ball_spin[game]),
+        ):
+            assert (
+                np.abs(
+                    np.array([expected.x, expected.y, expected.z]) - actual
+                ).max()
+                < 1e-6
+            )
+
+
+def test_games_are_independent():
+    """
+    Test that games with different paddles diverge and score separately.
+    """
+    batch = air_pong_batch.BatchPongModel(2, 11, 2)
+    batch.serve()
+    # Game 0 misses the other side of the table, game 1 double bounces.
+    batch.update_paddle(
+        np.array([[1, 1, 0], [0.1, 1, 0]])
+        / np.linalg.norm([[1, 1, 0], [0.1, 1, 0]], axis=1)[:, None],
+        [batch.table_front, batch.table_dim[2], 0],
+        np.array([[0, 1, 0], [0, 0, 0]]),
+        0,
+    )
+    while not batch.ball_home.all():
+        batch.trajectory()
+        batch.check_point()
+    assert batch.player_score.tolist() == [[1, 0], [0, 1]]
+
+
+def test_check_win():
+    """
+    Test that a win is only declared when winning by 2.
+    """
+    batch = air_pong_batch.BatchPongModel(3, 11, 2)
+    batch.player_score[:] = [[11, 9], [10, 11], [9, 11]]
+    assert batch.check_win().tolist() == [1, 0, 2]
@@ -0,0 +1,129 @@
+"""
+Test the computer opponent.
+"""
+
+import air_pong_model
+import air_pong_simulate
+from air_pong_bot import BotOpponent, BotPaddle
+from air_pong_vector import Vector
+
+# pylint: disable=protected-access
+
+
+class Returns:
+    """
+    Policy counting the balls a player hits back over the net.
+    """
+
+    def __init__(self, player):
+        self.direction = 1 if player == 0 else -1
+        self.count = 0
+        self._hit = False
+
+    def update(self, model, step):  # pylint: disable=unused-argument
+        """
+        Count the ball crossing the net after the player hit it.
+        """
+        if model.ball_home:
+            self._hit = False
+            return
+        net_x = model.table_front + model.table_dim.x / 2
+        side = self.direction * (model.ball_position.x - net_x)
+        moving = self.direction * model.ball_velocity.x
+        if side < 0 and moving > 0:
+            self._hit = True
+        elif side > 0 and self._hit:
+            self.count += 1
+            self._hit = False
+
+
+def test_bot_plays_game():
+    """
+    Test that bots play a full game against a scripted paddle, returning
+    the ball over the net from either side, the same way every time for
+    the same seed.
+    """
+    for player in (0, 1):
+        results = []
+        for _ in range(2):
+            model = air_pong_model.PongModel(5, 2)
+            bot = BotPaddle(player, difficulty=1.0, seed=1)
+            returns = Returns(player)
+            policies = [
+                bot,
+                air_pong_simulate.TrackingPaddle(
+                    1 - player, jitter=0.2, seed=2
+                ),
+                returns,
+            ]
+            results.append(
+                air_pong_simulate.simulate(model, policies, max_points=40)
+            )
+        assert results[0]["winner"] in (1, 2)
+        assert results[0]["score"] == results[1]["score"]
+        assert results[0]["steps"] == results[1]["steps"]
+        assert bot.forecasts > 0 and bot.aims > 0
+        assert returns.count > 0
+        if player == 0:
+            # the left paddle serves first
+            assert bot.serve_tilt is not None
+
+
+def test_bot_update_bounded(monkeypatch):
+    """
+    Test that the bot's searches, the serve tilt search included, play no
+    more than a few scratch model steps on any one update.
+    """
+    model = air_pong_model.PongModel(5, 2)
+    bot = BotPaddle(0, difficulty=1.0, seed=1)
+    steps = []
+    trajectory = air_pong_model.PongModel.trajectory
+
+    def counted(self):
+        if self is not model:
+            steps[-1] += 1
+        trajectory(self)
+
+    class Counted:
+        """
+        Policy counting the scratch model steps of each bot update.
+        """
+
+        def update(self, game, step):
+            steps.append(0)
+            bot.update(game, step)
+
+    monkeypatch.setattr(air_pong_model.PongModel, "trajectory", counted)
+    air_pong_simulate.simulate(
+        model,
+        [
+            Counted(),
+            air_pong_simulate.TrackingPaddle(1, jitter=0.2, seed=2),
+        ],
+        max_points=6,
+    )
+    assert bot.serve_tilt is not None and bot.aims > 0
+    assert 0 < max(steps) <= BotPaddle._search_steps
+
+
+def test_bot_opponent():
+    """
+    Test that the bot's stand-in ignores controller updates to its paddle,
+    passes the other paddle's on and serves for the bot.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model._player1_serving = False
+    game = BotOpponent(model, player=1, serve_delay=0.1, difficulty=1.0)
+    assert game.player_score == (0, 0)
+    game.update_paddle(Vector(-1, 0, 0), Vector(4.0, 2.0, 0), Vector(), 1)
+    assert model._paddle_position_pair[1].y != 2.0
+    game.update_paddle(Vector(1, 0, 0), Vector(1.0, 2.0, 0), Vector(), 0)
+    assert model._paddle_position_pair[0].y == 2.0
+
+    for _ in range(5):
+        game.trajectory()
+    assert model.ball_home
+    for _ in range(10):
+        game.trajectory()
+    assert not model.ball_home
+    assert model.ball_position.x > model.table_front + model.table_dim.x / 2
@@ -0,0 +1,150 @@
+"""
+Test broadcasting games to spectators, slow spectators included.
+"""
+
+import asyncio
+import os
+import pytest
+import air_pong_model
+from air_pong_broadcast import (
+    SpectatorClient,
+    SpectatorFeed,
+    SpectatorServer,
+    load_test,
+    watch,
+)
+from air_pong_net import quantize_state
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+async def until(condition, timeout=5.0):
+    """
+    Wait for a condition to hold, letting the event loop run meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.001)
+
+
+def test_fan_out():
+    """
+    Test that every spectator receives every frame, in order, with its
+    state intact.
+    """
+
+    async def run():
+        server = await SpectatorServer().start()
+        clients = [
+            await SpectatorClient.connect(("127.0.0.1", server.port))
+            for _ in range(3)
+        ]
+        await until(lambda: len(server.subscribers) == 3)
+        model = air_pong_model.PongModel(11, 2)
+        model.serve()
+        for tick in range(1, 21):
+            model.trajectory()
+            server.publish(tick, quantize_state(model))
+            await asyncio.sleep(0.001)
+        await until(lambda: all(client.tick == 20 for client in clients))
+        for client in clients:
+            assert client.frames == 20
+            assert client.state == quantize_state(model)
+            assert len(client.latencies) == 20
+            assert 0 < min(client.latencies) <= max(client.latencies) < 1
+            await client.close()
+        await until(lambda: not server.subscribers)
+        assert server.stats()["published"] == 20
+        await server.close()
+
+    asyncio.run(run())
+
+
+def test_slow_spectator_gets_newest():
+    """
+    Test that a spectator that stops reading only costs the server the
+    newest frame, which it gets once it reads again, while a spectator that
+    keeps up still gets every frame.
+    """
+
+    async def run():
+        server = await SpectatorServer().start()
+        address = ("127.0.0.1", server.port)
+        fast = await SpectatorClient.connect(address, measure_latency=False)
+        slow = await SpectatorClient.connect(
+            address, receive_buffer=4096, measure_latency=False
+        )
+        await until(lambda: len(server.subscribers) == 2)
+        slow.transport.pause_reading()
+        state = quantize_state(air_pong_model.PongModel(11, 2))
+        for tick in range(1, 301):
+            server.publish(tick, state)
+            await until(lambda: fast.tick == tick)
+        subscriber = next(
+            subscriber for subscriber in server.subscribers if subscriber.paused
+        )
+        assert subscriber.dropped > 0
+        assert subscriber.pending[:4] == (300).to_bytes(4, "little")
+        assert fast.frames == 300 and fast.skipped == 0
+
+        slow.transport.resume_reading()
+        await until(lambda: slow.tick == 300)
+        assert slow.frames == subscriber.sent == 300 - subscriber.dropped
+        assert server.stats()["dropped"] == subscriber.dropped
+        for client in (fast, slow):
+            await client.close()
+        await server.close()
+
+    asyncio.run(run())
+
+
+def test_headless_watch():
+    """
+    Test that a headless spectator draws a fed game to an offscreen surface
+    as it is played.
+    """
+    pygame = pytest.importorskip("pygame")
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    feed = SpectatorFeed(model, interval=2)
+    surface = pygame.Surface((750, 300))
+
+    async def run():
+        async def play():
+            while True:
+                feed.trajectory()
+                await asyncio.sleep(0.005)
+
+        player = asyncio.create_task(play())
+        try:
+            return await watch(feed.address, surface, frames=5)
+        finally:
+            player.cancel()
+
+    try:
+        client = asyncio.run(run())
+    finally:
+        feed.close()
+    assert client.frames >= 5 and client.tick % 2 == 0
+    assert client.mirror.ball_position.x == pytest.approx(
+        client.state[0] / 1000
+    )
+    assert not client.mirror.ball_home
+    # the table and scoreboard have been drawn over the white background
+    pixels = pygame.surfarray.array3d(surface)
+    assert (pixels != 255).any(axis=2).mean() > 0.05
+
+
+def test_load_test():
+    """
+    Test broadcasting to a few dozen spectators at 60 frames a second,
+    reporting the latency and CPU use. The 500 spectator run is left to
+    spectate --load-test, as it needs about a thousand open files.
+    """
+    stats = load_test(subscribers=32, frames=60, rate=60.0)
+    assert stats["received"] == 32 * 60
+    assert stats["dropped"] == 0
+    assert stats["median_latency"] <= stats["p99_latency"] < 0.25
+    assert 0 < stats["server_cpu_load"] < 1
@@ -0,0 +1,113 @@
+"""
+Test camera capture settings and the cropped, shrunk hand detection input.
+"""
+
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+from air_pong_camera import (
+    InferenceInput,
+    configure_capture,
+    parse_roi,
+    parse_size,
+)
+
+# pylint: disable=no-member
+
+
+class FakeCapture:
+    """
+    Capture that records the properties set on it and reports a fixed format.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def set(self, prop, value):
+        """
+        Record a property being set.
+        """
+        self.calls.append((prop, value))
+        return True
+
+    def get(self, prop):
+        """
+        Return the format the camera settled on.
+        """
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: 640.0,
+            cv2.CAP_PROP_FRAME_HEIGHT: 480.0,
+            cv2.CAP_PROP_FPS: 30.0,
+        }[prop]
+
+
+def test_configure_capture():
+    """
+    Test that the pixel format is requested before the size and frame rate
+    and that the format the camera settled on is returned.
+    """
+    cap = FakeCapture()
+    assert configure_capture(cap, (1280, 720), 60, "MJPG") == (640, 480, 30.0)
+    assert [prop for prop, _ in cap.calls] == [
+        cv2.CAP_PROP_FOURCC,
+        cv2.CAP_PROP_FRAME_WIDTH,
+        cv2.CAP_PROP_FRAME_HEIGHT,
+        cv2.CAP_PROP_FPS,
+    ]
+    assert cap.calls[0][1] == cv2.VideoWriter_fourcc(*"MJPG")
+    cap = FakeCapture()
+    configure_capture(cap)
+    assert not cap.calls
+    assert parse_size("1280X720") == (1280, 720)
+    assert parse_roi("0.1,0,0.9,1") == (0.1, 0.0, 0.9, 1.0)
+    with pytest.raises(ValueError):
+        parse_size("1280")
+
+
+def test_full_frame_passes_through():
+    """
+    Test that without a crop or scale the frame is detected on as it is and
+    landmarks are left alone.
+    """
+    inference = InferenceInput()
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    assert inference.prepare(frame) is frame
+    landmark = SimpleNamespace(x=0.25, y=0.5, z=-0.1)
+    inference.remap(SimpleNamespace(hand_landmarks=[[landmark]]))
+    assert (landmark.x, landmark.y, landmark.z) == (0.25, 0.5, -0.1)
+    with pytest.raises(ValueError):
+        InferenceInput(roi=(0.5, 0, 0.4, 1))
+
+
+def test_crop_and_remap():
+    """
+    Test that the detection image is the shrunk region of interest and that
+    a point found in it maps back to the same place in the full frame.
+    """
+    inference = InferenceInput(roi=(0.25, 0.5, 0.75, 1.0), max_width=320)
+    frame = np.random.default_rng(0).integers(
+        0, 256, (720, 1280, 3), dtype=np.uint8
+    )
+    image = inference.prepare(frame)
+    assert image.shape == (180, 320, 3)
+    assert np.array_equal(
+        image,
+        cv2.resize(
+            frame[360:720, 320:960], (320, 180), interpolation=cv2.INTER_LINEAR
+        ),
+    )
+    assert inference.prepare(frame) is image
+
+    # A landmark in the middle of the detection image is in the middle of
+    # the region of interest.
+    landmark = SimpleNamespace(x=0.5, y=0.5, z=-0.1)
+    inference.remap(SimpleNamespace(hand_landmarks=[[landmark]]))
+    assert landmark.x == pytest.approx(0.5)
+    assert landmark.y == pytest.approx(0.75)
+    assert landmark.z == pytest.approx(-0.05)
+
+    # A crop that isn't shrunk is copied as it is.
+    inference = InferenceInput(roi=(0, 0, 0.5, 1))
+    image = inference.prepare(frame)
+    assert np.array_equal(image, frame[:, :640])
@@ -0,0 +1,73 @@
+"""
+Test threaded frame capture from a file-backed video source.
+"""
+
+import time
+import cv2
+import numpy as np
+import air_pong_capture
+
+
+def write_video(path, frames):
+    """
+    Write a short video whose left half is white and right half is black.
+
+    Args:
+        path: a path to the video file to create
+        frames: an int for the number of frames to write
+    """
+    writer = cv2.VideoWriter(
+        str(path), cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48)
+    )
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    frame[:, :32] = 255
+    for _ in range(frames):
+        writer.write(frame)
+    writer.release()
+
+
+def wait_for(grabber):
+    """
+    Wait for the capture thread to reach the end of the video.
+
+    Args:
+        grabber: a started FrameGrabber object
+    """
+    deadline = time.time() + 10
+    while grabber.running and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_latest_frame_is_flipped(tmp_path):
+    """
+    Test that the newest frame is mirrored and only returned once.
+    """
+    path = tmp_path / "video.avi"
+    write_video(path, 10)
+    grabber = air_pong_capture.FrameGrabber(cv2.VideoCapture(str(path)))
+    grabber.start()
+    wait_for(grabber)
+    frame = grabber.latest()
+    assert frame.shape == (48, 64, 3)
+    # The white half moves from the left to the right.
+    assert frame[:, :30].mean() < 10
+    assert frame[:, 34:].mean() > 245
+    assert grabber.latest() is None
+    grabber.stop()
+
+
+def test_dropped_frame_counters(tmp_path):
+    """
+    Test that frames never picked up are counted as dropped.
+    """
+    path = tmp_path / "video.avi"
+    write_video(path, 10)
+    grabber = air_pong_capture.FrameGrabber(cv2.VideoCapture(str(path)))
+    grabber.start()
+    wait_for(grabber)
+    assert grabber.captured_frames == 10
+    assert grabber.dropped_frames == 9
+    assert grabber.read_latency >= 0
+    grabber.latest()
+    assert grabber.frame_age > 0
+    grabber.stop()
@@ -0,0 +1,166 @@
+"""
+Test the hand input backends and the controller driven by them.
+"""
+
+import subprocess
+import sys
+import numpy as np
+import pytest
+import air_pong_model
+from air_pong_camera import open_capture
+from air_pong_controller import PongController
+from air_pong_input import (
+    HandInput,
+    LandmarkRecorder,
+    RecordedInput,
+    ScriptedInput,
+)
+from air_pong_landmarks import hand_result, load_landmarks
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def still_hands(_):
+    """
+    Returns a right hand at the middle of the frame and a left hand near its
+    top right corner.
+    """
+    return [("Right", 0.5, 0.5), ("Left", 0.8, 0.1)]
+
+
+class FrameInput(HandInput):
+    """
+    Backend with a camera frame and a fixed result, detected once.
+    """
+
+    def __init__(self):
+        self.frame_data = np.zeros((48, 64, 3), dtype=np.uint8)
+        self.detections = [(1000, hand_result([("Right", 0.25, 0.5)]))]
+
+    def poll(self):
+        detections, self.detections = self.detections, []
+        return detections
+
+    def frame(self):
+        return self.frame_data
+
+
+def test_scripted_input_rate():
+    """
+    Test that scripted hands are detected at their rate, on the time.time()
+    clock, with late polls getting only the newest detection.
+    """
+    clock = FakeClock()
+    hand_input = ScriptedInput(still_hands, rate=20, clock=clock)
+    detections = hand_input.poll()
+    assert [timestamp for timestamp, _ in detections] == [1000000]
+    assert detections[0][1].handedness[1][0].display_name == "Left"
+    assert hand_input.poll() == []
+    clock.now += 0.125
+    ((timestamp, result),) = hand_input.poll()
+    assert timestamp == 1000100
+    assert result.hand_landmarks[0][9] == (0.5, 0.5, 0.0)
+
+
+def test_record_and_replay(tmp_path):
+    """
+    Test that a recorded landmark stream plays back at its recorded pace,
+    moved to the time it is played, and loops.
+    """
+    clock = FakeClock()
+    path = str(tmp_path / "hands.npy")
+    recorder = LandmarkRecorder(
+        ScriptedInput(still_hands, rate=10, clock=clock), path
+    )
+    for _ in range(3):
+        recorder.poll()
+        clock.now += 0.1
+    recorder.close()
+    records = load_landmarks(path)
+    assert list(records["timestamp_ms"]) == [1000000, 1000100, 1000200]
+
+    clock.now = 2000.0
+    replay = RecordedInput(path, loop=True, clock=clock)
+    assert [timestamp for timestamp, _ in replay.poll()] == [2000000]
+    clock.now += 0.25
+    detections = replay.poll()
+    assert [timestamp for timestamp, _ in detections] == [2000100, 2000200]
+    landmark = detections[0][1].hand_landmarks[1][9]
+    assert (landmark.x, landmark.y) == pytest.approx((0.8, 0.1))
+    # the stream starts over one frame gap after its end
+    clock.now += 0.1
+    assert [timestamp for timestamp, _ in replay.poll()] == [2000300]
+
+
+def test_open_capture_fails():
+    """
+    Test that a source that can't be opened raises an error once the
+    attempts run out, rather than returning None.
+    """
+    with pytest.raises(RuntimeError):
+        open_capture("missing.avi", attempts=2, delay=0)
+
+
+def test_controller_with_scripted_hands():
+    """
+    Test that the controller moves each player's paddle to the scripted
+    hands without a camera, keyboard or mediapipe.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    controller = PongController(
+        model,
+        hand_input=ScriptedInput(still_hands),
+        preview=False,
+        keyboard_input=False,
+    )
+    controller.update_hand()
+    right, left = model.paddle_position
+    assert (right.x, right.y) == pytest.approx((1.25, 1.0))
+    assert (left.x, left.y) == pytest.approx((4.5, 1.4))
+    controller.close()
+
+
+def test_controller_preview_frame():
+    """
+    Test that the hand input's frames are drawn on and kept for the game to
+    show when the preview isn't in a window.
+    """
+    controller = PongController(
+        air_pong_model.PongModel(11, 2),
+        hand_input=FrameInput(),
+        preview_window=False,
+        keyboard_input=False,
+    )
+    controller.update_hand()
+    assert controller.preview_frame.shape == (48, 64, 3)
+    assert controller.preview_frame.any()
+
+
+def test_mediapipe_is_deferred():
+    """
+    Test that the controller and non-camera inputs load without mediapipe.
+    """
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            (
+                "import sys, air_pong_controller, air_pong_input;"
+                "print('mediapipe' in sys.modules)"
+            ),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert loaded.stdout.strip() == "False"
@@ -0,0 +1,106 @@
+"""
+Test tracing camera frames through detection, paddle updates and renders.
+"""
+
+import csv
+import json
+import pytest
+from air_pong_latency import LatencyTracer
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def run_frames(tracer, clock, frames):
+    """
+    Pass frames through the tracer 33 ms apart, each captured 5 ms before
+    being submitted and taking the given ms to detect.
+
+    Args:
+        tracer: a LatencyTracer
+        clock: the FakeClock the tracer uses
+        frames: a list of (frame id, inference ms, hands found) tuples
+    """
+    for frame_id, inference, hands in frames:
+        clock.now = frame_id / 1000
+        tracer.submit(frame_id, clock.now - 0.005)
+        clock.now += inference / 1000
+        tracer.complete(frame_id)
+        clock.now += 0.002
+        if hands:
+            tracer.update(frame_id)
+            # the same result is applied again on the next input update
+            tracer.update(frame_id)
+        clock.now += 0.004
+        tracer.render()
+
+
+def test_spans_and_percentiles():
+    """
+    Test that each stage's latency is measured from the stage before and
+    that percentiles are taken over the latest window of frames.
+    """
+    clock = FakeClock()
+    tracer = LatencyTracer(window=10, clock=clock)
+    assert not tracer.percentiles()
+    run_frames(
+        tracer, clock, [(1000 + 33 * i, 10 + i, True) for i in range(20)]
+    )
+    assert len(tracer.records) == 20
+    record = tracer.records[0]
+    assert record["frame"] == 1000
+    assert record["render_frame"] == 0
+    assert record["submit"] - record["capture"] == pytest.approx(0.005)
+    assert record["complete"] - record["submit"] == pytest.approx(0.010)
+    assert record["render"] - record["capture"] == pytest.approx(0.021)
+    percentiles = tracer.percentiles()
+    # only the last 10 frames, with 20 to 29 ms of inference, count
+    assert percentiles["inference"]["p50"] == pytest.approx(24.5)
+    assert percentiles["inference"]["p99"] == pytest.approx(28.91)
+    assert percentiles["queue"]["p95"] == pytest.approx(5)
+    assert percentiles["total"]["p50"] == pytest.approx(35.5)
+    assert tracer.summary()[1].startswith("inference p50  24.5 p95")
+
+
+def test_frames_without_updates_are_dropped():
+    """
+    Test that frames whose results never move a paddle are dropped rather
+    than traced, whether a newer frame updates one or they pile up.
+    """
+    clock = FakeClock()
+    tracer = LatencyTracer(max_pending=3, clock=clock)
+    run_frames(tracer, clock, [(100, 10, False), (200, 10, True)])
+    assert [record["frame"] for record in tracer.records] == [200]
+    assert tracer.dropped == 1
+    run_frames(tracer, clock, [(300 + i, 10, False) for i in range(5)])
+    assert tracer.dropped == 3
+    assert len(tracer.records) == 1
+
+
+def test_export(tmp_path):
+    """
+    Test that traces are exported as CSV rows and as JSON with percentiles.
+    """
+    clock = FakeClock()
+    tracer = LatencyTracer(clock=clock)
+    run_frames(tracer, clock, [(1000, 12, True), (1033, 14, True)])
+    tracer.export(tmp_path / "latency.csv")
+    with open(tmp_path / "latency.csv", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [int(row["frame"]) for row in rows] == [1000, 1033]
+    assert float(rows[1]["inference_ms"]) == pytest.approx(14)
+    tracer.export(str(tmp_path / "latency.json"))
+    with open(tmp_path / "latency.json", encoding="utf-8") as file:
+        data = json.load(file)
+    assert data["dropped"] == 0
+    assert len(data["records"]) == 2
+    assert data["percentiles"]["inference"]["p50"] == pytest.approx(13)
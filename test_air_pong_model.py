@@ -2,8 +2,12 @@
 Test model class storing the state of the ping pong game.
 """
 
+import subprocess
+import sys
 import numpy as np
+import pytest
 from vpython import vector
+from air_pong_vector import Vector
 import air_pong_model
 
 particle = air_pong_model.PongModel(11, 2)
@@ -172,3 +176,485 @@ def test_serve():
         particle.trajectory()
         particle.check_point()
     assert particle.player_score == (1, 2)
+
+
+def stepped_paddle_bounce(model):
+    """
+    Reference paddle bounce that steps through the contact in increments of
+    time_step / 10, as PongModel did before the closed form solution.
+
+    Args:
+        model - A PongModel whose ball is in contact with its active paddle.
+    """
+    time_step = model.time_step
+    omega = np.sqrt(model._paddle_stiff / model._ball_mass)
+    paddle_acc = model._paddle_force / model._ball_mass
+    normal = model._paddle_normal
+    spring_disp = model._ball_position.proj(normal)
+    initial_velocity = abs(model._ball_velocity.proj(normal).mag) + abs(
+        model._paddle_velocity.proj(normal).mag
+    )
+    cumm_time = 0
+    parallel_velocity = model.ball_radius * model._ball_spin.cross(
+        normal
+    ) + model._paddle_velocity.proj(
+        normal.rotate(axis=Vector(0, 0, 1), angle=np.pi / 2)
+    )
+    while (
+        spring_disp.mag
+        >= (model._player_coefficient() * model._ball_position).proj(normal).mag
+    ):
+        cumm_time += time_step / 10
+        spring_acc = initial_velocity / omega**3 * np.sin(cumm_time * omega)
+        model._ball_position += normal * (
+            0.5 * paddle_acc * cumm_time**2 - spring_acc * omega**2
+        )
+        model._ball_velocity = (
+            -model._player_coefficient()
+            * normal
+            * (
+                -paddle_acc * cumm_time
+                + initial_velocity * np.cos(cumm_time * omega)
+            )
+        )
+        parallel_velocity -= parallel_velocity.hat * (
+            model._paddle_friction * (paddle_acc + spring_acc) * time_step
+        )
+        model._ball_spin = Vector(
+            0,
+            0,
+            (parallel_velocity.mag - model._paddle_velocity.proj(normal).mag)
+            / model.ball_radius,
+        )
+
+
+def paddle_contact(player, speed, angle, paddle_speed):
+    """
+    Return a model whose ball is just touching the given player's paddle.
+
+    Args:
+        player - An integer, 0 or 1, giving the paddle being hit.
+        speed - A float giving the incoming ball speed towards the paddle.
+        angle - A float giving the upward tilt of the paddle (radians).
+        paddle_speed - A float giving the paddle speed towards the net.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    direction = 1 - 2 * player
+    x_position = model.table_front - 0.05
+    if player == 1:
+        x_position = model.table_front + model.table_dim.x + 0.05
+    model.update_paddle(
+        Vector(direction * np.cos(angle), np.sin(angle), 0),
+        Vector(x_position, 1, 0),
+        Vector(direction * paddle_speed, 0.5, 0),
+        player,
+    )
+    # Player 2's contact zone sits behind their paddle.
+    model._ball_position = Vector(
+        x_position + (0.02 if player == 0 else 0.05), 1, 0
+    )
+    model._ball_velocity = Vector(-direction * speed, -1, 0)
+    model._ball_spin = Vector(0, 0, 5)
+    model.switch_paddle()
+    return model
+
+
+def test_paddle_bounce():
+    """
+    Test that the closed form paddle bounce matches stepping through the
+    contact over a sweep of incoming speeds and paddle angles.
+    """
+    for player in (0, 1):
+        for speed in np.linspace(0.5, 15, 8):
+            for angle in np.linspace(-0.6, 0.6, 5):
+                for paddle_speed in (0, 1, 3):
+                    expected = paddle_contact(
+                        player, speed, angle, paddle_speed
+                    )
+                    actual = paddle_contact(player, speed, angle, paddle_speed)
+                    assert expected.hit_or_miss()
+                    stepped_paddle_bounce(expected)
+                    actual.paddle_bounce()
+                    assert (
+                        expected.ball_position - actual.ball_position
+                    ).mag < 1e-6
+                    assert (
+                        expected._ball_velocity - actual._ball_velocity
+                    ).mag < 1e-6
+                    assert (expected.ball_spin - actual.ball_spin).mag < 1e-6
+
+
+def first_bounce(time_step, swept_collisions, position, velocity):
+    """
+    Launch the ball and return where it first bounces on the table and how
+    many steps that took.
+
+    Args:
+        time_step - A float giving the model time step (sec).
+        swept_collisions - A boolean enabling swept collision detection.
+        position - A vector giving the launch position of the ball.
+        velocity - A vector giving the launch velocity of the ball.
+    """
+    model = air_pong_model.PongModel(
+        11, 2, time_step=time_step, swept_collisions=swept_collisions
+    )
+    model.serve()
+    model._ball_position = position.copy()
+    model._ball_velocity = velocity.copy()
+    model._bounce_count = 0
+    steps = 0
+    while model._bounce_count == 0 and model.ball_position.y > 0:
+        model.trajectory()
+        steps += 1
+    return model.ball_position.x, steps
+
+
+def test_swept_collisions():
+    """
+    Test that swept collisions stop a fast ball at the net and table at a
+    large time step, taking fewer steps than checking step endpoints at the
+    default time step.
+    """
+    for position, velocity in [
+        # A flat shot into the net.
+        (Vector(1.5, 0.85, 0), Vector(8, 0, 0)),
+        # A fast shot that only just clears the net.
+        (Vector(1.3, 0.9, 0), Vector(15, -2, 0)),
+    ]:
+        expected, _ = first_bounce(0.001, True, position, velocity)
+        swept, swept_steps = first_bounce(0.04, True, position, velocity)
+        discrete, _ = first_bounce(0.04, False, position, velocity)
+        _, default_steps = first_bounce(0.01, False, position, velocity)
+        assert abs(swept - expected) < 0.01
+        assert abs(discrete - expected) > 0.1
+        assert swept_steps < default_steps
+
+
+def matrix_hit_or_miss(model):
+    """
+    Reference paddle contact check that builds and inverts the paddle's
+    change of basis matrix on every call, as PongModel did before caching
+    the paddle frame in update_paddle.
+
+    Args:
+        model - A PongModel object.
+    """
+    coefficient = model._player_coefficient()
+    normal = model._paddle_normal
+    horizontal = coefficient * Vector(normal.x, 0, normal.z).norm().rotate(
+        angle=np.pi / 2, axis=Vector(0, 1, 0)
+    )
+    vertical = horizontal.rotate(angle=np.pi / 2, axis=normal)
+    change_basis = np.array(
+        [
+            [normal.x, vertical.x, horizontal.x],
+            [normal.y, vertical.y, horizontal.y],
+            [normal.z, vertical.z, horizontal.z],
+        ]
+    )
+    edges = np.transpose(
+        np.linalg.inv(change_basis)
+        @ np.transpose(np.array(model._paddle_edges))
+    )
+    ball = np.linalg.inv(change_basis) @ np.array(
+        [model.ball_position.x, model.ball_position.y, model.ball_position.z]
+    )
+    return (
+        round(ball[1], 4) <= round(edges[0][1], 4)
+        and round(ball[1], 4) >= round(edges[1][1], 4)
+        and round(edges[0][0], 3)
+        >= ball[0] - coefficient * model.ball_radius
+        >= edges[0][0] - model.paddle_dim.y
+    )
+
+
+def test_hit_or_miss_cached_frame():
+    """
+    Test that the cached paddle frame gives the same contact results as
+    rebuilding the change of basis each call.
+    """
+    models = []
+    for player in (0, 1):
+        for angle in np.linspace(-0.6, 0.6, 5):
+            for offset in np.linspace(-0.1, 0.2, 13):
+                model = paddle_contact(player, 1, angle, 0)
+                model._ball_position += Vector(offset, offset / 2, 0)
+                model.switch_paddle()
+                models.append(model)
+    assert [model.hit_or_miss() for model in models] == [
+        matrix_hit_or_miss(model) for model in models
+    ]
+    assert any(model.hit_or_miss() for model in models)
+    assert not all(model.hit_or_miss() for model in models)
+
+
+def test_free_flight_allocations(monkeypatch):
+    """
+    Test that stepping the ball through the air updates the model's state in
+    place without allocating any vectors, and that the public properties are
+    copies that don't change as the model steps.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    model.trajectory()
+    position = model.ball_position
+    allocations = []
+    original_init = Vector.__init__
+
+    def counting_init(self, *args):
+        allocations.append(args)
+        original_init(self, *args)
+
+    monkeypatch.setattr(Vector, "__init__", counting_init)
+    for _ in range(10):
+        model.trajectory()
+        model.check_point()
+    assert not allocations
+    assert model.ball_position != position
+
+
+def test_vector_inputs():
+    """
+    Test that paddle inputs given as Vectors give the same edges and the
+    same points as the same inputs given as vpython vectors.
+    """
+    for normal in ((1, 0, 0), (0, 1, 0), (-1, 1, 0), (1, -1, 0)):
+        models = [air_pong_model.PongModel(11, 2) for _ in range(2)]
+        for model, kind in zip(models, (vector, Vector)):
+            model.update_paddle(
+                kind(*normal).hat, kind(0, 0, 0), kind(0, 0, 0), 0
+            )
+        assert models[0].paddle_edges[0] == models[1].paddle_edges[0]
+
+    scores = []
+    for kind in (vector, Vector):
+        model = air_pong_model.PongModel(11, 2)
+        for normal, velocity in (
+            ((1, 1, 0), (0, 1, 0)),
+            ((0.1, 1, 0), (0, 0, 0)),
+        ):
+            model.serve()
+            model.update_paddle(
+                kind(*normal).hat,
+                kind(model.table_front, model.table_dim.z, 0),
+                kind(*velocity),
+                0,
+            )
+            while model.ball_position.y != 0:
+                model.trajectory()
+                model.check_point()
+        scores.append(model.player_score)
+    assert scores[0] == scores[1] == (1, 1)
+
+
+def test_vpython_inputs():
+    """
+    Test that the model accepts vpython vectors as paddle inputs, copies
+    them into its own state and can be imported without vpython.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    normal = vector(1, 0.5, 0).hat
+    model.update_paddle(normal, vector(0.5, 1, 0), vector(1, 0, 0), 0)
+    normal.x = 0
+    assert model.paddle_normal[0] == Vector(*vector(1, 0.5, 0).hat.value)
+    assert isinstance(model.paddle_position[0], Vector)
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, air_pong_model; print('vpython' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
+
+
+def launched(position, velocity):
+    """
+    Returns a model with its ball in flight from a given state.
+
+    Args:
+        position - A vector giving the launch position of the ball.
+        velocity - A vector giving the launch velocity of the ball.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    model._ball_position = position.copy()
+    model._ball_velocity = velocity.copy()
+    model._bounce_count = 0
+    return model
+
+
+def test_predict():
+    """
+    Test that the predicted bounce, net crossing and paddle plane crossing
+    happen on the steps the model reaches them in, and that the paddle in the
+    way doesn't change where the ball is predicted to go.
+    """
+    model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+    model.update_paddle(Vector(-1, 0, 0), Vector(4.12, 0.9, 0), Vector(), 1)
+    prediction = model.predict(2.0)
+    assert prediction.clearance > 0
+    assert prediction.net.position.x == pytest.approx(2.48)
+    assert prediction.bounce.position.y == pytest.approx(0.673796)
+    assert prediction.paddles[0] is None
+    crossing = prediction.paddles[1]
+    assert crossing.position.x == pytest.approx(4.12)
+    assert prediction.net.time < prediction.bounce.time < crossing.time < 2.0
+    step = model.time_step
+    for event, time in [
+        ("net", prediction.net.time),
+        ("bounce", prediction.bounce.time),
+        ("paddle", crossing.time),
+    ]:
+        model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+        for _ in range(int(time / step)):
+            model.trajectory()
+        before = model.ball_position
+        model.trajectory()
+        after = model.ball_position
+        if event == "net":
+            assert before.x < 2.48 <= after.x
+        elif event == "bounce":
+            assert model.bounce_count != 0
+        else:
+            assert before.x < 4.12 <= after.x
+            assert after.y == pytest.approx(crossing.position.y, abs=0.01)
+
+
+def test_predict_into_net():
+    """
+    Test that a ball predicted to hit the net has no clearance and doesn't
+    bounce on the far side, and that predicting stops at the given event.
+    """
+    model = launched(Vector(1.5, 0.85, 0), Vector(8, 0, 0))
+    prediction = model.predict(2.0)
+    assert prediction.clearance < 0
+    assert prediction.net.position.x < 2.5
+    assert prediction.bounce.position.x < 2.5
+    assert prediction.paddles[1] is None
+    model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+    prediction = model.predict_until("net")
+    assert prediction.net is not None and prediction.bounce is None
+    assert model.predict(0.1).net is None
+    with pytest.raises(ValueError):
+        model.predict_until("floor")
+
+
+def test_predict_cache():
+    """
+    Test that a prediction is only rolled again after a collision, with its
+    times counting down as the ball flies.
+    """
+    model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+    first = model.predict(1.0)
+    roll = model._prediction
+    for _ in range(10):
+        model.trajectory()
+    prediction = model.predict(1.0)
+    assert model._prediction is roll
+    assert prediction.bounce.time == pytest.approx(first.bounce.time - 0.1)
+    assert prediction.bounce.position == first.bounce.position
+    model.update_paddle(Vector(-1, 0, 0), Vector(4.0, 0.9, 0), Vector(), 1)
+    assert model.predict(1.0).paddles[1].position.x == pytest.approx(4.0)
+    while model.bounce_count == 0:
+        model.trajectory()
+    assert model._prediction is None
+    assert model.predict(1.0).bounce is None
+    model.check_point()
+    model._bounce_count = -1
+    model.check_point()
+    assert model.predict(1.0) == (None, None, None, (None, None))
+
+
+def test_predict_cache_kept_by_paddle_update(monkeypatch):
+    """
+    Test that moving a paddle keeps the cached roll of the ball, and only
+    finds its paddle plane crossings again, as a new roll would.
+    """
+    rolls = []
+    roll = air_pong_model.PongModel._roll
+
+    def counted(self, steps, event):
+        rolls.append(self)
+        return roll(self, steps, event)
+
+    monkeypatch.setattr(air_pong_model.PongModel, "_roll", counted)
+    model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+    first = model.predict_until("paddle")
+    for _ in range(5):
+        model.trajectory()
+    # nearer the net, further back, then tilted
+    for position, normal in [
+        (Vector(3.9, 0.9, 0), Vector(-1, 0, 0)),
+        (Vector(4.3, 1.0, 0), Vector(-1, 0, 0)),
+        (Vector(4.0, 0.9, 0), Vector(-1, 0.5, 0).hat),
+    ]:
+        model.update_paddle(normal, position, Vector(), 1)
+        prediction = model.predict_until("paddle")
+        fresh = air_pong_model.PongModel(11, 2)
+        fresh.restore(model.snapshot())
+        assert fresh.predict_until("paddle") == prediction
+    # the ball is only rolled again to reach the paddle moved further back
+    assert rolls.count(model) == 2
+    assert model._prediction.paddles[1] is not None
+    assert prediction.bounce.position == first.bounce.position
+
+
+def rally(model, steps):
+    """
+    Step a model through part of a rally, moving both paddles every step,
+    and return the ball state after each step.
+
+    Args:
+        model - A PongModel object.
+        steps - An integer giving the number of steps to run.
+    """
+    states = []
+    for step in range(steps):
+        for player, x in ((0, 0.9), (1, 4.1)):
+            model.update_paddle(
+                Vector(1 - 2 * player, 0.3, 0).hat,
+                Vector(x, 0.9 + 0.001 * step, 0),
+                Vector(0.5 - player, 0, 0),
+                player,
+            )
+        model.trajectory()
+        model.check_point()
+        states.append(
+            (model.ball_position, model.ball_velocity, model.ball_spin)
+        )
+    return states
+
+
+def test_snapshot_restore():
+    """
+    Test that restoring a snapshot, into the same model or another one,
+    gives back the whole game state, so that stepping on from it repeats
+    the game exactly, including through a reused snapshot buffer.
+    """
+    model = launched(Vector(1.3, 0.9, 0), Vector(6, 1, 0))
+    model._player_score = (3, 4)
+    rally(model, 20)
+    # a paddle facing straight up has no frame to pack
+    model.update_paddle(Vector(0, 1, 0), Vector(0.9, 0.9, 0), Vector(), 0)
+    snapshot = model.snapshot()
+    assert len(snapshot) == model.snapshot_size
+    expected = rally(model, 60)
+    edges = model.paddle_edges
+    for restored in (model, air_pong_model.PongModel(11, 2)):
+        restored.restore(snapshot)
+        assert restored.player_score == (3, 4)
+        assert restored.paddle_normal[0] == Vector(0, 1, 0)
+        assert restored.snapshot() == snapshot
+        assert rally(restored, 60) == expected
+        assert restored.paddle_edges == edges
+
+    buffer = bytearray(model.snapshot_size)
+    model.restore(snapshot)
+    model.restore(model.snapshot(buffer))
+    assert bytes(buffer) == snapshot
+    assert rally(model, 60) == expected
@@ -0,0 +1,195 @@
+"""
+Test the networked game server, its snapshots and its remote clients.
+"""
+
+import socket
+import threading
+import time
+import pytest
+import air_pong_model
+from air_pong_net import (
+    LossyLink,
+    PongClient,
+    PongServer,
+    decode_snapshot,
+    dequantize_state,
+    encode_snapshot,
+    quantize_state,
+)
+from air_pong_vector import Vector
+
+# pylint: disable=protected-access
+
+
+class FakeClock:
+    """
+    Clock that only moves when told to.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_snapshot_round_trip():
+    """
+    Test that snapshots decode to the quantized state, within a millimetre
+    of the model, and that a delta against the previous step only holds the
+    fields that changed.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    model.trajectory()
+    state = quantize_state(model)
+    full = encode_snapshot(1, state)
+    assert decode_snapshot(full, {}) == (1, state)
+    values = dequantize_state(state)
+    assert values[0:3] == pytest.approx(
+        [model.ball_position.x, model.ball_position.y, 0], abs=5e-4
+    )
+    assert values[20] == 2  # in play, with player 1 serving
+
+    model.trajectory()
+    delta = encode_snapshot(2, quantize_state(model), 1, state)
+    assert decode_snapshot(delta, {1: state}) == (2, quantize_state(model))
+    assert len(delta) < len(full)
+    # only the height of the served ball changed, by less than 64 mm, which
+    # takes one byte
+    assert len(delta) == len(encode_snapshot(2, state, 1, state)) + 1
+    with pytest.raises(KeyError):
+        decode_snapshot(delta, {})
+
+
+def test_lossy_link():
+    """
+    Test that a lossy link drops its share of datagrams and holds the rest
+    until they are due.
+    """
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(1.0)
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    clock = FakeClock()
+    link = LossyLink(sender, loss=0.25, latency=0.05, seed=3, clock=clock)
+    try:
+        for number in range(400):
+            link.sendto(bytes([number % 256]), receiver.getsockname())
+        assert 60 < link.dropped < 140
+        link.pump()
+        receiver.setblocking(False)
+        with pytest.raises(BlockingIOError):
+            receiver.recv(16)
+        clock.now = 0.05
+        link.pump()
+        receiver.settimeout(1.0)
+        assert len(receiver.recv(16)) == 1
+    finally:
+        receiver.close()
+        sender.close()
+
+
+def test_interpolation():
+    """
+    Test that the client blends the ball between snapshots, holds the score
+    of the earlier one and doesn't blend the ball across a serve.
+    """
+    client = PongClient(("127.0.0.1", 9))
+    try:
+        client._welcomed((1, 1, 11, 2, 0.01, 30.0))
+        model = air_pong_model.PongModel(11, 2)
+        home = quantize_state(model)
+        model.serve()
+        served = quantize_state(model)
+        model._ball_position.set(1.0, 1.0, 0.0)
+        first = quantize_state(model)
+        model._ball_position.set(2.0, 0.8, 0.0)
+        model._player_score = (1, 0)
+        second = quantize_state(model)
+        client.snapshots = {0: home, 10: served, 20: first, 30: second}
+        values = client.state_at(0.25)
+        assert values[0:2] == pytest.approx([1.5, 0.9])
+        assert values[18:20] == [0, 0]
+        assert client.state_at(0.3)[18:20] == [1, 0]
+        assert client.state_at(0.05) == dequantize_state(home)
+        assert client.state_at(1.0) == dequantize_state(second)
+    finally:
+        client.close()
+
+
+def test_localhost_game():
+    """
+    Test a game between two clients over localhost, losing and delaying
+    datagrams both ways: paddles reach the server, a serve gets through,
+    snapshots are mostly deltas that decode to the server's state, and the
+    bandwidth and tick jitter are reported.
+    """
+    conditions = {"loss": 0.1, "latency": 0.02, "jitter": 0.01}
+    server = PongServer(tick_rate=30.0, seed=1, **conditions)
+    stop = threading.Event()
+    thread = threading.Thread(target=server.run, kwargs={"stop": stop})
+    thread.start()
+    clients = [
+        PongClient(server.address, seed=player, **conditions)
+        for player in (0, 1)
+    ]
+    try:
+        for client in clients:
+            client.connect()
+        assert sorted(client.player for client in clients) == [0, 1]
+        with pytest.raises(RuntimeError):
+            PongClient(server.address).connect()
+        left = next(client for client in clients if client.player == 0)
+        left.serve()
+        start = time.perf_counter()
+        height = 1.0
+        while time.perf_counter() < start + 1.5:
+            height = 1.0 + 0.1 * (time.perf_counter() - start)
+            left.update_paddle(
+                Vector(1, 0, 0), Vector(0.8, height, 0), Vector(), 0
+            )
+            # the left client can't move the right player's paddle
+            left.update_paddle(
+                Vector(-1, 0, 0), Vector(4.0, 0.2, 0), Vector(), 1
+            )
+            for client in clients:
+                client.trajectory()
+            time.sleep(0.01)
+        stop.set()
+        thread.join()
+
+        assert server.model.paddle_position[0].y == pytest.approx(
+            height, abs=0.05
+        )
+        assert server.model.paddle_position[1].y != pytest.approx(0.2)
+        # the ball is either still in play or has fallen for a point
+        assert not server.model.ball_home or server.model.player_score == (
+            0,
+            1,
+        )
+        for client in clients:
+            assert client.mirror.paddle_position[0].y == pytest.approx(
+                height, abs=0.05
+            )
+            tick = max(client.snapshots)
+            if tick in server._history:
+                assert client.snapshots[tick] == server._history[tick]
+
+        stats = server.stats()
+        assert stats["tick_rate"] == pytest.approx(30, rel=0.15)
+        assert 0 <= stats["tick_jitter"] <= stats["max_tick_jitter"]
+        full_size = len(encode_snapshot(0, quantize_state(server.model)))
+        for client_stats in stats["clients"]:
+            assert client_stats["snapshots"] > 30
+            assert client_stats["full_snapshots"] < 0.2 * (
+                client_stats["snapshots"]
+            )
+            assert client_stats["bytes_per_snapshot"] < full_size
+            assert 0 < client_stats["bandwidth"] < 2000
+    finally:
+        stop.set()
+        thread.join()
+        for client in clients:
+            client.close()
+        server.close()
@@ -0,0 +1,134 @@
+"""
+Test drawing detected hand landmarks onto camera frames.
+"""
+
+from types import SimpleNamespace
+import numpy as np
+import pytest
+import air_pong_overlay
+
+
+def hand(center, offset=None):
+    """
+    Return 21 landmarks of a hand with fingers fanned out above the wrist.
+
+    Args:
+        center: a float for the normalized x position of the wrist
+        offset: an optional (index, x) pair moving one landmark's x position
+    """
+    landmarks = [SimpleNamespace(x=center, y=0.8, z=0.0)]
+    for finger in range(5):
+        angle = np.pi * (0.2 + 0.15 * finger)
+        for joint in range(1, 5):
+            landmarks.append(
+                SimpleNamespace(
+                    x=center + 0.04 * joint * np.cos(angle),
+                    y=0.8 - 0.06 * joint * np.sin(angle),
+                    z=-0.01 * joint,
+                )
+            )
+    if offset is not None:
+        landmarks[offset[0]].x = offset[1]
+    return landmarks
+
+
+def result(*hands):
+    """
+    Return a detection result holding the given hands.
+    """
+    return SimpleNamespace(hand_landmarks=list(hands))
+
+
+def frame():
+    """
+    Return a 1280x720 frame of noise.
+    """
+    return np.random.default_rng(0).integers(
+        0, 256, (720, 1280, 3), dtype=np.uint8
+    )
+
+
+def test_matches_mediapipe():
+    """
+    Test that the overlay draws the same picture as mediapipe's drawing
+    utilities, apart from where connections of different colours overlap.
+    """
+    mp = pytest.importorskip("mediapipe")
+    # pylint: disable=no-name-in-module,no-member
+    from mediapipe.framework.formats import (  # pylint: disable=import-outside-toplevel
+        landmark_pb2,
+    )
+
+    image = frame()
+    hands = (hand(0.3), hand(0.7))
+    expected = np.copy(image)
+    for landmarks in hands:
+        proto = landmark_pb2.NormalizedLandmarkList()
+        proto.landmark.extend(
+            [
+                landmark_pb2.NormalizedLandmark(x=point.x, y=point.y)
+                for point in landmarks
+            ]
+        )
+        mp.solutions.drawing_utils.draw_landmarks(
+            expected,
+            proto,
+            mp.solutions.hands.HAND_CONNECTIONS,
+            mp.solutions.drawing_styles.get_default_hand_landmarks_style(),
+            mp.solutions.drawing_styles.get_default_hand_connections_style(),
+        )
+    assert set(air_pong_overlay.HAND_CONNECTIONS) == set(
+        mp.solutions.hands.HAND_CONNECTIONS
+    )
+    annotated = air_pong_overlay.LandmarkOverlay().draw(image, result(*hands))
+    drawn = np.any(expected != image, axis=2)
+    different = np.any(annotated != expected, axis=2)
+    assert drawn.sum() > 5000
+    assert different.sum() < 0.1 * drawn.sum()
+
+
+def test_reuses_buffer():
+    """
+    Test that drawing leaves the frame alone and draws into the same buffer
+    every time, and that a frame without hands is passed straight through.
+    """
+    image = frame()
+    original = np.copy(image)
+    overlay = air_pong_overlay.LandmarkOverlay()
+    first = overlay.draw(image, result(hand(0.5)))
+    second = overlay.draw(image, result(hand(0.4)))
+    assert second is first
+    assert np.array_equal(image, original)
+    assert overlay.draw(image, result()) is image
+
+
+def test_landmarks_outside_frame():
+    """
+    Test that a landmark outside the frame and its connections aren't drawn,
+    while the rest of the hand is.
+    """
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+    overlay = air_pong_overlay.LandmarkOverlay()
+    # Move the middle fingertip past the right edge of the frame.
+    annotated = overlay.draw(image, result(hand(0.5, offset=(12, 1.5))))
+    whole = air_pong_overlay.LandmarkOverlay().draw(image, result(hand(0.5)))
+    middle_dip = hand(0.5)[11]
+    assert annotated[int(middle_dip.y * 720), int(middle_dip.x * 1280)].any()
+    assert np.any(annotated != whole)
+    assert not annotated[:, -1].any()
+
+
+def test_reduced_scale():
+    """
+    Test that a scaled down overlay draws a smaller preview with the hand in
+    the same place relative to the frame.
+    """
+    overlay = air_pong_overlay.LandmarkOverlay(scale=0.5)
+    wrist = hand(0.5)[0]
+    annotated = overlay.draw(frame(), result(hand(0.5)))
+    assert annotated.shape == (360, 640, 3)
+    assert tuple(annotated[int(wrist.y * 360), int(wrist.x * 640)]) == (
+        air_pong_overlay.LANDMARK_COLOURS[0]
+    )
+    empty = overlay.draw(frame(), result())
+    assert empty.shape == (360, 640, 3)
@@ -0,0 +1,109 @@
+"""
+Test recording matches to a binary log and replaying them.
+"""
+
+import pytest
+import air_pong_model
+import air_pong_record
+import air_pong_simulate
+
+
+def record_match(path, points=4):
+    """
+    Record a few points of scripted play and return the simulation results.
+
+    Args:
+        path: a path to write the match log to
+        points: an int number of points to play
+    """
+    model = air_pong_model.PongModel(11, 2)
+    policies = [
+        air_pong_simulate.TrackingPaddle(player, jitter=0.2, seed=player)
+        for player in (0, 1)
+    ]
+    with air_pong_record.MatchRecorder(
+        model, path, snapshot_interval=50
+    ) as recorder:
+        return air_pong_simulate.simulate(recorder, policies, max_points=points)
+
+
+def test_replay_matches_recording(tmp_path):
+    """
+    Test that replaying a recorded match reproduces every snapshot exactly
+    and ends on the recorded score.
+    """
+    path = tmp_path / "match.pong"
+    recorded = record_match(path)
+    log = air_pong_record.MatchLog(path)
+    assert log.steps == recorded["steps"]
+    assert log.time_step == air_pong_model.PongModel(11, 2).time_step
+    assert {0, 50, log.steps} <= set(log.snapshots)
+    results = air_pong_record.replay(log)
+    assert results["first_mismatch"] is None
+    assert results["divergence"] == 0
+    assert results["score"] == recorded["score"]
+
+
+def test_replay_detects_divergence(tmp_path):
+    """
+    Test that replaying into a model with different physics reports where
+    its state first left the recording.
+    """
+    path = tmp_path / "match.pong"
+    record_match(path, points=1)
+    log = air_pong_record.MatchLog(path)
+    results = air_pong_record.replay(
+        log, air_pong_model.PongModel(11, 2, time_step=0.011)
+    )
+    assert results["first_mismatch"] == 50
+    assert results["divergence"] > 0
+
+
+def test_serve_before_check_point(tmp_path):
+    """
+    Test that a serve made between a physics step and its point check, as
+    from the keyboard thread, is made after the check, as a replay makes it.
+    """
+    path = tmp_path / "match.pong"
+    with air_pong_record.MatchRecorder(
+        air_pong_model.PongModel(11, 2), path
+    ) as recorder:
+        recorder.serve()
+        served = False
+        while not served:
+            recorder.trajectory()
+            if (
+                recorder.bounce_count in (-1, 2)
+                or recorder.ball_position.y < -2
+            ):
+                recorder.serve()
+                served = True
+            recorder.check_point()
+        # the point was given before the ball was served again
+        assert recorder.player_score != (0, 0)
+        assert not recorder.ball_home
+        for _ in range(20):
+            recorder.trajectory()
+            recorder.check_point()
+        score = recorder.player_score
+    results = air_pong_record.replay(air_pong_record.MatchLog(path))
+    assert results["first_mismatch"] is None
+    assert results["score"] == score
+
+
+def test_truncated_log(tmp_path):
+    """
+    Test that a log cut off mid-record, as when the game is killed, reads
+    up to the last whole record, and that other files are rejected.
+    """
+    path = tmp_path / "match.pong"
+    record_match(path, points=1)
+    data = path.read_bytes()
+    path.write_bytes(data[:-30])
+    log = air_pong_record.MatchLog(path)
+    assert log.steps > 0
+    assert air_pong_record.replay(log)["first_mismatch"] is None
+
+    path.write_bytes(b"step,player\n0,1\n")
+    with pytest.raises(ValueError):
+        air_pong_record.MatchLog(path)
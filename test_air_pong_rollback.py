@@ -0,0 +1,94 @@
+"""
+Test rewinding and resimulating the model for late inputs.
+"""
+
+import pytest
+import air_pong_model
+from air_pong_rollback import RollbackBuffer
+from air_pong_vector import Vector
+
+
+def swing(game, step, tick=None):
+    """
+    Move the left paddle up into the served ball's path for a step.
+
+    Args:
+        game: a RollbackBuffer or PongModel
+        step: an int step the paddle is moved for
+        tick: an optional int step to pass to a RollbackBuffer
+    """
+    kwargs = {} if tick is None else {"tick": tick}
+    game.update_paddle(
+        Vector(1, 0.5, 0).hat,
+        Vector(1.05, 0.6 + 0.01 * step, 0),
+        Vector(1, 0.5, 0),
+        0,
+        **kwargs,
+    )
+
+
+def test_late_input():
+    """
+    Test that an input arriving after its step leaves the game exactly as if
+    it had arrived on time.
+    """
+    on_time = air_pong_model.PongModel(11, 2)
+    on_time.serve()
+    late = RollbackBuffer(air_pong_model.PongModel(11, 2), ticks=32)
+    late.serve()
+    for step in range(50):
+        if step in (10, 30):
+            swing(on_time, step)
+        if step == 10:
+            swing(late, step)
+        on_time.trajectory()
+        on_time.check_point()
+        late.trajectory()
+        late.check_point()
+    assert late.model.snapshot() != on_time.snapshot()
+    swing(late, 30, tick=30)
+    assert late.rollbacks == 1 and late.resimulated == 20
+    assert late.tick == 50
+    assert late.model.snapshot() == on_time.snapshot()
+    assert late.ball_position == on_time.ball_position
+
+
+def test_rollback_limits():
+    """
+    Test that inputs for future steps wait for them, inputs too old to roll
+    back to apply now, and that rolling back too far is refused.
+    """
+    game = RollbackBuffer(air_pong_model.PongModel(11, 2), ticks=8)
+    game.serve(tick=3)
+    for _ in range(2):
+        game.trajectory()
+        assert game.ball_home
+    game.trajectory()
+    assert not game.ball_home
+    for _ in range(11):
+        game.trajectory()
+    assert game.oldest() == 7
+    swing(game, 0, tick=2)
+    assert game.rollbacks == 0
+    assert game.paddle_position[0].x == pytest.approx(1.05)
+    with pytest.raises(ValueError):
+        game.rollback(6)
+
+
+def test_repeated_rollbacks_resimulate_same_state():
+    """
+    Test that rolling back and resimulating 10 steps of a rally again and
+    again resimulates them each time and lands on the same state.
+    """
+    game = RollbackBuffer(air_pong_model.PongModel(11, 2))
+    game.serve()
+    for step in range(40):
+        swing(game, step)
+        game.trajectory()
+    swing(game, 30, tick=30)
+    state = game.model.snapshot()
+    for _ in range(19):
+        swing(game, 30, tick=30)
+        assert game.model.snapshot() == state
+    assert game.resimulated == 200
+    assert game.tick == 40
@@ -0,0 +1,87 @@
+"""
+Test the fixed timestep game loop scheduler.
+"""
+
+import pytest
+from vpython import vector
+import air_pong_scheduler
+
+
+class FakeClock:
+    """
+    Clock that only moves forward when slept on or advanced by a test.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_scheduler(clock):
+    """
+    Build a scheduler with 10 ms physics, 30 Hz input and 60 Hz rendering.
+    """
+    return air_pong_scheduler.FixedStepScheduler(
+        physics_step=0.01,
+        input_interval=1 / 30,
+        render_interval=1 / 60,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+
+def test_physics_follows_real_time():
+    """
+    Test that slow and fast frames simulate the same amount of time.
+    """
+    for frame_time in (0.001, 0.05):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        while clock.now < 1:
+            last_tick = clock.now
+            scheduler.tick(lambda: None, lambda: None, lambda alpha: None)
+            clock.now += frame_time
+        assert scheduler.physics_steps == pytest.approx(last_tick / 0.01, abs=1)
+
+
+def test_input_and_render_rates():
+    """
+    Test that input and rendering run at their own rates.
+    """
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    inputs = []
+    alphas = []
+    while clock.now < 1:
+        scheduler.tick(lambda: inputs.append(1), lambda: None, alphas.append)
+    assert len(inputs) == pytest.approx(30, abs=1)
+    assert len(alphas) == pytest.approx(60, abs=1)
+    assert all(0 <= alpha < 1 for alpha in alphas)
+
+
+def test_slow_frame_is_capped():
+    """
+    Test that a stalled frame only queues max_frame_time of physics.
+    """
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    scheduler.tick(lambda: None, lambda: None, lambda alpha: None)
+    steps = scheduler.physics_steps
+    clock.now += 10
+    scheduler.tick(lambda: None, lambda: None, lambda alpha: None)
+    assert scheduler.physics_steps - steps == pytest.approx(25, abs=1)
+
+
+def test_interpolate():
+    """
+    Test blending between two physics states.
+    """
+    blended = air_pong_scheduler.interpolate(
+        vector(0, 0, 0), vector(2, 4, 0), 0.25
+    )
+    assert blended == vector(0.5, 1, 0)
@@ -0,0 +1,42 @@
+"""
+Test headless simulation of the ping pong game.
+"""
+
+import air_pong_model
+import air_pong_simulate
+
+
+def test_simulate_to_win():
+    """
+    Test that scripted paddles play a full game to a winner.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    policies = [
+        air_pong_simulate.TrackingPaddle(player, jitter=0.2, seed=player)
+        for player in (0, 1)
+    ]
+    results = air_pong_simulate.simulate(model, policies)
+    assert results["winner"] in (1, 2)
+    assert results["steps"] == sum(
+        rally["steps"] for rally in results["rallies"]
+    )
+    assert sum(results["score"]) == len(results["rallies"])
+
+
+def test_recorded_paddles(tmp_path):
+    """
+    Test that recorded paddle inputs reach the model on their step.
+    """
+    path = tmp_path / "inputs.csv"
+    path.write_text(
+        "step,player,normal_x,normal_y,normal_z,position_x,position_y,"
+        "position_z,velocity_x,velocity_y,velocity_z\n"
+        "0,1,-1,0,0,3.9,0.7,0,-2,0,0\n"
+    )
+    model = air_pong_model.PongModel(11, 2)
+    paddles = air_pong_simulate.RecordedPaddles(path)
+    paddles.update(model, 1)
+    assert model.paddle_velocity[1].x == 0
+    paddles.update(model, 0)
+    assert model.paddle_velocity[1].x == -2
+    assert model.paddle_position[1].y == 0.7
@@ -0,0 +1,110 @@
+"""
+Test filtering and predicting paddle positions from timestamped detections.
+"""
+
+import numpy as np
+import pytest
+from air_pong_tracker import PaddleTracker, prediction_error
+
+# Detection delay to predict over, like the camera and landmarker add (s).
+LATENCY = 0.05
+
+
+def swing(timestamp):
+    """
+    Returns the true position of a hand swinging around the paddle zone.
+
+    Args:
+        timestamp: a float time (s)
+    """
+    return np.array(
+        [
+            1.0 + 0.4 * np.sin(2 * np.pi * 0.8 * timestamp),
+            1.2 + 0.2 * np.sin(2 * np.pi * 0.5 * timestamp + 1),
+            0.0,
+        ]
+    )
+
+
+def still(_):
+    """
+    Returns the true position of a hand held still.
+    """
+    return np.array([1.0, 1.2, 0.0])
+
+
+def detect(truth, seed=0, count=300):
+    """
+    Returns detection times between 25 and 45 ms apart and the true
+    positions at them with 1 cm of jitter, like a landmarker's results.
+
+    Args:
+        truth: a function returning the true position at a time
+        seed: an int seed for the timing and jitter
+        count: an int number of detections
+    """
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.uniform(0.025, 0.045, count))
+    detections = [
+        truth(timestamp) + rng.normal(0, 0.01, 3) * [1, 1, 0]
+        for timestamp in times
+    ]
+    return times, detections
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_prediction_beats_latest_detection(seed):
+    """
+    Test that predicting a moving hand forward over the latency is at least
+    twice as close to where it is as the latest detection, and that a still
+    hand's jitter is smoothed.
+    """
+    times, detections = detect(swing, seed)
+    raw = prediction_error(times, detections, swing, LATENCY)
+    tracked = prediction_error(
+        times, detections, swing, LATENCY, PaddleTracker()
+    )
+    assert tracked < raw / 2
+
+    times, detections = detect(still, seed)
+    raw = prediction_error(times, detections, still, 0)
+    tracked = prediction_error(times, detections, still, 0, PaddleTracker())
+    assert tracked < raw
+
+
+def test_velocity_from_timestamps():
+    """
+    Test that the velocity is found from the detections' own timestamps,
+    however unevenly they arrive, and that repeated results are ignored.
+    """
+    tracker = PaddleTracker()
+    velocity = np.array([2.0, -1.0, 0.5])
+    times = np.cumsum(np.random.default_rng(0).uniform(0.01, 0.06, 40))
+    for timestamp in times:
+        tracker.update(velocity * timestamp, timestamp)
+        # the same result is read again on the next input update
+        tracker.update(velocity * timestamp, timestamp)
+    assert tracker.velocity == pytest.approx(velocity, abs=0.01)
+    position, predicted_velocity = tracker.predict(times[-1] + 0.03)
+    assert position == pytest.approx(velocity * (times[-1] + 0.03), abs=1e-3)
+    assert predicted_velocity == pytest.approx(velocity, abs=0.01)
+
+
+def test_prediction_limit_and_reset():
+    """
+    Test that predictions stop at max_prediction and that a hand found again
+    after being lost starts from where it is found, at rest.
+    """
+    tracker = PaddleTracker(max_prediction=0.1)
+    for step in range(20):
+        tracker.update((step * 0.03, 0, 0), step * 0.03)
+    latest = tracker.position.copy()
+    position, _ = tracker.predict(tracker.timestamp + 1)
+    assert position == pytest.approx(latest + tracker.velocity * 0.1)
+    position, _ = tracker.predict(tracker.timestamp - 1)
+    assert position == pytest.approx(latest)
+
+    tracker.update((2.0, 1.0, 0.0), tracker.timestamp + 1)
+    position, velocity = tracker.predict(tracker.timestamp + 0.05)
+    assert position == pytest.approx([2.0, 1.0, 0.0])
+    assert not velocity.any()
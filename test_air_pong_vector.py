@@ -0,0 +1,97 @@
+"""
+Test the lightweight vector used by the physics model against vpython.
+"""
+
+import random
+import numpy as np
+import pytest
+from vpython import vector
+from air_pong_vector import Vector
+
+
+def components(value):
+    """
+    Return the components of a vector as a tuple.
+    """
+    return (value.x, value.y, value.z)
+
+
+def close(value):
+    """
+    Return the components of a vpython vector for comparing with rounding
+    error, since its compiled version can differ in the last bit.
+    """
+    return pytest.approx(components(value), rel=1e-12, abs=1e-12)
+
+
+def test_matches_vpython():
+    """
+    Test that the vector methods the model uses give the same results as
+    vpython's vector.
+    """
+    rng = random.Random(0)
+    for _ in range(500):
+        first = [rng.uniform(-3, 3) for _ in range(3)]
+        second = [rng.uniform(-3, 3) for _ in range(3)]
+        angle = rng.uniform(-4, 4)
+        ours = (Vector(*first), Vector(*second))
+        theirs = (vector(*first), vector(*second))
+        assert components(ours[0].rotate(angle=angle, axis=ours[1])) == close(
+            theirs[0].rotate(angle=angle, axis=theirs[1])
+        )
+        assert components(ours[0].rotate(angle=angle)) == close(
+            theirs[0].rotate(angle=angle)
+        )
+        assert components(ours[0].cross(ours[1])) == close(
+            theirs[0].cross(theirs[1])
+        )
+        assert components(ours[0].proj(ours[1])) == close(
+            theirs[0].proj(theirs[1])
+        )
+        assert components(ours[0].hat) == close(theirs[0].hat)
+        assert ours[0].diff_angle(ours[1]) == pytest.approx(
+            theirs[0].diff_angle(theirs[1]), rel=1e-12
+        )
+        assert ours[0].dot(ours[1]) == pytest.approx(theirs[0].dot(theirs[1]))
+        assert ours[0].mag == pytest.approx(theirs[0].mag, rel=1e-12)
+    assert components(Vector(0, 0, 0).hat) == (0, 0, 0)
+    # A zero axis scales the vector by cos(angle), as vpython does.
+    assert components(Vector(1, 2, 3).rotate(1, Vector(0, 0, 0))) == close(
+        vector(1, 2, 3).rotate(1, vector(0, 0, 0))
+    )
+
+
+def test_mixed_arithmetic():
+    """
+    Test that vectors combine with vpython vectors and numpy scalars and
+    always hold plain floats.
+    """
+    assert vector(1, 2, 3) + Vector(1, 1, 1) == Vector(2, 3, 4)
+    assert vector(1, 2, 3) - Vector(1, 1, 1) == Vector(0, 1, 2)
+    assert Vector(1, 2, 3) - vector(1, 1, 1) == Vector(0, 1, 2)
+    assert Vector(1, 2, 3) == vector(1, 2, 3)
+    assert Vector(1, 2, 3) != Vector(1, 2, 4)
+    scaled = np.float64(2) * Vector(1, 2, 3)
+    assert isinstance(scaled, Vector)
+    assert all(type(value) is float for value in components(scaled))
+    assert Vector(1, 2, 3) * np.float64(2) == Vector(2, 4, 6)
+    assert Vector(2, 4, 6) / 2 == Vector(1, 2, 3)
+    assert -Vector(1, 2, 3) == Vector(-1, -2, -3)
+
+
+def test_in_place():
+    """
+    Test that set and add_scaled update the vector in place while copy and
+    the operators leave it alone.
+    """
+    position = Vector(1, 2, 3)
+    same = position.set(4, 5, 6)
+    assert same is position
+    assert position == Vector(4, 5, 6)
+    copied = position.copy()
+    position.add_scaled(Vector(1, 0, -1), 2)
+    assert position == Vector(6, 5, 4)
+    assert copied == Vector(4, 5, 6)
+    moved = position + Vector(1, 1, 1)
+    assert moved is not position
+    assert position == Vector(6, 5, 4)
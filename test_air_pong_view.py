@@ -0,0 +1,159 @@
+"""
+Test that the view's dirty-rect rendering matches redrawing every frame.
+"""
+
+import os
+import numpy as np
+import pytest
+import air_pong_model
+from air_pong_vector import Vector
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+# pylint: disable=wrong-import-position,wrong-import-order
+from air_pong_view import PongView
+
+
+@pytest.fixture(name="view", scope="module")
+def fixture_view():
+    """
+    Return a view drawing to an offscreen surface, shared by the tests since
+    its images are slow to load.
+    """
+    view = PongView(
+        pygame.Surface((1500, 600)), air_pong_model.PongModel(11, 2)
+    )
+    view.prepare_images()
+    return view
+
+
+def show(view, model):
+    """
+    Point a view at a new model and redraw the whole screen next frame.
+    """
+    view.pong_instance = model
+    view.invalidate()
+
+
+def pixels(surface):
+    """
+    Return the pixels of a surface as an array.
+    """
+    return pygame.surfarray.array3d(surface)
+
+
+def full_redraw(view):
+    """
+    Return the pixels of a frame drawn from scratch.
+    """
+    view.invalidate()
+    view.display()
+    return pixels(view.screen)
+
+
+def test_dirty_rects_match_full_redraw(view):
+    """
+    Test that each frame drawn by redrawing only the ball and paddles is the
+    same as a full redraw, and that the returned rects cover every pixel
+    that changed.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    show(view, model)
+    assert view.display() == [view.screen.get_rect()]
+    for frame in range(40):
+        model.update_paddle(
+            Vector(np.cos(0.02 * frame), np.sin(0.02 * frame), 0),
+            Vector(0.6 + 0.005 * frame, 1, 0),
+            Vector(0.5, 0, 0),
+            0,
+        )
+        previous = pixels(view.screen)
+        for _ in range(3):
+            model.trajectory()
+        rects = view.display()
+        current = pixels(view.screen)
+        assert np.array_equal(current, full_redraw(view))
+        changed = np.any(current != previous, axis=2)
+        covered = np.zeros_like(changed)
+        for rect in rects:
+            covered[rect.left : rect.right, rect.top : rect.bottom] = True
+        assert not np.any(changed & ~covered)
+
+
+class CountingFont:  # pylint: disable=too-few-public-methods
+    """
+    Font wrapper recording the text of every render.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.renders = []
+
+    def render(self, text, *args):
+        """
+        Record the text and render it with the wrapped font.
+        """
+        self.renders.append(text)
+        return self.font.render(text, *args)
+
+
+def test_score_change(view):
+    """
+    Test that a score change redraws the whole screen and that each score
+    is only rendered once.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    show(view, model)
+    font = view.score_font
+    view._score_text = {}  # pylint: disable=protected-access
+    view.score_font = CountingFont(font)
+    view.display()
+    assert view.display() != [view.screen.get_rect()]
+    model._player_score = (1, 0)  # pylint: disable=protected-access
+    assert view.display() == [view.screen.get_rect()]
+    assert np.array_equal(pixels(view.screen), full_redraw(view))
+    model._player_score = (0, 0)  # pylint: disable=protected-access
+    view.display()
+    assert sorted(view.score_font.renders) == ["0", "1"]
+    view.score_font = font
+
+
+def test_hud(view):
+    """
+    Test that heads up display text is drawn over the game and erased when
+    it changes.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    model.serve()
+    show(view, model)
+    plain = full_redraw(view)
+    rects = view.display(
+        hud=["total     p50  40.0 ms", "inference p50  20.0 ms"]
+    )
+    assert rects[-1].top > rects[-2].top == 0
+    assert np.any(pixels(view.screen) != plain)
+    view.display()
+    assert np.array_equal(pixels(view.screen), plain)
+
+
+def test_preview(view):
+    """
+    Test that a camera frame is shown in the top right corner in its own
+    colours and erased once it is no longer passed.
+    """
+    model = air_pong_model.PongModel(11, 2)
+    show(view, model)
+    plain = full_redraw(view)
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    frame[..., 0] = 200  # blue, as frames are BGR
+    frame[:10, :10] = (0, 0, 255)
+    rects = view.display(preview=frame)
+    assert rects[-1] == pygame.Rect(1340, 0, 160, 120)
+    shown = pixels(view.screen)
+    # surfarray arrays are indexed by x then y and are RGB
+    assert tuple(shown[1400, 60]) == (0, 0, 200)
+    assert tuple(shown[1345, 5]) == (255, 0, 0)
+    view.display()
+    assert np.array_equal(pixels(view.screen), plain)
@@ -0,0 +1,185 @@
+"""
+Test capture and hand detection in a worker process through shared memory.
+"""
+
+import time
+import numpy as np
+import pytest
+from air_pong_landmarks import unpack_result
+from air_pong_worker import FrameRing, InferenceWorker, ResultRing
+
+mp = pytest.importorskip("mediapipe")
+containers = mp.tasks.components.containers
+
+
+def hands_at(*hands):
+    """
+    Returns a HandLandmarkerResult of hands with every landmark at one point.
+
+    Args:
+        hands: (name, x, y) tuples of each hand's handedness and position
+    """
+    return mp.tasks.vision.HandLandmarkerResult(
+        handedness=[
+            [containers.Category(score=0.9, display_name=name)]
+            for name, _, _ in hands
+        ],
+        hand_landmarks=[
+            [containers.NormalizedLandmark(x=x, y=y, z=-0.1) for _ in range(21)]
+            for _, x, y in hands
+        ],
+        hand_world_landmarks=[],
+    )
+
+
+class FakeCamera:
+    """
+    Camera giving 20 frames a second, each filled with its frame number.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def read(self):
+        """
+        Return the next frame once it is due.
+        """
+        time.sleep(0.05)
+        self.count += 1
+        frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        frame[:, :32] = self.count % 256
+        return True, frame
+
+    def get(self, _):
+        """
+        Report the capture format.
+        """
+        return 20.0
+
+    def release(self):
+        """
+        Nothing to release.
+        """
+
+
+def detect_bright_half(image, timestamp_ms):  # pylint: disable=unused-argument
+    """
+    Find a right hand in the middle of the right half of an image if it is
+    bright, and otherwise in the middle of the left half.
+    """
+    x = 0.75 if image[:, image.shape[1] // 2 :].any() else 0.25
+    return hands_at(("Right", x, 0.5))
+
+
+def make_detector():
+    """
+    Returns the fake detector, as the worker creates it in its process.
+    """
+    return detect_bright_half
+
+
+def test_result_ring_round_trip():
+    """
+    Test that results come back in order once each, and that a consumer
+    falling a ring behind gets the newest results and counts the rest lost.
+    """
+    ring = ResultRing(slots=4)
+    reader = ResultRing(slots=4, name=ring.name)
+    try:
+        assert len(reader.get()) == 0
+        ring.put(
+            hands_at(("Right", 0.25, 0.5), ("Left", 0.75, 0.4)), 7, (1, 2, 3)
+        )
+        records = reader.get()
+        assert len(records) == 1 and len(reader.get()) == 0
+        record = records[0]
+        assert record["timestamp_ms"] == 7
+        assert record["complete_time"] == 3
+        result = unpack_result(record)
+        assert [hand[0].display_name for hand in result.handedness] == [
+            "Right",
+            "Left",
+        ]
+        landmark = result.hand_landmarks[1][9]
+        assert (landmark.x, landmark.y, landmark.z) == pytest.approx(
+            (0.75, 0.4, -0.1)
+        )
+        assert unpack_result(record) == result
+
+        for timestamp_ms in range(10, 16):
+            ring.put(hands_at(), timestamp_ms, (0, 0, 0))
+        records = reader.get()
+        assert list(records["timestamp_ms"]) == [12, 13, 14, 15]
+        assert reader.lost == 2
+        assert not unpack_result(records[0]).hand_landmarks
+    finally:
+        reader.close()
+        ring.close(unlink=True)
+
+
+def test_frame_ring_detects_overwrites():
+    """
+    Test that the newest frame is read in place and only once, and that a
+    frame kept past slots - 1 newer ones is no longer intact.
+    """
+    ring = FrameRing((4, 4, 3), slots=3)
+    reader = FrameRing((4, 4, 3), slots=3, name=ring.name)
+    try:
+        assert reader.latest() is None
+        ring.put(np.full((4, 4, 3), 1, dtype=np.uint8))
+        number, frame = reader.latest()
+        assert reader.latest() is None
+        assert (frame == 1).all()
+        ring.put(np.full((4, 4, 3), 2, dtype=np.uint8))
+        ring.put(np.full((4, 4, 3), 3, dtype=np.uint8))
+        assert reader.intact(number) and (frame == 1).all()
+        ring.put(np.full((4, 4, 3), 4, dtype=np.uint8))
+        assert not reader.intact(number)
+        assert reader.latest()[0] == 3
+    finally:
+        reader.close()
+        ring.close(unlink=True)
+
+
+def test_worker_process():
+    """
+    Test that the worker process captures, flips and detects on frames and
+    returns results, remapped from the region of interest, along with the
+    frames.
+    """
+    worker = InferenceWorker(
+        source=FakeCamera, detector=make_detector, roi=(0.5, 0, 1, 1)
+    ).start()
+    try:
+        assert worker.capture_format == (20, 20, 20.0)
+        records = []
+        deadline = time.time() + 10
+        while len(records) < 3 and time.time() < deadline:
+            records.extend(worker.results.get())
+            time.sleep(0.01)
+        assert len(records) >= 3
+        timestamps = [record["timestamp_ms"] for record in records]
+        assert timestamps == sorted(set(timestamps))
+        record = records[-1]
+        assert (
+            record["capture_time"]
+            <= record["submit_time"]
+            <= record["complete_time"]
+            <= time.perf_counter()
+        )
+        # The flipped frame's bright half is on the right, which is all of
+        # the region of interest, so the hand is found at 0.75 of the way
+        # across it.
+        landmark = unpack_result(record).hand_landmarks[0][0]
+        assert landmark.x == pytest.approx(0.875)
+
+        latest = None
+        while latest is None and time.time() < deadline:
+            latest = worker.frames.latest()
+        number, frame = latest
+        assert frame.shape == (48, 64, 3)
+        assert frame[:, 32:].any() and not frame[:, :32].any()
+        assert worker.frames.intact(number)
+    finally:
+        worker.stop()
+    assert not worker.process.is_alive()